@@ -1,27 +1,71 @@
 # backtester.py
 
+import argparse
 import backtrader as bt
+import contextlib
+import io
 import os
+import time
 import pandas as pd
-from data_handler import load_data
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from data_access import load_arrays, load_data
+import catalog
+import charts
+import feeds
+import profiler
+import run_recorder
+import vector_engine
+from metrics import analysis_metrics
+from results_db import ResultsDB
 from datetime import datetime
 import importlib.util
 import sys
 
+# Columns of the per-pair rows written by Backtester.run_batch
+BATCH_COLUMNS = ['strategy', 'symbol', 'timeframe', 'bars', 'final_portfolio_value', 'return_pct',
+                 *analysis_metrics({}, {}, {}), 'elapsed', 'error']
+
 class Backtester:
-    def __init__(self, strategy_name, cash=1000, commission=0.001):
+    def __init__(self, strategy_name, cash=1000, commission=0.001, engine="backtrader", headless=False,
+                 profile=False, streaming=False):
         """
         Initializes the backtester with a dynamic strategy class.
         :param strategy_name: The name of the strategy class to load (e.g., 'SampleStrategy').
         :param cash: The starting cash for the backtest.
         :param commission: The commission for trades.
+        :param engine: "backtrader", or "vectorized" to evaluate the strategy with
+                       vector_engine (only strategies listed in vector_engine.SIGNALS).
+        :param headless: Skip cerebro.plot() and backtrader's plotting observers; record
+                         only the chart series and write charts to results/charts/ in the
+                         background instead.
+        :param profile: Time the run per component (feeds, indicators, strategy, logging,
+                        broker, analyzers) and append the report to results/profiles.jsonl.
+        :param streaming: Read the data in chunks from the store while the backtest runs
+                          and keep only the bars the strategy looks back at (exactbars=1),
+                          so memory does not grow with the history. Metrics are identical
+                          to a preloaded run; per-bar recordings and charts, which grow
+                          with the history, are not produced.
         """
+        if engine not in ("backtrader", "vectorized"):
+            raise ValueError(f"Unknown engine '{engine}'. Options: backtrader, vectorized")
+        if engine == "vectorized" and strategy_name not in vector_engine.SIGNALS:
+            raise ValueError(f"Strategy '{strategy_name}' has no vectorized signals. "
+                             f"Supported: {', '.join(vector_engine.SIGNALS)}")
+        if streaming and engine != "backtrader":
+            raise ValueError("Streaming backtests need the backtrader engine.")
         self.strategy_name = strategy_name
-        self.timeframe = timeframes
-        self.symbols = symbols
+        self.timeframes = []  # Filled by add_data
+        self.symbols = []
         self.cash = cash
         self.commission = commission
-        self.cerebro = bt.Cerebro()
+        self.engine = engine
+        self.headless = headless
+        self.profile = profile
+        self.streaming = streaming
+        self.run_profile = None  # profiler.RunProfile of the configured cerebro
+        self.datasets = []  # (symbol, timeframe, DataFrame) for the vectorized engine
+        # Observers only feed cerebro.plot(); exactbars=1 bounds every line buffer to its lookback
+        self.cerebro = bt.Cerebro(stdstats=not (headless or streaming), exactbars=1 if streaming else False)
         self.strategy = self.load_strategy(strategy_name)
         self.results = None  # To store the results after the backtest
 
@@ -49,17 +93,51 @@ class Backtester:
 
         raise ValueError(f"Strategy '{strategy_name}' not found in {strategies_folder} folder.")
 
-    def add_data(self, symbols, timeframes):
+    @staticmethod
+    def list_strategies():
+        """
+        Names of the strategy classes defined in the strategies folder, sorted.
+        """
+        strategies_folder = "strategies"
+        names = []
+        for file in os.listdir(strategies_folder):
+            if file.endswith(".py") and not file.startswith("__"):
+                module_name = file[:-3]
+                spec = importlib.util.spec_from_file_location(module_name, os.path.join(strategies_folder, file))
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[module_name] = module
+                spec.loader.exec_module(module)
+                names.extend(name for name, obj in vars(module).items()
+                             if isinstance(obj, type) and issubclass(obj, bt.Strategy)
+                             and obj.__module__ == module_name)
+        return sorted(names)
+
+    def add_data(self, symbols, timeframes, start=None, end=None):
         """
         Dynamically add single or multiple pairs and timeframes.
+        Raises ValueError before loading anything if a pair is not in Data_store.
+        :param start: Optional first timestamp of the backtest window.
+        :param end: Optional last timestamp of the backtest window.
         """
+        catalog.validate_request(symbols, timeframes, start=start, end=end)
+        self.symbols.extend(symbol for symbol in symbols if symbol not in self.symbols)
+        self.timeframes.extend(timeframe for timeframe in timeframes if timeframe not in self.timeframes)
         for symbol in symbols:
             for timeframe in timeframes:
+                if self.streaming:
+                    print(f"Streaming data for {symbol} on {timeframe} timeframe...")
+                    self.cerebro.adddata(feeds.StreamingFeed(dataname=(symbol, timeframe), start=start, end=end),
+                                         name=f"{symbol}_{timeframe}")
+                    continue
                 print(f"Loading data for {symbol} on {timeframe} timeframe...")
-                data = load_data(symbol, timeframe)
-                if data is not None:
-                    data_feed = bt.feeds.PandasData(dataname=data)
-                    self.cerebro.adddata(data_feed, name=f"{symbol}_{timeframe}")
+                if self.engine == "vectorized":
+                    data = load_data(symbol, timeframe, start=start, end=end)
+                    if data is not None:
+                        self.datasets.append((symbol, timeframe, data))
+                    continue
+                arrays = load_arrays(symbol, timeframe, start=start, end=end)
+                if arrays is not None:
+                    self.cerebro.adddata(feeds.ArrayFeed(dataname=arrays), name=f"{symbol}_{timeframe}")
 
     def configure(self):
         """
@@ -73,97 +151,389 @@ class Backtester:
         self.cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
         self.cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
         self.cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='tradeanalyzer')
+        if not self.streaming:
+            # Keeps every bar, which a streaming run must not; headless charts are drawn from it too
+            self.cerebro.addanalyzer(run_recorder.EquityRecorder, _name='recorder')
+        else:
+            self.cerebro.addanalyzer(feeds.HistoryPruner, _name='pruner')
+        if self.profile and self.engine == "backtrader":
+            self.run_profile = profiler.attach(self.cerebro)
 
     def run(self):
         """
         Run the backtest and save results.
         """
+        if self.engine == "vectorized":
+            self.run_vectorized()
+            return
+
         print("Starting portfolio value:", self.cerebro.broker.getvalue())
-        self.results = self.cerebro.run()
+        if self.run_profile is not None:
+            self.results = profiler.run(self.cerebro, self.run_profile)
+        else:
+            self.results = self.cerebro.run()
         print("Ending portfolio value:", self.cerebro.broker.getvalue())
+        if self.run_profile is not None:
+            self.save_profile()
 
         # Save results with a timestamp
         self.save_results()
 
         # Plot the results
-        self.cerebro.plot()
+        if self.streaming:
+            return
+        if self.headless:
+            self.export_charts()
+        else:
+            self.cerebro.plot()
+
+    def run_vectorized(self):
+        """
+        Run the strategy with vector_engine on the single added data feed, which
+        is what backtrader strategies trade (self.data), and save the results.
+        """
+        if len(self.datasets) != 1:
+            raise ValueError("The vectorized engine backtests one symbol/timeframe at a time.")
+        data = self.datasets[0][2]
+        print("Starting portfolio value:", self.cash)
+        self.results = [vector_engine.run(self.strategy, data, cash=self.cash, commission=self.commission)]
+        print("Ending portfolio value:", self.results[0].final_value)
+        self.save_results()
+        if self.headless:
+            self.export_charts()
 
-    def save_results(self):
+    def save_profile(self):
         """
-        Save backtest results to a CSV file with a timestamp.
+        Append the profile of the last run to results/profiles.jsonl and return it.
         """
-        results_dir = "results"
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir)
+        strat = self.results[0]
+        report = self.run_profile.report(symbol=",".join(self.symbols), timeframe=",".join(self.timeframes),
+                                         params={name: getattr(strat.params, name) for name in strat.params._getkeys()})
+        path = profiler.save_profiles([report])
+        print(f"Profile: {report['bars_per_second']:.0f} bars/s, "
+              + ", ".join(f"{category} {report[f'{category}_pct']:.0f}%" for category in profiler.CATEGORIES)
+              + f" (saved to {path})")
+        return report
 
+    def export_charts(self):
+        """
+        Queue the equity/drawdown/trade charts of the last run for the background
+        exporter. Returns the image paths; they are complete after charts.exporter().wait().
+        """
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        name = "_".join([self.strategy_name, *self.symbols, *self.timeframes]).replace("/", "")
+        paths = []
+        for i, strat in enumerate(self.results):
+            if self.engine == "vectorized":
+                series = charts.vector_series(strat, self.datasets[0][2])
+            else:
+                series = strat.analyzers.recorder.chart_series()
+            path = charts.chart_path(f"{name}_{timestamp}_{i}")
+            charts.export_charts(series, path, title=f"{self.strategy_name} {' '.join(self.symbols)}")
+            paths.append(path)
+        print(f"Charts queued for {', '.join(paths)}")
+        return paths
+
+    def run_batch(self, symbols=None, timeframes=None, start=None, end=None, max_workers=None, save=True,
+                  chart=False, profile=False):
+        """
+        Backtest the strategy independently on every (symbol, timeframe) pair in a
+        process pool, one Cerebro (or vectorized run) per pair. Unlike add_data/run,
+        the pairs do not share a broker, so each row is a standalone result. Batch
+        runs are always headless, and stream their data when the Backtester does.
+        :param symbols: Symbols to test; None takes every symbol in Data_store.
+        :param timeframes: Timeframes to test; None takes every stored timeframe.
+        :param max_workers: Worker processes (defaults to the number of CPUs).
+        :param save: Append the rows to the results database as one "batch" run and
+                     save each pair's equity curve and trade ledger next to them.
+        :param chart: Also write each pair's charts to results/charts/ as
+                      <strategy>_<symbol>_<timeframe>_run<run_id>.png (a timestamp
+                      instead of the run id when not saving), rendered in the
+                      background while the remaining pairs run.
+        :param profile: Profile every pair's run and append the reports to results/profiles.jsonl.
+        :return: (DataFrame with one metrics row per pair, aggregate summary dict).
+        """
+        datasets = catalog.load_catalog().drop_duplicates(['symbol', 'timeframe'])
+        if symbols is None or timeframes is None:
+            jobs = [(row.symbol, row.timeframe, row.rows) for row in datasets.itertuples()
+                    if (symbols is None or row.symbol in symbols)
+                    and (timeframes is None or row.timeframe in timeframes)]
+        else:
+            catalog.validate_request(symbols, timeframes, start=start, end=end)
+            rows = {(row.symbol, row.timeframe): row.rows for row in datasets.itertuples()}
+            jobs = [(symbol, timeframe, rows.get((symbol, timeframe), 0))
+                    for symbol in symbols for timeframe in timeframes]
+        if not jobs:
+            raise ValueError("No datasets selected for the batch backtest.")
+
+        # Longest runs first so no worker is left with a big dataset at the end
+        jobs.sort(key=lambda job: job[2], reverse=True)
+        max_workers = max_workers or os.cpu_count() or 1
+        print(f"Backtesting {self.strategy_name} on {len(jobs)} datasets with {max_workers} workers...")
+
+        run_id = None
+        if save:
+            # Registered up front so the charts written while the batch runs carry its run id
+            with ResultsDB() as db:
+                run_id = db.start_run("batch", strategy=self.strategy_name, cash=self.cash,
+                                      commission=self.commission, engine=self.engine, start=start, end=end)
+        chart_tag = f"run{run_id}" if run_id is not None else datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+        rows = [None] * len(jobs)
+        recordings = {}
+        profiles = []
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(backtest_dataset, self.strategy_name, symbol, timeframe, self.cash,
+                            self.commission, self.engine, start, end, chart=chart,
+                            profile=profile, streaming=self.streaming): i
+                for i, (symbol, timeframe, _) in enumerate(jobs)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                symbol, timeframe, _ = jobs[index]
+                try:
+                    rows[index] = future.result()
+                    recordings[(symbol, timeframe)] = rows[index].pop("recording")
+                    if profile and rows[index].get("profile") is not None:
+                        profiles.append(rows[index].pop("profile"))
+                    series = rows[index].pop("charts", None)
+                    if series is not None:
+                        charts.export_charts(series,
+                                             charts.chart_path(f"{self.strategy_name}_{symbol}_{timeframe}_{chart_tag}"),
+                                             title=f"{self.strategy_name} {symbol} {timeframe}")
+                    print(f"[{symbol} {timeframe}] final value {rows[index]['final_portfolio_value']:.2f}")
+                except Exception as e:
+                    rows[index] = {"strategy": self.strategy_name, "symbol": symbol, "timeframe": timeframe,
+                                   "error": str(e)}
+                    print(f"[{symbol} {timeframe}] FAILED: {e}")
+        if chart:
+            charts.exporter().wait()
+        elapsed = time.perf_counter() - started
+        if profiles:
+            print(f"Profiles of {len(profiles)} runs saved to {profiler.save_profiles(profiles)}")
 
-        filename = f"{results_dir}/backtest_results_{timestamp}.csv"
+        results_df = pd.DataFrame(rows, columns=BATCH_COLUMNS).sort_values(['symbol', 'timeframe']).reset_index(drop=True)
+        summary = summarize_batch(results_df, self.cash, elapsed)
+        print(f"Finished {summary['runs']} runs in {elapsed:.1f}s ({summary['failed']} failed, "
+              f"{summary['profitable']} profitable, mean return {summary['mean_return_pct']:.2f}%)")
+
+        if save:
+            params = vector_engine.strategy_params(self.strategy)
+            with ResultsDB() as db:
+                results_df["recording"] = [
+                    run_recorder.save_recording(run_recorder.recording_path(run_id, f"{symbol}_{timeframe}"),
+                                                *recordings[(symbol, timeframe)])
+                    if recordings.get((symbol, timeframe)) is not None else None
+                    for symbol, timeframe in zip(results_df["symbol"], results_df["timeframe"])
+                ]
+                db.add_results(run_id, [{**row, "params": params} for row in results_df.to_dict("records")])
+            summary["run_id"] = run_id
+            print(f"Results saved to {db.path} as run {run_id}")
+        return results_df, summary
+
+    def save_results(self, csv=False):
+        """
+        Append the backtest results to the results database as a new run, with
+        each result's equity curve and trade ledger in results/runs/<run_id>/.
+        :param csv: Also write them to results/backtest_results_<timestamp>.csv.
+        """
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
         # Extract metrics from analyzers
         metrics = []
+        recordings = []
         for strat in self.results:
-            sharpe = strat.analyzers.sharpe.get_analysis().get('sharperatio', None)
-            drawdown = strat.analyzers.drawdown.get_analysis()
-            trades = strat.analyzers.tradeanalyzer.get_analysis()
-
-            # Safely access the trade data
-            total_trades = trades.get('total', {}).get('total', 0)
-            winning_trades = trades.get('won', {}).get('total', 0)
-            losing_trades = trades.get('lost', {}).get('total', 0)
-            win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
-
-            # Handle profit factor calculation (check if losses exist)
-            profit_factor = None
-            won_pnl = trades.get('won', {}).get('pnl', {}).get('gross', 0)
-            lost_pnl = trades.get('lost', {}).get('pnl', {}).get('gross', 0)
-
-            if lost_pnl != 0:
-                profit_factor = won_pnl / abs(lost_pnl)
-            elif won_pnl > 0:  # If no losses but there are winning trades
-                profit_factor = float('inf')  # Infinite profit factor (perfect scenario)
-
-            avg_trade_duration = trades.get('len', {}).get('average', None)
-            drawdown_duration = drawdown.get('max', {}).get('len', 0)
-            volatility = strat.analyzers.sharpe.get_analysis().get('stddev', None)
+            if self.engine == "vectorized":
+                final_value = strat.final_value
+                params = vector_engine.strategy_params(self.strategy)
+                recordings.append(run_recorder.from_vector(strat, self.datasets[0][2]))
+                analysis = analysis_metrics(strat.analyses['sharpe'], strat.analyses['drawdown'],
+                                            strat.analyses['tradeanalyzer'])
+            else:
+                final_value = self.cerebro.broker.getvalue()
+                params = {name: getattr(strat.params, name) for name in strat.params._getkeys()}
+                recordings.append(None if self.streaming else strat.analyzers.recorder.get_analysis())
+                analysis = analysis_metrics(strat.analyzers.sharpe.get_analysis(),
+                                            strat.analyzers.drawdown.get_analysis(),
+                                            strat.analyzers.tradeanalyzer.get_analysis())
 
             metrics.append({
                 "timestamp": timestamp,
                 "strategy": self.strategy_name,
-                "timeframe": self.timeframe,
-                "symbol": self.symbols,
-                "final_portfolio_value": self.cerebro.broker.getvalue(),
-                "sharpe_ratio": sharpe,
-                "max_drawdown": drawdown.get('max', {}).get('drawdown', None),
-                "drawdown_duration": drawdown_duration,
-                "volatility": volatility,
-                "total_trades": total_trades,
-                "winning_trades": winning_trades,
-                "losing_trades": losing_trades,
-                "win_rate": win_rate,
-                "avg_trade_duration": avg_trade_duration,
-                "profit_factor": profit_factor,
+                "timeframe": ",".join(self.timeframes),
+                "symbol": ",".join(self.symbols),
+                "final_portfolio_value": final_value,
+                "return_pct": (final_value / self.cash - 1) * 100,
+                **analysis,
+                "params": params,
             })
-        # Save metrics to CSV
-        results_df = pd.DataFrame(metrics)
-        results_df.to_csv(filename, index=False)
-        print(f"Results saved to {filename}")
-        
 
-if __name__ == "__main__":
-    # Define pairs and timeframes
-    symbols = ["XRP/USDT"]
-    timeframes = ["30M"]
+        with ResultsDB() as db:
+            run_id = db.start_run("backtest", strategy=self.strategy_name, cash=self.cash,
+                                  commission=self.commission, engine=self.engine)
+            name = "_".join([*self.symbols, *self.timeframes])
+            for i, (row, recording) in enumerate(zip(metrics, recordings)):
+                path = run_recorder.recording_path(run_id, name if i == 0 else f"{name}_{i}")
+                row["recording"] = run_recorder.save_recording(path, *recording) if recording is not None else None
+            db.add_results(run_id, metrics)
+        print(f"Results saved to {db.path} as run {run_id}")
+
+        if csv:
+            results_dir = "results"
+            os.makedirs(results_dir, exist_ok=True)
+            filename = f"{results_dir}/backtest_results_{timestamp}.csv"
+            pd.DataFrame(metrics).drop(columns=["params", "recording"]).to_csv(filename, index=False)
+            print(f"Results saved to {filename}")
+
+
+def backtest_dataset(strategy_name, symbol, timeframe, cash=1000, commission=0.001, engine="backtrader",
+                     start=None, end=None, quiet=True, chart=False, profile=False, streaming=False):
+    """
+    Run one standalone backtest of a strategy on a single symbol/timeframe and
+    return its metrics row. Module-level so process pool workers can run it.
+    Runs headless (no plotting observers).
+    :param quiet: Discard what the strategy prints (trade logs) while it runs.
+    :param chart: Include the chart series under "charts" for charts.export_charts().
+    :param profile: Include the profiler report of the run under "profile" (backtrader engine only).
+    :param streaming: Stream the data from the store with bounded buffers (see
+                      Backtester); the row's "recording" is then None and it has no charts.
+    The row's "recording" holds the (equity, trades) arrays of run_recorder.
+    """
+    started = time.perf_counter()
+    output = io.StringIO() if quiet else sys.stdout
+    with contextlib.redirect_stdout(output):
+        strategy = Backtester.load_strategy(strategy_name)
+        if streaming:
+            if engine != "backtrader":
+                raise ValueError("Streaming backtests need the backtrader engine.")
+            data, chart = None, False
+            data_feed = feeds.StreamingFeed(dataname=(symbol, timeframe), start=start, end=end)
+        elif engine == "vectorized":
+            data = load_data(symbol, timeframe, start=start, end=end)
+            if data is None or data.empty:
+                raise ValueError(f"No data for {symbol} {timeframe}")
+        else:
+            arrays = load_arrays(symbol, timeframe, start=start, end=end)
+            if arrays is None or not len(arrays.timestamp):
+                raise ValueError(f"No data for {symbol} {timeframe}")
+            data_feed = feeds.ArrayFeed(dataname=arrays)
+
+        if engine == "vectorized":
+            result = vector_engine.run(strategy, data, cash=cash, commission=commission)
+            final_value = result.final_value
+            analyses = result.analyses
+            series = charts.vector_series(result, data) if chart else None
+            recording = run_recorder.from_vector(result, data)
+            bars = len(data)
+        else:
+            cerebro = bt.Cerebro(stdstats=False, exactbars=1 if streaming else False)
+            cerebro.broker.setcash(cash)
+            cerebro.broker.setcommission(commission=commission)
+            cerebro.adddata(data_feed, name=f"{symbol}_{timeframe}")
+            cerebro.addstrategy(strategy)
+            cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
+            cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
+            cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='tradeanalyzer')
+            if streaming:
+                cerebro.addanalyzer(feeds.HistoryPruner, _name='pruner')
+            else:
+                cerebro.addanalyzer(run_recorder.EquityRecorder, _name='recorder')
+            if profile:
+                run_profile = profiler.attach(cerebro)
+                strat = profiler.run(cerebro, run_profile)[0]
+            else:
+                strat = cerebro.run()[0]
+            final_value = cerebro.broker.getvalue()
+            analyses = {name: getattr(strat.analyzers, name).get_analysis()
+                        for name in ('sharpe', 'drawdown', 'tradeanalyzer')}
+            series = strat.analyzers.recorder.chart_series() if chart else None
+            recording = None if streaming else strat.analyzers.recorder.get_analysis()
+            bars = len(strat)
 
-    # Specify the strategy class name (e.g., 'SampleStrategy')
-    strategy_name = "MultiLayerStrategy_v2"
+    row = {
+        "strategy": strategy_name,
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "bars": bars,
+        "final_portfolio_value": final_value,
+        "return_pct": (final_value / cash - 1) * 100,
+        **analysis_metrics(analyses['sharpe'], analyses['drawdown'], analyses['tradeanalyzer']),
+        "elapsed": time.perf_counter() - started,
+        "error": None,
+        "recording": recording,
+    }
+    if chart:
+        row["charts"] = series
+    if profile and engine != "vectorized":
+        row["profile"] = run_profile.report(symbol=symbol, timeframe=timeframe)
+    return row
+
+
+def summarize_batch(results_df, cash, elapsed):
+    """
+    Aggregate summary of a batch: counts, return and risk averages across the
+    successful runs, pooled win rate, and the best/worst pair by return.
+    """
+    ok = results_df[results_df['error'].isna()]
+    total_trades = int(ok['total_trades'].sum())
+    winning_trades = int(ok['winning_trades'].sum())
+    drawdowns = pd.to_numeric(ok['max_drawdown'], errors='coerce')
+    best = ok.loc[ok['return_pct'].idxmax()] if not ok.empty else None
+    worst = ok.loc[ok['return_pct'].idxmin()] if not ok.empty else None
+    return {
+        "runs": len(results_df),
+        "failed": len(results_df) - len(ok),
+        "profitable": int((ok['final_portfolio_value'] > cash).sum()),
+        "mean_return_pct": float(ok['return_pct'].mean()),
+        "median_return_pct": float(ok['return_pct'].median()),
+        "mean_sharpe_ratio": float(pd.to_numeric(ok['sharpe_ratio'], errors='coerce').mean()),
+        "mean_max_drawdown": float(drawdowns.mean()),
+        "worst_max_drawdown": float(drawdowns.max()),
+        "total_trades": total_trades,
+        "win_rate": winning_trades / total_trades * 100 if total_trades else 0,
+        "best": f"{best['symbol']} {best['timeframe']}" if best is not None else None,
+        "worst": f"{worst['symbol']} {worst['timeframe']}" if worst is not None else None,
+        "elapsed": elapsed,
+        "cpu_seconds": float(ok['elapsed'].sum()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest a strategy on stored data")
+    parser.add_argument("--strategy", default="MultiLayerStrategy_v2", help="Strategy class name")
+    parser.add_argument("--symbols", nargs="+", default=None, help="Pairs to test (default XRP/USDT; batch: all)")
+    parser.add_argument("--timeframes", nargs="+", default=None, help="Timeframes to test (default 30m; batch: all)")
+    parser.add_argument("--cash", type=float, default=10)
+    parser.add_argument("--commission", type=float, default=0.001)
+    parser.add_argument("--engine", choices=["backtrader", "vectorized"], default="backtrader")
+    parser.add_argument("--batch", action="store_true",
+                        help="Run every symbol/timeframe as a separate backtest in a process pool")
+    parser.add_argument("--workers", type=int, default=None, help="Batch worker processes (default: CPU count)")
+    parser.add_argument("--headless", action="store_true",
+                        help="Write charts to results/charts/ instead of opening the plot window")
+    parser.add_argument("--charts", action="store_true", help="Batch: also write each pair's charts")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Stream the data in chunks with bounded buffers instead of preloading it")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time each run per component and append the report to results/profiles.jsonl")
+    args = parser.parse_args()
 
     # Initialize backtester
-    backtester = Backtester(strategy_name=strategy_name, cash=10, commission=0.001)
+    backtester = Backtester(strategy_name=args.strategy, cash=args.cash, commission=args.commission,
+                            engine=args.engine, headless=args.headless or args.batch, profile=args.profile,
+                            streaming=args.streaming)
 
-    # Add data and configure
-    backtester.add_data(symbols, timeframes)
-    backtester.configure()
+    if args.batch:
+        results_df, summary = backtester.run_batch(args.symbols, args.timeframes, max_workers=args.workers,
+                                                   chart=args.charts, profile=args.profile)
+        for key, value in summary.items():
+            print(f"{key:>20}: {value}")
+    else:
+        # Add data and configure
+        backtester.add_data(args.symbols or ["XRP/USDT"], args.timeframes or ["30m"])
+        backtester.configure()
 
-    # Run backtest
-    backtester.run()
+        # Run backtest
+        backtester.run()
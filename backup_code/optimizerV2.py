@@ -1,18 +1,20 @@
 import itertools
 import numpy as np
 import os
-import pandas as pd
 import importlib.util
 import sys
-from datetime import datetime
 import backtrader as bt
-from data_handler import load_data
+from data_access import load_arrays
+import catalog
+import feeds
+import profiler
+from results_db import ResultsDB
 from tqdm import tqdm
 import multiprocessing
 
 
 class Optimizer:
-    def __init__(self, strategy_name, symbols, timeframes, param_ranges, cash=1000, commission=0.001, batch_size=50):
+    def __init__(self, strategy_name, symbols, timeframes, param_ranges, cash=1000, commission=0.001, batch_size=50, start=None, end=None, profile=False):
         """
         Initializes the optimizer with a strategy, parameters, and symbols.
         :param strategy_name: The name of the strategy class to optimize.
@@ -21,7 +23,10 @@ class Optimizer:
         :param param_ranges: Dictionary of parameters and their ranges to optimize.
         :param cash: Starting cash for the backtest.
         :param commission: Commission for trades.
-        :param batch_size: Number of combinations to process per batch.
+        :param batch_size: Number of combinations per batch, and of result rows per results database write.
+        :param start: Optional first timestamp of the backtest window.
+        :param end: Optional last timestamp of the backtest window.
+        :param profile: Profile every combination's run; workers append the reports to results/profiles.jsonl.
         """
         self.strategy_name = strategy_name
         self.symbols = symbols
@@ -29,8 +34,11 @@ class Optimizer:
         self.param_ranges = param_ranges
         self.cash = cash
         self.commission = commission
-        self.results = []
+        self.start = start
+        self.end = end
         self.batch_size = batch_size
+        self.run_id = None  # results_db run the rows are appended to
+        self.profile = profile
 
     def load_strategy(self):
         """
@@ -82,6 +90,7 @@ class Optimizer:
     def _run_backtest(self, params):
         """
         Runs the backtest for a given set of parameters.
+        :return: The result row; the parent process writes it to the results database.
         """
         print(f"Running backtest with parameters: {params}")
         
@@ -89,7 +98,7 @@ class Optimizer:
         strategy = self.load_strategy()
 
         # Initialize Backtrader engine
-        cerebro = bt.Cerebro()
+        cerebro = bt.Cerebro(stdstats=False)  # Headless: no plotting observers
         cerebro.broker.setcash(self.cash)
         cerebro.broker.setcommission(commission=self.commission)
 
@@ -97,13 +106,17 @@ class Optimizer:
         for symbol in self.symbols:
             for timeframe in self.timeframes:
                 print(f"Loading data for {symbol} on {timeframe} timeframe...")
-                data = load_data(symbol, timeframe)
-                if data is not None:
-                    data_feed = bt.feeds.PandasData(dataname=data)
+                arrays = load_arrays(symbol, timeframe, start=self.start, end=self.end)
+                if arrays is not None:
+                    data_feed = feeds.ArrayFeed(dataname=arrays)
                     cerebro.adddata(data_feed, name=f"{symbol}_{timeframe}")
 
-        # Add strategy with current params
-        cerebro.addstrategy(strategy, **params)
+        # Add strategy with current params. Combinations share most indicator settings,
+        # so strategies that support it reuse indicator lines across runs
+        strategy_params = dict(params)
+        if 'use_indicator_cache' in strategy.params._getkeys():
+            strategy_params.setdefault('use_indicator_cache', True)
+        cerebro.addstrategy(strategy, **strategy_params)
 
         # Add analyzers
         cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
@@ -111,10 +124,19 @@ class Optimizer:
         cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='tradeanalyzer')
 
         # Run backtest
-        result = cerebro.run()
-
-        # Store results for analysis
-        self.results.append({
+        if self.profile:
+            run_profile = profiler.attach(cerebro)
+            result = profiler.run(cerebro, run_profile)
+            # One short line per append, so concurrent workers do not interleave
+            profiler.save_profiles([run_profile.report(symbol=",".join(self.symbols),
+                                                       timeframe=",".join(self.timeframes), params=params)])
+        else:
+            result = cerebro.run()
+
+        return {
+            "strategy": self.strategy_name,
+            "symbol": ",".join(self.symbols),
+            "timeframe": ",".join(self.timeframes),
             "params": params,
             "final_portfolio_value": cerebro.broker.getvalue(),
             "sharpe_ratio": result[0].analyzers.sharpe.get_analysis().get('sharperatio', None),
@@ -122,12 +144,15 @@ class Optimizer:
             "total_trades": result[0].analyzers.tradeanalyzer.get_analysis().get('total', {}).get('total', 0),
             "winning_trades": result[0].analyzers.tradeanalyzer.get_analysis().get('won', {}).get('total', 0),
             "losing_trades": result[0].analyzers.tradeanalyzer.get_analysis().get('lost', {}).get('total', 0),
-        })
+        }
 
     def optimize(self):
         """
         Runs optimization by iterating over the parameter ranges and running backtests.
         """
+        # Fail before the sweep starts rather than halfway through it
+        catalog.validate_request(self.symbols, self.timeframes, start=self.start, end=self.end)
+
         # Initialize TQDM progress bar with better appearance
         with tqdm(total=0, desc="Optimization Progress", 
                   bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [Time: {elapsed} < {remaining}, Speed: {rate_fmt}]", 
@@ -136,30 +161,38 @@ class Optimizer:
             total_combinations = np.prod([len(v) for v in self.param_ranges.values()])
             pbar.total = total_combinations  # Set total number of combinations
 
-            # Use multiprocessing Pool for parallel execution
-            with multiprocessing.Pool() as pool:
+            # Warm the dataset cache so forked workers inherit the parsed frames of
+            # CSV-only and resampled datasets; binary ones are memory-mapped and share pages
+            for symbol in self.symbols:
+                for timeframe in self.timeframes:
+                    load_arrays(symbol, timeframe, start=self.start, end=self.end)
+
+            with multiprocessing.Pool() as pool, ResultsDB() as db:
+                self.run_id = db.start_run("optimization", strategy=self.strategy_name, cash=self.cash,
+                                           commission=self.commission, start=self.start, end=self.end)
+
+                # Workers only return their rows; the parent writes them batch_size
+                # at a time, so the database is opened and locked once per batch
                 param_batches = self._generate_param_combinations_in_batches()
-                # Use pool.map for distributing work
-                pool.starmap(self._run_backtest, [(params,) for param_batch in param_batches for params in param_batch])
+                params = (params for param_batch in param_batches for params in param_batch)
+                batch = []
+                for row in pool.imap_unordered(self._run_backtest, params):
+                    batch.append(row)
+                    pbar.update(1)
+                    if len(batch) >= self.batch_size:
+                        db.add_results(self.run_id, batch)
+                        batch = []
+                db.add_results(self.run_id, batch)
 
-            # Save all optimization results to CSV
             self.save_optimization_results()
 
     def save_optimization_results(self):
         """
-        Save all optimization results to a CSV file.
+        Report the run the results were written to.
         """
-        results_dir = "results"
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir)
-
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"{results_dir}/optimization_results_{timestamp}.csv"
-
-        # Convert results to DataFrame and save to CSV
-        df = pd.DataFrame(self.results)
-        df.to_csv(filename, index=False)
-        print(f"Optimization results saved to {filename}")
+        with ResultsDB() as db:
+            rows = len(db.query(run_id=self.run_id, columns=["id"]))
+        print(f"Optimization results saved to {db.path} as run {self.run_id} ({rows} rows)")
 
 
 if __name__ == "__main__":
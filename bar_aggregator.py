@@ -0,0 +1,148 @@
+# bar_aggregator.py
+
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from resampler import WEEK_OFFSET_MS, timeframe_to_seconds
+from storage import OHLCV_FIELDS
+
+Bar = namedtuple('Bar', ['timestamp'] + OHLCV_FIELDS)
+
+
+class RingBuffer:
+    """
+    Fixed-size OHLCV history backed by preallocated NumPy arrays. Once full,
+    each new bar overwrites the oldest one, so memory use never grows.
+    """
+
+    def __init__(self, capacity):
+        """
+        :param capacity: Number of closed bars to keep.
+        """
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, len(OHLCV_FIELDS)), dtype=np.float64)
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, bar):
+        position = (self.start + self.count) % self.capacity
+        self.timestamps[position] = bar.timestamp
+        self.values[position] = bar[1:]
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def _order(self, n=None):
+        n = self.count if n is None else min(n, self.count)
+        return (self.start + np.arange(self.count - n, self.count)) % self.capacity
+
+    def last(self):
+        if not self.count:
+            return None
+        position = (self.start + self.count - 1) % self.capacity
+        return Bar(int(self.timestamps[position]), *self.values[position].tolist())
+
+    def to_frame(self, n=None):
+        """
+        The newest 'n' bars (all by default), oldest first, in the load_data layout.
+        """
+        order = self._order(n)
+        index = pd.DatetimeIndex(pd.to_datetime(self.timestamps[order], unit='ms'), name='timestamp')
+        return pd.DataFrame(self.values[order], index=index, columns=OHLCV_FIELDS)
+
+
+class BarAggregator:
+    """
+    Builds OHLCV bars for several timeframes at once from a stream of trades.
+    Closed bars go into a RingBuffer per (symbol, timeframe) and trigger the
+    on_bar_close callback with (symbol, timeframe, Bar).
+    """
+
+    def __init__(self, timeframes=('1m', '15m', '1h'), history=1000, on_bar_close=None):
+        """
+        :param timeframes: Timeframes to build, e.g. ('1m', '15m', '1h').
+        :param history: Closed bars kept per (symbol, timeframe).
+        :param on_bar_close: Callable(symbol, timeframe, bar) invoked when a bar closes.
+        """
+        self.timeframes = list(timeframes)
+        self.periods = {tf: timeframe_to_seconds(tf) * 1000 for tf in self.timeframes}
+        self.offsets = {tf: WEEK_OFFSET_MS if tf.endswith('w') else 0 for tf in self.timeframes}
+        self.history_size = history
+        self.on_bar_close = on_bar_close
+        self.buffers = {}
+        self.open_bars = {}  # (symbol, timeframe) -> [bucket, open, high, low, close, volume]
+
+    def _bucket(self, timeframe, timestamp):
+        period, offset = self.periods[timeframe], self.offsets[timeframe]
+        return (timestamp - offset) // period * period + offset
+
+    def _close(self, symbol, timeframe):
+        state = self.open_bars.pop((symbol, timeframe))
+        bar = Bar(*state)
+        key = (symbol, timeframe)
+        if key not in self.buffers:
+            self.buffers[key] = RingBuffer(self.history_size)
+        self.buffers[key].append(bar)
+        if self.on_bar_close is not None:
+            self.on_bar_close(symbol, timeframe, bar)
+
+    def on_trade(self, symbol, timestamp, price, quantity):
+        """
+        Feed one trade (timestamp in epoch ms). Trades older than the bar being
+        built are ignored, since that bar has already been emitted.
+        """
+        for timeframe in self.timeframes:
+            key = (symbol, timeframe)
+            bucket = self._bucket(timeframe, timestamp)
+            state = self.open_bars.get(key)
+
+            if state is not None and bucket > state[0]:
+                self._close(symbol, timeframe)
+                state = None
+
+            if state is None:
+                last = self.buffers.get(key)
+                if last is not None and last.count and bucket <= last.last().timestamp:
+                    continue
+                self.open_bars[key] = [bucket, price, price, price, price, quantity]
+            elif bucket == state[0]:
+                if price > state[2]:
+                    state[2] = price
+                if price < state[3]:
+                    state[3] = price
+                state[4] = price
+                state[5] += quantity
+
+    def on_message(self, message):
+        """
+        Feed a MEXC 'spot@public.deals.v3.api' message as delivered by StreamManager.
+        """
+        symbol = message.get('s', '')
+        if symbol.endswith('USDT') and '/' not in symbol:
+            symbol = f"{symbol[:-4]}/USDT"
+        for deal in message.get('d', {}).get('deals', []):
+            self.on_trade(symbol, int(deal['t']), float(deal['p']), float(deal['v']))
+
+    def flush(self, now):
+        """
+        Close every open bar whose period ended before 'now' (epoch ms). Call it
+        from a timer so quiet symbols still emit their bars on time.
+        """
+        for symbol, timeframe in list(self.open_bars):
+            if self.open_bars[(symbol, timeframe)][0] + self.periods[timeframe] <= now:
+                self._close(symbol, timeframe)
+
+    def history(self, symbol, timeframe, n=None):
+        """
+        Closed bars as a DataFrame with the same layout as load_data, so live
+        history can be concatenated directly onto stored data.
+        """
+        buffer = self.buffers.get((symbol, timeframe))
+        if buffer is None:
+            return pd.DataFrame(columns=OHLCV_FIELDS, index=pd.DatetimeIndex([], name='timestamp'), dtype=np.float64)
+        return buffer.to_frame(n)
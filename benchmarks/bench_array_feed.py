@@ -0,0 +1,85 @@
+# benchmarks/bench_array_feed.py
+#
+# feeds.ArrayFeed against bt.feeds.PandasData. "preload" is an empty-strategy
+# Cerebro run, i.e. mostly the feed filling its line buffers; "backtest" is a
+# full run of --strategy including loading the dataset (load_arrays against
+# load_data), as every optimizer iteration does it. Medians of --repeat runs;
+# the metrics of both feeds must match exactly.
+#
+#   python benchmarks/bench_array_feed.py [--datasets BTC/USDT:15m XRP/USDT:1h] [--strategy SpotDayTradingStrategy] [--repeat 5]
+
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backtrader as bt
+import feeds
+from backtester import Backtester
+from data_access import load_arrays, load_data
+from metrics import analysis_metrics
+
+
+def pandas_feed(symbol, timeframe):
+    return bt.feeds.PandasData(dataname=load_data(symbol, timeframe))
+
+
+def array_feed(symbol, timeframe):
+    return feeds.ArrayFeed(dataname=load_arrays(symbol, timeframe))
+
+
+def run_once(make_feed, symbol, timeframe, strategy):
+    started = time.perf_counter()
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.setcash(1000)
+    cerebro.broker.setcommission(commission=0.001)
+    cerebro.adddata(make_feed(symbol, timeframe))
+    cerebro.addstrategy(strategy)
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='tradeanalyzer')
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        strat = cerebro.run()[0]
+    elapsed = time.perf_counter() - started
+    metrics = analysis_metrics(strat.analyzers.sharpe.get_analysis(), strat.analyzers.drawdown.get_analysis(),
+                               strat.analyzers.tradeanalyzer.get_analysis())
+    return elapsed, {"value": cerebro.broker.getvalue(), **metrics}
+
+
+def median_run(make_feed, symbol, timeframe, strategy, repeat):
+    runs = [run_once(make_feed, symbol, timeframe, strategy) for _ in range(repeat)]
+    return statistics.median(elapsed for elapsed, _ in runs), runs[0][1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ArrayFeed with PandasData")
+    parser.add_argument("--datasets", nargs="+", default=["BTC/USDT:15m", "ETH/USDT:1h", "XRP/USDT:1d"],
+                        help="symbol:timeframe pairs")
+    parser.add_argument("--strategy", default="SpotDayTradingStrategy")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    strategy = Backtester.load_strategy(args.strategy)
+    mismatches = 0
+    for dataset in args.datasets:
+        symbol, timeframe = dataset.split(":")
+        bars = len(load_arrays(symbol, timeframe).timestamp)
+        # Warm the dataset cache and the page cache, so neither feed pays for the first read
+        run_once(pandas_feed, symbol, timeframe, bt.Strategy)
+        run_once(array_feed, symbol, timeframe, bt.Strategy)
+
+        pandas_preload, _ = median_run(pandas_feed, symbol, timeframe, bt.Strategy, args.repeat)
+        array_preload, _ = median_run(array_feed, symbol, timeframe, bt.Strategy, args.repeat)
+        pandas_run, pandas_metrics = median_run(pandas_feed, symbol, timeframe, strategy, args.repeat)
+        array_run, array_metrics = median_run(array_feed, symbol, timeframe, strategy, args.repeat)
+        same = pandas_metrics == array_metrics
+        mismatches += not same
+        print(f"{dataset:<14} {bars:>7} bars | preload PandasData {pandas_preload * 1000:8.1f} ms, "
+              f"ArrayFeed {array_preload * 1000:7.1f} ms ({pandas_preload / array_preload:5.1f}x) | "
+              f"backtest {pandas_run:6.2f} s -> {array_run:6.2f} s ({(1 - array_run / pandas_run) * 100:+5.1f}% time saved) | "
+              f"metrics {'identical' if same else 'DIFFER'}")
+    sys.exit(1 if mismatches else 0)
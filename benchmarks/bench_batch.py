@@ -0,0 +1,40 @@
+# benchmarks/bench_batch.py
+#
+# Scaling of Backtester.run_batch with the number of worker processes. Each
+# worker count runs the same batch; speedup and parallel efficiency are
+# reported against one worker, and the metric rows must match exactly.
+#
+#   python benchmarks/bench_batch.py [--strategy SidewaysPriceActionStrategy] [--workers 1 2 4]
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtester import Backtester
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batch backtesting across worker counts")
+    parser.add_argument("--strategy", default="SidewaysPriceActionStrategy")
+    parser.add_argument("--timeframes", nargs="+", default=None, help="Restrict the batch (default: every dataset)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs available")
+    baseline = None
+    for max_workers in sorted(set(args.workers)):
+        backtester = Backtester(args.strategy, cash=1000)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results_df, summary = backtester.run_batch(timeframes=args.timeframes, max_workers=max_workers,
+                                                       save=False)
+        values = results_df.drop(columns=['elapsed'])
+        if baseline is None:
+            baseline = (summary['elapsed'], values)
+        speedup = baseline[0] / summary['elapsed']
+        print(f"{max_workers:>3} workers: {summary['runs']} runs in {summary['elapsed']:.2f}s "
+              f"(speedup {speedup:.2f}x, efficiency {speedup / max_workers * 100:.0f}%, "
+              f"identical rows: {values.equals(baseline[1])})")
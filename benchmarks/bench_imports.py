@@ -0,0 +1,61 @@
+# benchmarks/bench_imports.py
+#
+# Measure module startup cost in fresh interpreters, the way a backtest or a
+# spawned optimizer worker pays it. "eager" reproduces the old behaviour of
+# data_handler, which built the exchange client at import time.
+#
+#   python benchmarks/bench_imports.py [--repeat 7]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    "eager data_handler": "import data_handler; data_handler.get_exchange()",
+    "data_handler": "import data_handler",
+    "data_access": "import data_access",
+    "eager backtester": "import backtester, data_handler; data_handler.get_exchange()",
+    "backtester": "import backtester",
+    "python baseline": "pass",
+}
+
+
+def time_import(code, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def loads_ccxt(code):
+    check = f"{code}; import sys; print('ccxt' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", check], cwd=ROOT, check=True, capture_output=True, text=True)
+    return output.stdout.strip().endswith("True")
+
+
+def run(repeat=7):
+    results = {}
+    for name, code in CASES.items():
+        results[name] = time_import(code, repeat)
+        print(f"{name:<20} {results[name] * 1000:8.1f} ms   ccxt loaded: {loads_ccxt(code)}")
+
+    print()
+    for lazy in ("data_handler", "backtester"):
+        eager = results[f"eager {lazy}"]
+        print(f"{lazy}: {eager / results[lazy]:.1f}x faster startup, "
+              f"{(eager - results[lazy]) * 1000:.0f} ms saved per process")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark import/startup time of the data modules")
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+    run(repeat=args.repeat)
@@ -0,0 +1,80 @@
+# benchmarks/bench_indicator_cache.py
+#
+# Times an optimizer-style parameter sweep of SpotDayTradingStrategy with and
+# without the indicator cache and checks both sweeps end with the same values.
+# The cache lives in a temp directory, so the configured cache is untouched.
+#
+#   python benchmarks/bench_indicator_cache.py [--symbol XRP/USDT] [--timeframe 1h]
+
+import argparse
+import contextlib
+import io
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backtrader as bt
+import indicator_cache
+from data_access import load_data
+from strategies.SpotDayTradingStrategy import SpotDayTradingStrategy
+
+# Indicator periods take few values while the trade management params vary,
+# which is the usual shape of a sweep
+GRID = {
+    "ema_short_period": [20, 30],
+    "rsi_period": [14],
+    "stop_loss_atr": [1.0, 1.2, 1.5],
+    "take_profit_atr": [2.0, 3.0],
+    "cooldown_period": [10, 25],
+    "max_atr_threshold": [0.05],
+}
+
+
+def run_once(df, params, use_cache):
+    cerebro = bt.Cerebro()
+    cerebro.broker.setcash(10000)
+    cerebro.broker.setcommission(commission=0.001)
+    cerebro.adddata(bt.feeds.PandasData(dataname=df))
+    cerebro.addstrategy(SpotDayTradingStrategy, use_indicator_cache=use_cache, **params)
+    with contextlib.redirect_stdout(io.StringIO()):
+        cerebro.run()
+    return cerebro.broker.getvalue()
+
+
+def sweep(df, use_cache):
+    combinations = [dict(zip(GRID, values)) for values in itertools.product(*GRID.values())]
+    started = time.perf_counter()
+    values = [run_once(df, params, use_cache) for params in combinations]
+    return values, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark a parameter sweep with and without the indicator cache")
+    parser.add_argument("--symbol", default="XRP/USDT")
+    parser.add_argument("--timeframe", default="1h")
+    args = parser.parse_args()
+
+    df = load_data(args.symbol, args.timeframe)
+    cache_dir = tempfile.mkdtemp(prefix="bench_indicator_cache_")
+    indicator_cache.cache = indicator_cache.IndicatorCache(cache_dir=cache_dir)
+    try:
+        plain, plain_time = sweep(df, use_cache=False)
+        cold, cold_time = sweep(df, use_cache=True)
+        # A fresh in-process cache reads what the first sweep left on disk, like a new worker would
+        indicator_cache.cache = indicator_cache.IndicatorCache(cache_dir=cache_dir)
+        warm, warm_time = sweep(df, use_cache=True)
+        info = indicator_cache.cache.info()
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    runs = len(plain)
+    print(f"{runs} runs on {args.symbol} {args.timeframe} ({len(df)} bars)")
+    print(f"  no cache:          {plain_time:.2f}s ({plain_time / runs * 1000:.0f} ms/run)")
+    print(f"  cache, same sweep: {cold_time:.2f}s ({plain_time / cold_time:.2f}x)")
+    print(f"  cache, from disk:  {warm_time:.2f}s ({plain_time / warm_time:.2f}x, {info['disk_hits']} disk hits)")
+    print(f"  identical results: {plain == cold == warm}")
@@ -0,0 +1,67 @@
+# benchmarks/bench_profiler.py
+#
+# Overhead of profiler.attach() on Cerebro runs (best of --repeat alternating
+# runs with and without it) and the per-component split of the profiled run,
+# printed as one JSON line per strategy/timeframe.
+#
+#   python benchmarks/bench_profiler.py [--symbol XRP/USDT] [--timeframes 15m 1h] [--repeat 3]
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backtrader as bt
+import profiler
+from backtester import Backtester
+from data_access import load_data
+
+STRATEGIES = ["SidewaysPriceActionStrategy", "FibonacciRetracementStrategy", "SpotDayTradingStrategy"]
+
+
+def run_once(strategy, df, profile):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.setcash(1000)
+    cerebro.broker.setcommission(commission=0.001)
+    cerebro.adddata(bt.feeds.PandasData(dataname=df))
+    cerebro.addstrategy(strategy)
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='tradeanalyzer')
+    run_profile = profiler.attach(cerebro) if profile else None
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if profile:
+            profiler.run(cerebro, run_profile)
+        else:
+            cerebro.run()
+    return time.perf_counter() - started, run_profile
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the profiler overhead and show the time split")
+    parser.add_argument("--symbol", default="XRP/USDT")
+    parser.add_argument("--timeframes", nargs="+", default=["15m", "1h"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for timeframe in args.timeframes:
+        df = load_data(args.symbol, timeframe)
+        for name in STRATEGIES:
+            strategy = Backtester.load_strategy(name)
+            # Alternate the two variants so machine load affects both alike
+            plain, profiled = [], []
+            for _ in range(args.repeat):
+                plain.append(run_once(strategy, df, False)[0])
+                elapsed, run_profile = run_once(strategy, df, True)
+                profiled.append(elapsed)
+            plain, profiled = min(plain), min(profiled)
+            report = run_profile.report(symbol=args.symbol, timeframe=timeframe)
+            report["overhead_pct"] = (profiled / plain - 1) * 100
+            print(json.dumps({key: round(value, 4) if isinstance(value, float) else value
+                              for key, value in report.items()}))
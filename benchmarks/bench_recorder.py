@@ -0,0 +1,69 @@
+# benchmarks/bench_recorder.py
+#
+# Overhead of run_recorder.EquityRecorder on Cerebro runs: the same backtest
+# with the Backtester analyzers, with and without the recorder (best of
+# --repeat alternating runs each), plus the size of the saved recording.
+#
+#   python benchmarks/bench_recorder.py [--symbol XRP/USDT] [--timeframes 15m 1h] [--repeat 3]
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backtrader as bt
+import run_recorder
+from backtester import Backtester
+from data_access import load_data
+
+STRATEGIES = ["SidewaysPriceActionStrategy", "FibonacciRetracementStrategy", "SpotDayTradingStrategy"]
+
+
+def run_once(strategy, df, record):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.setcash(1000)
+    cerebro.broker.setcommission(commission=0.001)
+    cerebro.adddata(bt.feeds.PandasData(dataname=df))
+    cerebro.addstrategy(strategy)
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='tradeanalyzer')
+    if record:
+        cerebro.addanalyzer(run_recorder.EquityRecorder, _name='recorder')
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        strat = cerebro.run()[0]
+    return time.perf_counter() - started, strat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the equity/trade recorder overhead")
+    parser.add_argument("--symbol", default="XRP/USDT")
+    parser.add_argument("--timeframes", nargs="+", default=["15m", "1h"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_recorder_")
+    for timeframe in args.timeframes:
+        df = load_data(args.symbol, timeframe)
+        for name in STRATEGIES:
+            strategy = Backtester.load_strategy(name)
+            # Alternate the two variants so machine load affects both alike
+            plain, recorded = [], []
+            for _ in range(args.repeat):
+                plain.append(run_once(strategy, df, False)[0])
+                elapsed, strat = run_once(strategy, df, True)
+                recorded.append(elapsed)
+            plain, recorded = min(plain), min(recorded)
+            equity, trades = strat.analyzers.recorder.get_analysis()
+            path = run_recorder.save_recording(os.path.join(tmp_dir, f"{name}_{timeframe}.npz"), equity, trades)
+            print(f"{name:<30} {timeframe:>4} {len(df):>6} bars: {plain:.3f}s -> {recorded:.3f}s "
+                  f"({(recorded / plain - 1) * 100:+.1f}%), {len(trades)} trades, "
+                  f"{os.path.getsize(path) / 1024:.0f} KiB on disk")
+            os.remove(path)
+    os.rmdir(tmp_dir)
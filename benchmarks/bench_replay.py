@@ -0,0 +1,94 @@
+# benchmarks/bench_replay.py
+#
+# Offline fetch and stream benchmark against replay_exchange. Candles are
+# served from Data_store with simulated latency and errors and downloaded
+# into a temp directory, so Data_store itself is never modified.
+#
+#   python benchmarks/bench_replay.py [--latency 0.05] [--error-rate 0.05]
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import data_access
+import storage
+from downloader import DownloadJob, download_many
+from replay_exchange import create_stream_server
+from stream_manager import StreamManager, deals_channel
+
+
+def bench_fetch(workers, latency, error_rate, rate, timeframes=("15m", "30m", "1h")):
+    source_dir = config.GENERAL_SETTINGS["data_path"]
+    jobs = [DownloadJob(symbol, timeframe, days=365)
+            for symbol, timeframe in storage.list_datasets(source_dir) if timeframe in timeframes]
+
+    config.EXCHANGE.update(mode="replay", replay_latency=latency, replay_error_rate=error_rate,
+                           replay_disconnect_rate=error_rate / 2)
+    rows = []
+    for max_workers in workers:
+        tmp_dir = tempfile.mkdtemp(prefix="bench_replay_")
+        data_access.DATA_DIR = tmp_dir
+        try:
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = download_many(jobs, max_workers=max_workers, rate=rate, backoff=0.01)
+            elapsed = time.perf_counter() - started
+        finally:
+            data_access.DATA_DIR = source_dir
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        candles = sum(result.candles for result in results)
+        failed = sum(result.error is not None for result in results)
+        rows.append((max_workers, candles, failed, elapsed))
+        print(f"{max_workers:>3} workers: {candles} candles in {elapsed:.2f}s "
+              f"({candles / elapsed:,.0f} candles/s, {failed} failed jobs)")
+    return rows
+
+
+async def bench_stream(symbols, seconds, disconnect_interval, messages_per_second):
+    server = await create_stream_server(messages_per_second=messages_per_second,
+                                        disconnect_interval=disconnect_interval).start()
+    manager = StreamManager(url=server.url, reconnect_delay=0.05, max_reconnect_delay=0.5)
+    arrivals = []
+    for symbol in symbols:
+        manager.subscribe(deals_channel(symbol), callback=lambda message: arrivals.append(time.perf_counter()))
+
+    started = time.perf_counter()
+    await manager.start()
+    await asyncio.sleep(seconds)
+    await manager.stop()
+    await server.stop()
+
+    gaps = [b - a for a, b in zip(arrivals, arrivals[1:])]
+    reconnects = sum(connection.reconnects for connection in manager.connections)
+    print(f"{len(symbols)} symbols for {seconds}s: {len(arrivals)} messages "
+          f"({len(arrivals) / (time.perf_counter() - started):,.0f}/s), {server.disconnects} server drops, "
+          f"{reconnects} reconnects, longest gap {max(gaps, default=0) * 1000:.0f} ms")
+    return len(arrivals), reconnects
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark fetching and streaming against the replay exchange")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated round trip per request (s)")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Injected rate-limit error probability")
+    parser.add_argument("--rate", type=float, default=100, help="Downloader requests per second")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--disconnect-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print("Fetch throughput")
+    bench_fetch(args.workers, args.latency, args.error_rate, args.rate)
+    print()
+    print("Stream reconnects")
+    symbols = sorted({symbol for symbol, _ in storage.list_datasets(config.GENERAL_SETTINGS["data_path"])})
+    asyncio.run(bench_stream(symbols, args.seconds, args.disconnect_interval, messages_per_second=20))
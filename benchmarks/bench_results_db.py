@@ -0,0 +1,99 @@
+# benchmarks/bench_results_db.py
+#
+# Write throughput of results_db with several writer processes, then the
+# latency of leaderboard queries over the resulting table. Uses a temp
+# database filled with synthetic optimizer rows.
+#
+#   python benchmarks/bench_results_db.py [--rows 1000000] [--writers 4]
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from results_db import ResultsDB
+
+SYMBOLS = ["BTC/USDT", "ETH/USDT", "SOL/USDT", "XRP/USDT"]
+TIMEFRAMES = ["15m", "30m", "1h", "4h"]
+STRATEGIES = ["SpotDayTradingStrategy", "SidewaysPriceActionStrategy", "LiquidityHuntingStrategy"]
+
+
+def write_rows(path, run_id, seed, rows, batch_size):
+    rng = np.random.default_rng(seed)
+    with ResultsDB(path) as db:
+        for offset in range(0, rows, batch_size):
+            count = min(batch_size, rows - offset)
+            db.add_results(run_id, [{
+                "strategy": STRATEGIES[rng.integers(len(STRATEGIES))],
+                "symbol": SYMBOLS[rng.integers(len(SYMBOLS))],
+                "timeframe": TIMEFRAMES[rng.integers(len(TIMEFRAMES))],
+                "final_portfolio_value": float(rng.normal(1000, 100)),
+                "sharpe_ratio": float(rng.normal(0, 1)),
+                "max_drawdown": float(rng.uniform(0, 50)),
+                "total_trades": int(rng.integers(0, 200)),
+                "params": {"ema_short_period": int(rng.integers(5, 50)), "stop_loss_atr": float(rng.uniform(0.5, 3)),
+                           "volatility_filter": bool(rng.integers(2))},
+            } for _ in range(count)])
+    return rows
+
+
+def timed(function, repeat=20):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - started)
+    return result, np.median(times) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent writes and leaderboard queries")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per write transaction")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_results_db_")
+    path = os.path.join(tmp_dir, "results.db")
+    try:
+        with ResultsDB(path) as db:
+            run_id = db.start_run("optimization", note="benchmark")
+
+        started = time.perf_counter()
+        per_writer = args.rows // args.writers
+        with Pool(args.writers) as pool:
+            written = sum(pool.starmap(write_rows, [(path, run_id, seed, per_writer, args.batch_size)
+                                                    for seed in range(args.writers)]))
+        elapsed = time.perf_counter() - started
+
+        with ResultsDB(path) as db:
+            assert db.count() == written, "rows lost under concurrent writes"
+            print(f"{written:,} rows from {args.writers} writers in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s), "
+                  f"{os.path.getsize(path) / 1024 ** 2:.0f} MiB")
+
+            queries = {
+                "top 20 by sharpe (strategy)":
+                    lambda: db.leaderboard("sharpe_ratio", strategy="SpotDayTradingStrategy"),
+                "top 20 by sharpe (strategy, symbol, timeframe)":
+                    lambda: db.leaderboard("sharpe_ratio", strategy="SpotDayTradingStrategy", symbol="XRP/USDT",
+                                           timeframe="1h"),
+                "top 20 by value (strategy, symbol, timeframe)":
+                    lambda: db.leaderboard("final_portfolio_value", strategy="SidewaysPriceActionStrategy",
+                                           symbol="BTC/USDT", timeframe="15m"),
+                "top 20 by sharpe, >= 100 trades":
+                    lambda: db.leaderboard("sharpe_ratio", strategy="SpotDayTradingStrategy", min_trades=100),
+                "one parameter combination":
+                    lambda: db.query(strategy="SpotDayTradingStrategy", params={"ema_short_period": 20},
+                                     symbol="XRP/USDT", timeframe="1h", limit=20),
+            }
+            for name, query in queries.items():
+                board, ms = timed(query)
+                print(f"  {name:<48} {ms:8.2f} ms ({len(board)} rows)")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
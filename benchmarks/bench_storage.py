@@ -0,0 +1,75 @@
+# benchmarks/bench_storage.py
+#
+# Compare load latency and on-disk size of the CSV files in Data_store against
+# the columnar binary store. The binary copies are written to a temp directory,
+# so Data_store itself is never modified.
+#
+#   python benchmarks/bench_storage.py [--repeat 5]
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import storage
+
+
+def time_load(store, symbol, timeframe, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        store.load(symbol, timeframe)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def run(repeat=5, data_dir=None):
+    csv_store = storage.CsvStore(data_dir=data_dir)
+    tmp_dir = tempfile.mkdtemp(prefix="bench_storage_")
+    stores = {
+        "npy64": storage.NpyStore(data_dir=os.path.join(tmp_dir, "f64")),
+        "npy32": storage.NpyStore(data_dir=os.path.join(tmp_dir, "f32"), dtype="float32"),
+    }
+
+    rows = []
+    try:
+        for symbol, timeframe in storage.list_datasets(csv_store.data_dir, formats=['csv']):
+            df = csv_store.load(symbol, timeframe)
+            row = {
+                "dataset": storage.dataset_name(symbol, timeframe),
+                "rows": len(df),
+                "csv_ms": time_load(csv_store, symbol, timeframe, repeat) * 1000,
+                "csv_kb": csv_store.size_on_disk(symbol, timeframe) / 1024,
+            }
+            for name, store in stores.items():
+                store.save(df, symbol, timeframe)
+                row[f"{name}_ms"] = time_load(store, symbol, timeframe, repeat) * 1000
+                row[f"{name}_kb"] = store.size_on_disk(symbol, timeframe) / 1024
+            rows.append(row)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    results = pd.DataFrame(rows).set_index("dataset")
+    totals = results.sum(numeric_only=True)
+    pd.set_option("display.width", 200)
+    print(results.round(2).to_string())
+    print()
+    print(f"Total load time: csv {totals['csv_ms']:.1f} ms, npy64 {totals['npy64_ms']:.1f} ms "
+          f"({totals['csv_ms'] / totals['npy64_ms']:.1f}x), npy32 {totals['npy32_ms']:.1f} ms")
+    print(f"Total size: csv {totals['csv_kb']:.0f} KB, npy64 {totals['npy64_kb']:.0f} KB, "
+          f"npy32 {totals['npy32_kb']:.0f} KB")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark candle storage formats")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--data-dir", default=None)
+    args = parser.parse_args()
+    run(repeat=args.repeat, data_dir=args.data_dir)
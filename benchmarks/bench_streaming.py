@@ -0,0 +1,98 @@
+# benchmarks/bench_streaming.py
+#
+# Peak memory of preloaded (PandasData) against streaming (feeds.StreamingFeed
+# with exactbars=1) backtests as the history grows. Synthetic 1m random-walk
+# datasets of each --bars length are written to a temp column store; every run
+# happens in a fresh process and reports its RSS growth. The metrics of both
+# modes must match exactly.
+#
+#   python benchmarks/bench_streaming.py [--bars 25000 100000 200000] [--strategy SidewaysPriceActionStrategy]
+
+import argparse
+import contextlib
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import backtrader as bt
+import feeds
+import profiler
+import storage
+from backtester import Backtester
+from metrics import analysis_metrics
+
+SYMBOL = "SYN/USDT"
+
+
+def write_dataset(data_dir, bars, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.001, bars)) * close
+    df = pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.uniform(10, 1000, bars),
+    }, index=pd.DatetimeIndex(pd.date_range("2015-01-01", periods=bars, freq="1min"), name='timestamp'))
+    timeframe = f"{bars}b"
+    storage.NpyStore(data_dir=data_dir).save(df, SYMBOL, timeframe)
+    return timeframe
+
+
+def run_mode(strategy_name, data_dir, timeframe, streaming):
+    rss_before = profiler.peak_rss_mb()
+    # Strategy logs go to devnull; collecting them would grow with history too
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        strategy = Backtester.load_strategy(strategy_name)
+        cerebro = bt.Cerebro(stdstats=False, exactbars=1 if streaming else False)
+        cerebro.broker.setcash(1000)
+        cerebro.broker.setcommission(commission=0.001)
+        if streaming:
+            cerebro.adddata(feeds.StreamingFeed(dataname=(SYMBOL, timeframe), data_dir=data_dir))
+            cerebro.addanalyzer(feeds.HistoryPruner)
+        else:
+            cerebro.adddata(bt.feeds.PandasData(dataname=storage.NpyStore(data_dir=data_dir).load(SYMBOL, timeframe)))
+        cerebro.addstrategy(strategy)
+        cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
+        cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
+        cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='tradeanalyzer')
+        started = time.perf_counter()
+        strat = cerebro.run()[0]
+        elapsed = time.perf_counter() - started
+    metrics = analysis_metrics(strat.analyzers.sharpe.get_analysis(), strat.analyzers.drawdown.get_analysis(),
+                               strat.analyzers.tradeanalyzer.get_analysis())
+    return {"value": cerebro.broker.getvalue(), **metrics}, elapsed, profiler.peak_rss_mb() - rss_before
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare memory of preloaded and streaming backtests")
+    parser.add_argument("--bars", type=int, nargs="+", default=[25_000, 100_000, 200_000])
+    parser.add_argument("--strategy", default="SidewaysPriceActionStrategy")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="bench_streaming_")
+    mismatches = 0
+    try:
+        # A fresh process per run, so each peak RSS belongs to that run alone
+        with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+            for bars in args.bars:
+                timeframe = write_dataset(data_dir, bars)
+                preloaded = pool.apply(run_mode, (args.strategy, data_dir, timeframe, False))
+                streaming = pool.apply(run_mode, (args.strategy, data_dir, timeframe, True))
+                same = preloaded[0] == streaming[0]
+                mismatches += not same
+                print(f"{bars:>9} bars: preloaded +{preloaded[2]:7.1f} MiB {bars / preloaded[1]:7.0f} bars/s | "
+                      f"streaming +{streaming[2]:7.1f} MiB {bars / streaming[1]:7.0f} bars/s | "
+                      f"metrics {'identical' if same else 'DIFFER'}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,274 @@
+# benchmarks/bench_suite.py
+#
+# Regression suite for backtest throughput. Every strategy in strategies/ is
+# backtested on a fixed set of Data_store datasets, each dataset's load time
+# is measured, and a small parameter sweep is timed through Optimizer. Every
+# case runs in a fresh worker process so peak RSS is per case. The results are
+# saved to results/benchmarks/<timestamp>.json and compared with the stored
+# baseline; the exit status is 1 when a case is more than --tolerance percent
+# slower (or bigger) than the baseline, judged on the spread of the repeats
+# so timer noise does not fail the run. Runs offline; nothing is downloaded.
+#
+#   python benchmarks/bench_suite.py [--tolerance 20] [--repeat 5 (min 3)] [--save-baseline]
+#   python benchmarks/bench_suite.py --symbols BTC/USDT --timeframes 1h --strategies SpotDayTradingStrategy
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backtrader as bt
+import catalog
+import config
+import data_access
+import indicator_cache
+import profiler
+from backtester import Backtester, backtest_dataset
+from optimizer import Optimizer
+
+SYMBOLS = ["BTC/USDT", "ETH/USDT", "XRP/USDT"]
+TIMEFRAMES = ["15m", "1h", "1d"]
+
+# metric -> True when higher is better; compared as time (or size) ratios against the baseline
+METRICS = {
+    "load_seconds": False,
+    "bars_per_second": True,
+    "combos_per_second": True,
+    "peak_rss_mb": False,
+}
+MIN_DELTA_SECONDS = 0.005  # Timing differences below this are noise, whatever the percentage
+MIN_DELTA_RSS_MB = 5.0
+MIN_REPEAT = 3  # A single run has no spread to tell a slowdown from timer noise
+
+
+def case_key(case):
+    return f"{case['kind']}|{case.get('strategy') or '-'}|{case['symbol']}|{case['timeframe']}"
+
+
+def bench_load(symbol, timeframe, repeat):
+    times = []
+    for _ in range(repeat):
+        data_access.invalidate_cache(symbol, timeframe)
+        started = time.perf_counter()
+        df = data_access.load_data(symbol, timeframe)
+        times.append(time.perf_counter() - started)
+    seconds = statistics.median(times)
+    return {"bars": len(df), "seconds": seconds, "load_seconds": seconds, "times": times}
+
+
+def bench_backtest(strategy, symbol, timeframe, repeat):
+    # The gated timings come from plain runs; the profiler's hooks slow every
+    # next() call, so one extra profiled run only supplies the breakdown. It
+    # goes first and reads the dataset from disk; the first plain run is a
+    # warm-up too and is not timed.
+    report = backtest_dataset(strategy, symbol, timeframe, profile=True)["profile"]
+    rows = [backtest_dataset(strategy, symbol, timeframe) for _ in range(repeat + 1)][1:]
+    times = [row["elapsed"] for row in rows]
+    seconds = statistics.median(times)
+    return {
+        "bars": rows[0]["bars"],
+        "seconds": seconds,
+        "bars_per_second": rows[0]["bars"] / seconds,
+        "times": times,
+        **{f"{category}_pct": report[f"{category}_pct"] for category in profiler.CATEGORIES},
+    }
+
+
+def sweep_ranges(strategy_name, combos):
+    """
+    'combos' values of the strategy's first integer parameter, starting at its default.
+    """
+    strategy = Backtester.load_strategy(strategy_name)
+    for name, default in strategy.params._getpairs().items():
+        if isinstance(default, int) and not isinstance(default, bool):
+            return {name: list(range(default, default + combos))}
+    return None
+
+
+def bench_optimizer(strategy, symbol, timeframe, repeat, combos):
+    param_ranges = sweep_ranges(strategy, combos)
+    if param_ranges is None:
+        return None
+    # Private results database and indicator cache, so every suite run starts cold and leaves nothing behind
+    tmp_dir = tempfile.mkdtemp(prefix="bench_suite_")
+    config.GENERAL_SETTINGS["results_db"] = os.path.join(tmp_dir, "results.db")
+    indicator_cache.cache.cache_dir = os.path.join(tmp_dir, "indicator_cache")
+    try:
+        times = []
+        for _ in range(repeat):
+            optimizer = Optimizer(strategy, [symbol], [timeframe], param_ranges, cash=1000)
+            started = time.perf_counter()
+            optimizer.optimize()
+            times.append(time.perf_counter() - started)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    seconds = statistics.median(times)
+    return {"combos": combos, "seconds": seconds, "combos_per_second": combos / seconds, "times": times}
+
+
+def run_case(case, repeat, combos):
+    """
+    Run one case in the current (fresh) worker process and return it with its metrics.
+    """
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if case["kind"] == "load":
+            metrics = bench_load(case["symbol"], case["timeframe"], repeat)
+        elif case["kind"] == "backtest":
+            metrics = bench_backtest(case["strategy"], case["symbol"], case["timeframe"], repeat)
+        else:
+            metrics = bench_optimizer(case["strategy"], case["symbol"], case["timeframe"], repeat, combos)
+    if metrics is None:
+        return None
+    return {**case, **metrics, "peak_rss_mb": profiler.peak_rss_mb(), "elapsed": time.perf_counter() - started}
+
+
+def make_cases(strategies, symbols, timeframes, optimizer_dataset):
+    datasets = [(symbol, timeframe) for symbol in symbols for timeframe in timeframes]
+    checksums = {(row.symbol, row.timeframe): row.checksum
+                 for row in catalog.load_catalog(checksums=True).drop_duplicates(['symbol', 'timeframe']).itertuples()}
+    cases = [{"kind": "load", "strategy": None, "symbol": symbol, "timeframe": timeframe}
+             for symbol, timeframe in datasets]
+    cases += [{"kind": "backtest", "strategy": strategy, "symbol": symbol, "timeframe": timeframe}
+              for strategy in strategies for symbol, timeframe in datasets]
+    if optimizer_dataset is not None:
+        cases += [{"kind": "optimizer", "strategy": strategy, "symbol": optimizer_dataset[0],
+                   "timeframe": optimizer_dataset[1]} for strategy in strategies]
+    for case in cases:
+        # A changed dataset makes the comparison meaningless, so the baseline records what was measured
+        case["checksum"] = checksums.get((case["symbol"], case["timeframe"]))
+    return cases
+
+
+def run_suite(cases, repeat=5, combos=4):
+    results = []
+    # maxtasksperchild=1: a fresh process per case, so peak RSS and caches start clean
+    with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+        for case in cases:
+            result = pool.apply(run_case, (case, repeat, combos))
+            if result is None:
+                print(f"{case_key(case):<60} skipped (no integer parameter to sweep)")
+                continue
+            results.append(result)
+            shown = [f"{metric} {result[metric]:.3f}" for metric in METRICS if result.get(metric) is not None]
+            print(f"{case_key(result):<60} {', '.join(shown)}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    (regressions, comparisons) of every case also present in the baseline.
+    'slower_pct' compares the medians, as a time ratio for rates. A timing
+    regresses only when even the fastest repeat of this run is more than
+    'tolerance' percent slower than the slowest repeat of the baseline, so
+    an outlier repeat on either side neither fails the run nor hides a
+    slowdown. Peak RSS regresses when it grows by more than 'tolerance'
+    percent and MIN_DELTA_RSS_MB.
+    """
+    previous = {case_key(case): case for case in baseline["cases"]}
+    regressions, comparisons = [], []
+    for case in results:
+        old = previous.get(case_key(case))
+        if old is None:
+            continue
+        if old.get("checksum") != case.get("checksum") or old.get("bars") != case.get("bars"):
+            print(f"{case_key(case)}: dataset changed since the baseline, not compared")
+            continue
+        if not old.get("times"):
+            print(f"{case_key(case)}: baseline has no per-repeat times, not compared (re-save the baseline)")
+            continue
+        # Fastest current repeat against the slowest baseline repeat
+        bound_pct = (min(case["times"]) / max(old["times"]) - 1) * 100
+        for metric, higher_is_better in METRICS.items():
+            if case.get(metric) is None or not old.get(metric):
+                continue
+            ratio = old[metric] / case[metric] if higher_is_better else case[metric] / old[metric]
+            change = (ratio - 1) * 100
+            if metric == "peak_rss_mb":
+                regressed = change > tolerance and abs(case[metric] - old[metric]) >= MIN_DELTA_RSS_MB
+                bound = None
+            else:
+                bound = bound_pct
+                regressed = bound > tolerance and abs(case["seconds"] - old["seconds"]) >= MIN_DELTA_SECONDS
+            comparison = {"case": case_key(case), "metric": metric, "baseline": old[metric],
+                          "current": case[metric], "slower_pct": change, "min_vs_max_pct": bound}
+            comparisons.append(comparison)
+            if regressed:
+                regressions.append(comparison)
+    return regressions, comparisons
+
+
+def save_json(document, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=1, default=str)
+    return path
+
+
+if __name__ == "__main__":
+    benchmark_path = config.GENERAL_SETTINGS.get("benchmark_path", "./results/benchmarks/")
+    parser = argparse.ArgumentParser(description="Run the throughput regression suite")
+    parser.add_argument("--strategies", nargs="+", default=None, help="Default: every strategy in strategies/")
+    parser.add_argument("--symbols", nargs="+", default=SYMBOLS)
+    parser.add_argument("--timeframes", nargs="+", default=TIMEFRAMES)
+    parser.add_argument("--repeat", type=int, default=5,
+                        help=f"Runs per case (at least {MIN_REPEAT}); the median counts")
+    parser.add_argument("--combos", type=int, default=4, help="Parameter combinations per optimizer case")
+    parser.add_argument("--no-optimizer", action="store_true", help="Skip the optimizer cases")
+    parser.add_argument("--tolerance", type=float,
+                        default=config.GENERAL_SETTINGS.get("benchmark_tolerance_pct", 20),
+                        help="Allowed slowdown against the baseline, in percent")
+    parser.add_argument("--baseline", default=os.path.join(benchmark_path, "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args()
+    if args.repeat < MIN_REPEAT:
+        parser.error(f"--repeat must be at least {MIN_REPEAT} to separate slowdowns from timer noise")
+
+    catalog.validate_request(args.symbols, args.timeframes)
+    strategies = args.strategies or Backtester.list_strategies()
+    optimizer_timeframe = "1h" if "1h" in args.timeframes else args.timeframes[0]
+    cases = make_cases(strategies, args.symbols, args.timeframes,
+                       None if args.no_optimizer else (args.symbols[0], optimizer_timeframe))
+    print(f"Running {len(cases)} cases ({len(strategies)} strategies, repeat {args.repeat})")
+
+    started = time.perf_counter()
+    results = run_suite(cases, repeat=args.repeat, combos=args.combos)
+    document = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "backtrader": bt.__version__, "cpus": os.cpu_count()},
+        "repeat": args.repeat,
+        "elapsed": time.perf_counter() - started,
+        "cases": results,
+    }
+    path = save_json(document, os.path.join(benchmark_path, f"suite_{datetime.now():%Y-%m-%d_%H-%M-%S}.json"))
+    print(f"Results saved to {path}")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        print(f"Baseline saved to {save_json(document, args.baseline)}")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("machine", {}).get("platform") != document["machine"]["platform"]:
+        print(f"Warning: the baseline was recorded on {baseline['machine'].get('platform')}")
+    regressions, comparisons = compare(results, baseline, args.tolerance)
+    print(f"Compared {len(comparisons)} metrics against the baseline of {baseline['created']} "
+          f"(tolerance {args.tolerance:g}%)")
+    for regression in regressions:
+        bound = regression["min_vs_max_pct"]
+        bound = "" if bound is None else f", fastest repeat {bound:+.1f}% against the slowest baseline repeat"
+        print(f"REGRESSION {regression['case']} {regression['metric']}: {regression['baseline']:.3f} -> "
+              f"{regression['current']:.3f} ({regression['slower_pct']:+.1f}%{bound})")
+    sys.exit(1 if regressions else 0)
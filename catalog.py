@@ -0,0 +1,129 @@
+# catalog.py
+
+import argparse
+import os
+import pandas as pd
+import config
+import storage
+from resampler import find_base_timeframe
+
+CATALOG_COLUMNS = ['symbol', 'timeframe', 'format', 'first', 'last', 'rows', 'checksum']
+
+
+def rebuild(data_dir=None):
+    """
+    Recreate the manifest by describing every dataset on disk. Only needed
+    once for stores written before the manifest existed; after that every
+    save keeps it current.
+    """
+    data_dir = data_dir or config.GENERAL_SETTINGS["data_path"]
+    for symbol, timeframe in storage.list_datasets(data_dir):
+        for fmt in storage.STORES:
+            store = storage.get_store(fmt, data_dir=data_dir)
+            if store.exists(symbol, timeframe):
+                storage.update_manifest(store, symbol, timeframe)
+    manifest = storage.read_manifest(data_dir)
+    print(f"Catalog rebuilt with {len(manifest)} datasets.")
+    return manifest
+
+
+def load_catalog(data_dir=None, checksums=False):
+    """
+    The manifest as a DataFrame (first/last as timestamps). Reads only the
+    manifest file, building it first if the store predates it.
+    :param checksums: Hash the datasets whose checksum appends left empty
+                      first; otherwise their checksum is None.
+    """
+    data_dir = data_dir or config.GENERAL_SETTINGS["data_path"]
+    if checksums:
+        storage.fill_checksums(data_dir)
+    manifest = storage.read_manifest(data_dir)
+    if not manifest and os.path.isdir(data_dir):
+        manifest = rebuild(data_dir)
+
+    catalog = pd.DataFrame(list(manifest.values()), columns=CATALOG_COLUMNS)
+    for column in ('first', 'last'):
+        catalog[column] = pd.to_datetime(catalog[column], unit='ms')
+    return catalog.sort_values(['symbol', 'timeframe', 'format']).reset_index(drop=True)
+
+
+def _as_timestamp(value):
+    """
+    A start/end bound (epoch ms, datetime or date string, as load_data takes
+    them) as a pandas Timestamp comparable with the catalog's first/last.
+    """
+    return pd.to_datetime(storage.to_epoch_ms(value), unit='ms')
+
+
+def find(symbol=None, timeframe=None, start=None, end=None, data_dir=None):
+    """
+    Datasets matching the filters. start/end keep only datasets that cover the
+    whole requested window.
+    """
+    catalog = load_catalog(data_dir)
+    if symbol is not None:
+        catalog = catalog[catalog['symbol'] == symbol]
+    if timeframe is not None:
+        catalog = catalog[catalog['timeframe'] == timeframe]
+    if start is not None:
+        catalog = catalog[catalog['first'] <= _as_timestamp(start)]
+    if end is not None:
+        catalog = catalog[catalog['last'] >= _as_timestamp(end)]
+    return catalog.reset_index(drop=True)
+
+
+def _resample_base(symbol, timeframe, data_dir=None):
+    """
+    The stored timeframe load_data would resample 'timeframe' from, if any.
+    """
+    try:
+        return find_base_timeframe(symbol, timeframe, data_dir=data_dir)
+    except ValueError:
+        return None
+
+
+def validate_request(symbols, timeframes, start=None, end=None, data_dir=None):
+    """
+    Check up front that every symbol/timeframe pair can be loaded, either
+    natively or by resampling a stored finer timeframe, and that it covers
+    start/end when given. Raises ValueError listing every problem at once.
+    """
+    catalog = load_catalog(data_dir)
+    # The float32 copies are opt-in (load_arrays(compact=True)) and never serve load_data
+    catalog = catalog[catalog['format'].isin(storage.FULL_PRECISION_FORMATS)]
+    problems = []
+    for symbol in symbols:
+        for timeframe in timeframes:
+            entries = catalog[(catalog['symbol'] == symbol) & (catalog['timeframe'] == timeframe)]
+            if entries.empty:
+                base = _resample_base(symbol, timeframe, data_dir=data_dir)
+                if base is None:
+                    problems.append(f"{symbol} {timeframe}: not in Data_store")
+                    continue
+                entries = catalog[(catalog['symbol'] == symbol) & (catalog['timeframe'] == base)]
+
+            if start is not None and entries['first'].min() > _as_timestamp(start):
+                problems.append(f"{symbol} {timeframe}: data starts {entries['first'].min()}, "
+                                f"after {_as_timestamp(start)}")
+            if end is not None and entries['last'].max() < _as_timestamp(end):
+                problems.append(f"{symbol} {timeframe}: data ends {entries['last'].max()}, "
+                                f"before {_as_timestamp(end)}")
+
+    if problems:
+        raise ValueError("Requested data is not available:\n  " + "\n  ".join(problems))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the Data_store catalog")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild", help="Rescan Data_store and rewrite the manifest")
+    list_parser = subparsers.add_parser("list", help="List stored datasets")
+    list_parser.add_argument("--symbol", default=None)
+    list_parser.add_argument("--timeframe", default=None)
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        rebuild()
+    else:
+        pd.set_option("display.width", 200)
+        print(find(symbol=args.symbol, timeframe=args.timeframe).drop(columns='checksum').to_string(index=False))
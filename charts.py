@@ -0,0 +1,165 @@
+# charts.py
+#
+# Headless chart export. The charts need only close, portfolio value and fills
+# (run_recorder.EquityRecorder.chart_series() provides them instead of
+# backtrader's plotting observers), and ChartExporter renders
+# equity/drawdown/trade charts to image files on a background thread so
+# backtests never wait on matplotlib.
+
+import atexit
+import os
+import queue
+import threading
+import numpy as np
+import pandas as pd
+import config
+
+# backtrader date numbers are proleptic Gregorian ordinals with the time as a fraction
+EPOCH_ORDINAL = 719163.0  # date(1970, 1, 1).toordinal()
+
+
+def num_to_datetime64(nums):
+    # Rounded to the millisecond, which is the resolution of the stored candles
+    ms = np.round((np.asarray(nums, dtype=np.float64) - EPOCH_ORDINAL) * 86400000.0).astype(np.int64)
+    return pd.to_datetime(ms, unit='ms').values
+
+
+def chart_path(name):
+    """
+    <results_path>/charts/<name>.png, with '/' removed from symbol names.
+    """
+    return os.path.join(config.GENERAL_SETTINGS["results_path"], "charts", f"{name.replace('/', '')}.png")
+
+
+def make_series(datetimes, closes, values, fills):
+    """
+    The chart series as plain arrays, small enough to send between processes.
+    :param fills: Iterable of (bar, size, price); negative sizes are sells.
+    """
+    fills = np.asarray(list(fills), dtype=np.float64).reshape(-1, 3)
+    return {
+        "datetime": np.asarray(datetimes).astype('datetime64[ns]'),
+        "close": np.asarray(closes, dtype=np.float64),
+        "value": np.asarray(values, dtype=np.float64),
+        "fill_bar": fills[:, 0].astype(np.int64),
+        "fill_size": fills[:, 1],
+        "fill_price": fills[:, 2],
+    }
+
+
+def vector_series(result, data):
+    """
+    Chart series of a vector_engine.VectorResult run on 'data'.
+    """
+    return make_series(data.index.values, data['close'].to_numpy(), result.value,
+                       [(fill.bar, fill.size, fill.price) for fill in result.fills])
+
+
+def render_charts(series, path, title=""):
+    """
+    Draw price with trade markers, equity and drawdown panels and save them to 'path'.
+    Uses the object-oriented Agg API, so it is safe off the main thread.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    dates = series["datetime"]
+    value = series["value"]
+    peak = np.maximum.accumulate(value)
+    drawdown = np.where(peak > 0, (peak - value) / np.where(peak > 0, peak, 1) * 100.0, 0.0)
+
+    figure = Figure(figsize=(12, 8))
+    FigureCanvasAgg(figure)
+    price_ax, equity_ax, drawdown_ax = figure.subplots(3, 1, sharex=True, gridspec_kw={"height_ratios": [3, 2, 1]})
+
+    price_ax.plot(dates, series["close"], color="black", linewidth=0.8, label="Close")
+    bars = series["fill_bar"].clip(0, len(dates) - 1)
+    buys = series["fill_size"] > 0
+    price_ax.scatter(dates[bars[buys]], series["fill_price"][buys], marker="^", color="green", s=30, label="Buy")
+    price_ax.scatter(dates[bars[~buys]], series["fill_price"][~buys], marker="v", color="red", s=30, label="Sell")
+    price_ax.set_title(title)
+    price_ax.legend(loc="upper left")
+
+    equity_ax.plot(dates, value, color="tab:blue", linewidth=0.9)
+    equity_ax.set_ylabel("Value")
+
+    drawdown_ax.fill_between(dates, -drawdown, 0, color="tab:red", alpha=0.4)
+    drawdown_ax.set_ylabel("Drawdown %")
+
+    figure.tight_layout()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    figure.savefig(path, dpi=100)
+    return path
+
+
+class ChartExporter:
+    """
+    Background chart renderer. submit() only enqueues; one worker thread
+    renders the queued charts in order.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.rendered = []
+        self.errors = []
+        self.thread = None
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    def submit(self, series, path, title=""):
+        if self.thread is None:
+            self.start()
+        with self._idle:
+            self._pending += 1
+        self.queue.put((series, path, title))
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="chart-exporter", daemon=True)
+        self.thread.start()
+        return self
+
+    def wait(self):
+        """
+        Block until every submitted chart has been written.
+        """
+        with self._idle:
+            self._idle.wait_for(lambda: self._pending == 0)
+
+    def stop(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            series, path, title = item
+            try:
+                self.rendered.append(render_charts(series, path, title))
+            except Exception as e:
+                self.errors.append((path, e))
+                print(f"Chart export to {path} failed: {e}")
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
+
+
+_exporter = None
+
+
+def exporter():
+    """
+    The process-wide exporter, started on first use and drained at exit.
+    """
+    global _exporter
+    if _exporter is None:
+        _exporter = ChartExporter()
+        atexit.register(_exporter.stop)
+    return _exporter
+
+
+def export_charts(series, path, title=""):
+    exporter().submit(series, path, title)
@@ -4,8 +4,20 @@
 GENERAL_SETTINGS = {
     "log_level": "DEBUG",  # Options: DEBUG, INFO, WARNING, ERROR, CRITICAL
     "data_path": "./Data_store/",
+    "data_format": "npy",  # Options: npy (columnar binary), csv. Run `python storage.py migrate` to convert
+    "data_cache_max_bytes": 512 * 1024 ** 2,  # Memory budget for datasets cached by load_data
+    "tick_path": "./Data_store/ticks/",  # Captured live trades (see tick_store.py)
+    "indicator_cache_path": "./Data_store/indicator_cache/",  # Computed indicator lines shared by workers
+    "indicator_cache_max_bytes": 256 * 1024 ** 2,  # In-process budget of the indicator cache
+    "indicator_cache_max_disk_bytes": 2 * 1024 ** 3,  # Disk budget; least recently used entries are evicted
     "strategy_path": "./strategies/",
     "results_path": "./results/",
+    "results_db": "./results/results.db",  # SQLite store for every backtest/batch/optimizer run (see results_db.py)
+    "profile_path": "./results/profiles.jsonl",  # One JSON line per profiled run (see profiler.py)
+    "benchmark_path": "./results/benchmarks/",  # Suite results and baseline of benchmarks/bench_suite.py
+    "benchmark_tolerance_pct": 20,  # Slowdown against the baseline that fails the suite
+    "stream_chunk_rows": 20_000,  # Rows a streaming backtest reads from the store at a time (see feeds.py)
+    "stream_lookback": 500,  # Bars every line keeps in a streaming backtest
 }
 
 # API Credentials
@@ -16,6 +28,17 @@ APIS = {
     },
 }
 
+# Exchange endpoint. "replay" serves Data_store through replay_exchange.py so
+# fetching and streaming can be tested and benchmarked offline
+EXCHANGE = {
+    "mode": "live",  # Options: live, replay
+    "ws_url": None,  # None uses MEXC; e.g. "ws://127.0.0.1:8765" for `python replay_exchange.py`
+    "replay_latency": 0.0,  # Seconds added to every replayed request
+    "replay_max_requests_per_second": None,  # Raise RateLimitExceeded above this rate
+    "replay_error_rate": 0.0,  # Probability of a random rate-limit error per request
+    "replay_disconnect_rate": 0.0,  # Probability of a request timeout per request
+}
+
 # Email Notifications (Optional)
 EMAIL_NOTIFICATIONS = {
     "enabled": False,
@@ -0,0 +1,212 @@
+# data_access.py
+#
+# Offline data access: loading, caching and saving candles in Data_store.
+# Kept free of network libraries so backtests and optimizer workers can
+# import it without paying for ccxt or building an exchange client.
+
+import os
+import pandas as pd
+import config
+import storage
+import resampler
+
+DATA_DIR = config.GENERAL_SETTINGS["data_path"]
+
+# Process-wide cache shared by the backtester and optimizers
+dataset_cache = storage.DatasetCache(config.GENERAL_SETTINGS.get("data_cache_max_bytes", 512 * 1024 ** 2))
+
+def save_data(df, symbol, timeframe, fmt=None, data_dir=None):
+    """
+    Save the historical data to the Data_store folder using the configured storage format.
+    :param data_dir: Store folder (defaults to the configured data_path).
+    """
+    store = storage.get_store(fmt, data_dir=data_dir or DATA_DIR)
+    store.save(df, symbol, timeframe)
+    dataset_cache.invalidate(store.path(symbol, timeframe))
+    print(f"Data for {symbol} with timeframe {timeframe} saved to {store.path(symbol, timeframe)}")
+
+def merge_data(df, symbol, timeframe, data_dir=None):
+    """
+    Merge new candles with whatever is already stored (new rows win on
+    duplicate timestamps), sort by time and save the result back in the
+    format it was found in, so the dataset never ends up in two formats.
+    New datasets use the configured format.
+    :param data_dir: Store folder (defaults to the configured data_path).
+    """
+    store = storage.find_store(symbol, timeframe, data_dir=data_dir or DATA_DIR)
+    if store is not None:
+        df = pd.concat([store.load(symbol, timeframe), df])
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+    save_data(df, symbol, timeframe, fmt=store.name if store is not None else None, data_dir=data_dir)
+    return df
+
+def save_data_to_csv(df, symbol, timeframe):
+    """
+    Save the historical data to a CSV file in the Data_store folder.
+    """
+    save_data(df, symbol, timeframe, fmt='csv')
+
+def _load_cached(store, symbol, timeframe):
+    """
+    Return the cached frame for a stored dataset, reading it on a miss.
+    """
+    key = store.fingerprint(symbol, timeframe)
+    df = dataset_cache.get(key)
+    if df is None:
+        print(f"Loading data from {store.path(symbol, timeframe)}...")
+        df = store.load(symbol, timeframe)
+        dataset_cache.put(key, df)
+    return df
+
+def load_stored(symbol, timeframe, data_dir=None):
+    """
+    Load a dataset exactly as stored (no resampling), through the dataset cache.
+    :param data_dir: Store folder (defaults to the configured data_path).
+    :return: A copy of the frame, or None when the dataset is not stored.
+    """
+    store = storage.find_store(symbol, timeframe, data_dir=data_dir or DATA_DIR)
+    if store is None:
+        return None
+    return _load_cached(store, symbol, timeframe).copy()
+
+def _load_resampled(symbol, timeframe):
+    """
+    Build 'timeframe' from the finest stored timeframe that divides it. The
+    result is cached under the source fingerprint, so it is rebuilt only
+    when the source file changes.
+    """
+    try:
+        base = resampler.find_base_timeframe(symbol, timeframe, data_dir=DATA_DIR)
+    except ValueError:
+        return None
+    if base is None:
+        return None
+
+    store = storage.find_store(symbol, base, data_dir=DATA_DIR)
+    path, mtime, size = store.fingerprint(symbol, base)
+    key = (f"{path}@{timeframe}", mtime, size)
+    df = dataset_cache.get(key)
+    if df is None:
+        print(f"Resampling {symbol} {base} data to {timeframe}...")
+        df = resampler.resample_ohlcv(_load_cached(store, symbol, base), timeframe)
+        dataset_cache.put(key, df)
+    return df
+
+def _load_range(store, symbol, timeframe, start, end):
+    """
+    Return only the rows between start and end (epoch ms). A cached full frame
+    is sliced directly; stores that support range reads fetch just the window,
+    which is cached on its own; anything else is loaded in full and sliced.
+    """
+    key = store.fingerprint(symbol, timeframe)
+    if key in dataset_cache or not store.supports_range_reads:
+        return storage.slice_frame(_load_cached(store, symbol, timeframe), start, end)
+
+    path, mtime, size = key
+    range_key = (f"{path}@{start}:{end}", mtime, size)
+    df = dataset_cache.get(range_key)
+    if df is None:
+        print(f"Loading {symbol} {timeframe} rows between {start} and {end} from {path}...")
+        df = store.load_range(symbol, timeframe, start, end)
+        dataset_cache.put(range_key, df)
+    return df
+
+def load_data(symbol, timeframe, start=None, end=None):
+    """
+    Load historical data from the Data_store folder, preferring the configured
+    storage format and falling back to any other format the dataset exists in.
+    When no file exists for the timeframe it is resampled from the finest
+    stored timeframe of the same symbol.
+    :param start: Optional first timestamp to include (epoch ms, datetime or date string).
+    :param end: Optional last timestamp to include. With a binary store only the
+                rows inside [start, end] are read from disk.
+    Parsed frames are cached until the underlying file changes; callers get a
+    copy, so modifying the result never touches the cache.
+    """
+    start, end = storage.to_epoch_ms(start), storage.to_epoch_ms(end)
+    store = storage.find_store(symbol, timeframe, data_dir=DATA_DIR)
+
+    if store is None:
+        df = _load_resampled(symbol, timeframe)
+        if df is not None and (start is not None or end is not None):
+            df = storage.slice_frame(df, start, end)
+    elif start is None and end is None:
+        df = _load_cached(store, symbol, timeframe)
+    else:
+        df = _load_range(store, symbol, timeframe, start, end)
+
+    if df is not None:
+        return df.copy()
+    else:
+        print(f"Data file for {symbol} on {timeframe} not found.")
+        return None
+
+def load_arrays(symbol, timeframe, start=None, end=None, compact=False):
+    """
+    Load a dataset as storage.CandleArrays (int64 epoch-ms timestamps plus
+    OHLCV columns) without building a DataFrame.
+    :param compact: Use the memory-mapped float32 copy, creating it on first use.
+                    Worker processes mapping the same files share their pages.
+    Binary datasets are returned as read-only memory maps; CSV-only datasets
+    fall back to in-memory arrays built from load_data.
+    """
+    start, end = storage.to_epoch_ms(start), storage.to_epoch_ms(end)
+    if compact:
+        return storage.load_compact_arrays(symbol, timeframe, start=start, end=end, data_dir=DATA_DIR)
+
+    store = storage.NpyStore(data_dir=DATA_DIR)
+    if store.exists(symbol, timeframe):
+        return store.load_arrays(symbol, timeframe, start=start, end=end)
+
+    df = load_data(symbol, timeframe, start=start, end=end)
+    if df is None:
+        return None
+    return storage.CandleArrays(
+        timestamp=storage.index_to_epoch_ms(df.index),
+        **{field: df[field].to_numpy() for field in storage.OHLCV_FIELDS}
+    )
+
+def iter_chunks(symbol, timeframe, chunk_rows=20_000, start=None, end=None, data_dir=None):
+    """
+    Yield a stored dataset as storage.CandleArrays of at most chunk_rows rows,
+    read incrementally from disk and bypassing the dataset cache, so memory
+    does not grow with the length of the history. Timeframes that are only
+    available by resampling are built in full and then split into chunks.
+    """
+    start, end = storage.to_epoch_ms(start), storage.to_epoch_ms(end)
+    store = storage.find_store(symbol, timeframe, data_dir=data_dir or DATA_DIR)
+    if store is not None:
+        yield from store.iter_chunks(symbol, timeframe, chunk_rows=chunk_rows, start=start, end=end)
+        return
+
+    df = load_data(symbol, timeframe, start=start, end=end)
+    if df is None:
+        raise ValueError(f"No data for {symbol} {timeframe}")
+    timestamps = storage.index_to_epoch_ms(df.index)
+    for first in range(0, len(df), chunk_rows):
+        yield storage.CandleArrays(timestamp=timestamps[first:first + chunk_rows],
+                                   **{field: df[field].to_numpy()[first:first + chunk_rows]
+                                      for field in storage.OHLCV_FIELDS})
+
+def invalidate_cache(symbol=None, timeframe=None):
+    """
+    Drop cached datasets: one symbol/timeframe pair, every timeframe of a
+    symbol when no timeframe is given, or everything when called without arguments.
+    """
+    if symbol is None:
+        dataset_cache.invalidate()
+        return
+    if timeframe is None:
+        # '<SYMBOL>_<tf>.<ext>'; timeframes contain no '_', so other symbols sharing the prefix are kept
+        prefix = os.path.join(DATA_DIR, storage.dataset_name(symbol, ''))
+        dataset_cache.invalidate_matching(
+            lambda path: path.startswith(prefix) and '_' not in path[len(prefix):])
+        return
+    for fmt in storage.STORES:
+        dataset_cache.invalidate(storage.get_store(fmt, data_dir=DATA_DIR).path(symbol, timeframe))
+
+def cache_info():
+    """
+    Hit/miss counters and memory usage of the dataset cache.
+    """
+    return dataset_cache.info()
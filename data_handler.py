@@ -1,31 +1,66 @@
 # data_handler.py
 
-import ccxt
 import pandas as pd
-from datetime import datetime, timedelta
 import time
 import config
 import os
-import multiprocessing
-import websocket
-import json
-
-# Initialize exchange connection
-exchange = ccxt.mexc({
-    'Key': config.APIS["MEXC"]["key"],
-    'pass': config.APIS["MEXC"]["pass"],
-    'enableRateLimit': True,
-    'options': {
-        'defaultType': 'spot'  # Ensures spot mode is active
-    }
-})
+import storage
+import data_access
+from data_access import (
+    DATA_DIR, cache_info, dataset_cache, invalidate_cache, load_arrays, load_data, merge_data, save_data,
+    save_data_to_csv,
+)
+
+def create_exchange(enable_rate_limit=True):
+    """
+    Create a MEXC spot client. Workers that share an external rate limiter
+    pass enable_rate_limit=False so ccxt does not throttle them a second time.
+    ccxt is imported here rather than at module level, so offline users of
+    this module never load it. With EXCHANGE["mode"] = "replay" in config.py a
+    ReplayExchange serving Data_store is returned instead.
+    """
+    settings = config.EXCHANGE
+    if settings["mode"] == "replay":
+        from replay_exchange import ReplayExchange
+        return ReplayExchange(
+            latency=settings["replay_latency"],
+            max_requests_per_second=settings["replay_max_requests_per_second"],
+            error_rate=settings["replay_error_rate"],
+            disconnect_rate=settings["replay_disconnect_rate"],
+        )
+
+    import ccxt
+    return ccxt.mexc({
+        'Key': config.APIS["MEXC"]["key"],
+        'pass': config.APIS["MEXC"]["pass"],
+        'enableRateLimit': enable_rate_limit,
+        'options': {
+            'defaultType': 'spot'  # Ensures spot mode is active
+        }
+    })
+
+def get_exchange():
+    """
+    Return the shared exchange client, creating it on first network use.
+    Assigning data_handler.exchange directly (e.g. a stand-in) is honoured.
+    """
+    global exchange
+    if 'exchange' not in globals():
+        exchange = create_exchange()
+    return exchange
+
+def __getattr__(name):
+    # Keeps 'data_handler.exchange' working while deferring its construction
+    if name == 'exchange':
+        return get_exchange()
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
 def test_connection():
     """
     Test the connection to the exchange by fetching its status.
     """
     try:
-        status = exchange.fetch_status()
+        status = get_exchange().fetch_status()
         print("Connection successful! Exchange status:")
         print(status)
         return True
@@ -40,19 +75,20 @@ def get_available_symbols():
     If the file already exists, it will be overwritten.
     Includes error handling for common issues.
     """
+    import ccxt
     try:
         print("Fetching available symbols from the exchange...")
-        markets = exchange.load_markets()
+        markets = get_exchange().load_markets()
         symbols = [market for market in markets if '/' in market]
         if not symbols:
             print("No trading pairs found. Exiting.")
             return
 
         symbols_df = pd.DataFrame(symbols, columns=["symbol"])
-        if not os.path.exists('data_store'):
-            os.makedirs('data_store')
+        if not os.path.exists(data_access.DATA_DIR):
+            os.makedirs(data_access.DATA_DIR)
 
-        file_path = 'data_store/available_symbols.csv'
+        file_path = os.path.join(data_access.DATA_DIR, 'available_symbols.csv')
         symbols_df.to_csv(file_path, index=False)
         print(f"Available symbols successfully saved to '{file_path}'")
 
@@ -65,98 +101,152 @@ def get_available_symbols():
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
-def fetch_historical_data(symbol, timeframe='15m', days=180):
+def fetch_ohlcv_pages(symbol, timeframe, since, until=None, client=None, limiter=None, retries=5, backoff=1.0):
     """
-    Fetch historical OHLCV data from MEXC exchange for the past 'days'.
+    Yield pages of closed OHLCV candles from 'since' up to 'until' (epoch ms).
+    Transient ccxt.NetworkErrors are retried with exponential backoff; any other
+    error, or running out of retries, is raised instead of ending the fetch early.
+    :param client: ccxt exchange to use (defaults to the module exchange).
+    :param limiter: Shared rate limiter with an acquire() method; when omitted the
+                    loop sleeps for the exchange rateLimit between pages.
     """
-    all_data = []
-    since = exchange.parse8601((datetime.utcnow() - timedelta(days=days)).isoformat())
+    import ccxt
+    client = client or get_exchange()
+    timeframe_ms = client.parse_timeframe(timeframe) * 1000
 
-    while since < exchange.milliseconds():
-        try:
-            ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=1000)
-            if not ohlcv:
+    while since < (until or client.milliseconds()):
+        for attempt in range(retries + 1):
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                ohlcv = client.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=1000)
                 break
-            all_data.extend(ohlcv)
-            since = ohlcv[-1][0] + 1
-            time.sleep(exchange.rateLimit / 1000)
-        except Exception as e:
-            print(f"Error fetching data for {symbol}: {e}")
+            except ccxt.NetworkError as e:
+                if attempt == retries:
+                    raise
+                delay = backoff * 2 ** attempt
+                print(f"Network error fetching {symbol} {timeframe}: {e}. Retrying in {delay:.1f}s...")
+                time.sleep(delay)
+
+        # Keep only candles inside the window that have already closed
+        now = client.milliseconds()
+        page = [
+            row for row in ohlcv
+            if row[0] >= since and (until is None or row[0] < until) and row[0] + timeframe_ms <= now
+        ]
+        if not page:
             break
 
-    df = pd.DataFrame(all_data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-    df.set_index('timestamp', inplace=True)
-    return df
+        yield page
+        since = page[-1][0] + 1
+        if limiter is None:
+            time.sleep(client.rateLimit / 1000)
 
-def save_data_to_csv(df, symbol, timeframe):
+def fetch_historical_data(symbol, timeframe='15m', days=180):
     """
-    Save the historical data to a CSV file in the data_store folder.
+    Fetch historical OHLCV data from MEXC exchange for the past 'days'.
+    Returns None if the download fails, rather than a silently truncated frame.
     """
-    if not os.path.exists('data_store'):
-        os.makedirs('data_store')
+    all_data = []
+    client = get_exchange()
+    since = client.milliseconds() - days * 86400 * 1000
 
-    filename = f"data_store/{symbol.replace('/', '_')}_{timeframe}.csv"
-    df.to_csv(filename)
-    print(f"Data for {symbol} with timeframe {timeframe} saved to {filename}")
+    try:
+        for page in fetch_ohlcv_pages(symbol, timeframe, since, client=client):
+            all_data.extend(page)
+    except Exception as e:
+        print(f"Error fetching data for {symbol}: {e}")
+        return None
+
+    return storage.rows_to_frame(all_data)
+
+def get_last_stored_timestamp(symbol, timeframe):
+    """
+    Return the last stored candle timestamp (epoch ms) for a symbol and timeframe,
+    or None if nothing is stored yet.
+    """
+    store = storage.find_store(symbol, timeframe, data_dir=data_access.DATA_DIR)
+    if store is None:
+        return None
+    return store.last_timestamp(symbol, timeframe)
 
-def load_data(symbol, timeframe):
+def sync_historical_data(symbol, timeframe='15m', days=180, client=None, limiter=None, progress=None,
+                         retries=5, backoff=1.0):
     """
-    Load historical data from CSV files.
+    Bring the stored data for a symbol up to date by fetching only the candles
+    after the last stored timestamp. Starts from 'days' ago if nothing is stored.
+    Every page is appended as soon as it arrives, so rerunning after an
+    interruption resumes from the last saved candle.
+    Returns the number of new candles stored.
+    :param progress: Optional callable receiving the running count after each page.
     """
-    filename = f"data_store/{symbol.replace('/', '_')}_{timeframe}.csv"
+    client = client or get_exchange()
+    store = (storage.find_store(symbol, timeframe, data_dir=data_access.DATA_DIR)
+             or storage.get_store(data_dir=data_access.DATA_DIR))
+    last_timestamp = store.last_timestamp(symbol, timeframe)
 
-    if os.path.exists(filename):
-        print(f"Loading data from {filename}...")
-        df = pd.read_csv(filename, index_col='timestamp', parse_dates=True)
-        return df
+    if last_timestamp is None:
+        # The client clock, so a replay exchange starts 'days' before its own now
+        since = client.milliseconds() - days * 86400 * 1000
     else:
-        print(f"Data file for {symbol} on {timeframe} not found.")
-        return None
+        since = last_timestamp + 1
 
-def fetch_live_data(symbol):
+    stored = 0
+    for page in fetch_ohlcv_pages(symbol, timeframe, since, client=client, limiter=limiter,
+                                  retries=retries, backoff=backoff):
+        store.append(page, symbol, timeframe)
+        stored += len(page)
+        if progress is not None:
+            progress(stored)
+
+    print(f"Synced {stored} new candles for {symbol} on {timeframe}")
+    return stored
+
+def fetch_live_data(symbol, callback=None, record=False):
     """
     Fetch live market data for a specific symbol using WebSockets.
     """
-    def on_message(ws, message):
-        try:
-            data = json.loads(message)
-            print(f"Live data for {symbol}: {data}")
-        except Exception as e:
-            print(f"Error processing live data for {symbol}: {e}")
-
-    def on_error(ws, error):
-        print(f"WebSocket error for {symbol}: {error}")
-
-    def on_close(ws, close_status_code, close_msg):
-        print(f"WebSocket closed for {symbol}: {close_msg}")
-
-    def on_open(ws):
-        print(f"WebSocket connection opened for {symbol}.")
-        subscribe_message = {
-            "method": "SUBSCRIBE",
-            "params": [f"{symbol.lower()}@ticker"],
-            "id": 1
-        }
-        ws.send(json.dumps(subscribe_message))
-
-    ws_url = f"wss://wbs.mexc.com/ws"
-    ws = websocket.WebSocketApp(ws_url, on_message=on_message, on_error=on_error, on_close=on_close)
-    ws.on_open = on_open
-    ws.run_forever()
+    start_live_data_stream([symbol], callback=callback, record=record)
 
-def start_live_data_stream(symbols):
+def start_live_data_stream(symbols, callback=None, url=None, record=False):
     """
-    Start live data streams for multiple symbols using multiprocessing.
+    Start live trade streams for multiple symbols, multiplexed over a small
+    pool of asyncio WebSocket connections instead of one process per symbol.
+    :param callback: Called with every message (sync or async); prints by default.
+    :param url: WebSocket endpoint; defaults to EXCHANGE["ws_url"] in config.py,
+                then MEXC. Point it at `python replay_exchange.py` for offline runs.
+    :param record: Also capture every trade into the tick store. Trades are
+                   handed to a background TickWriter, so the receive loop never
+                   waits on disk; `python tick_store.py compact` rolls them into candles.
     """
-    processes = []
-    for symbol in symbols:
-        process = multiprocessing.Process(target=fetch_live_data, args=(symbol,))
-        processes.append(process)
-        process.start()
+    import asyncio
+    from stream_manager import MEXC_WS_URL, StreamManager, deals_channel
 
-    for process in processes:
-        process.join()
+    def print_message(message):
+        print(f"Live data for {message.get('s')}: {message.get('d')}")
+
+    writer = None
+    if record:
+        from tick_store import TickWriter
+        writer = TickWriter().start()
+
+    async def run():
+        manager = StreamManager(url=url or config.EXCHANGE["ws_url"] or MEXC_WS_URL)
+        for symbol in symbols:
+            channel = deals_channel(symbol)
+            if writer is not None:
+                manager.subscribe(channel, callback=writer.on_message)
+            if callback is not None or writer is None:
+                manager.subscribe(channel, callback=callback or print_message)
+        await manager.run_forever()
+
+    try:
+        asyncio.run(run())
+    finally:
+        if writer is not None:
+            writer.stop()
+            print(f"Recorded {writer.written} trades in {writer.chunks} chunks "
+                  f"({writer.dropped} dropped, {len(writer.errors)} failed writes).")
 
 # Testing
 if __name__ == "__main__":
@@ -167,18 +257,18 @@ if __name__ == "__main__":
     # Step 2: Get available symbols and save to CSV
     get_available_symbols()
 
-    # Step 3: Fetch and save historical data for selected symbols
+    # Step 3: Sync historical data for selected symbols (only missing candles are fetched)
     timeframes = ["1d", "4h"]  # Correct variable name for clarity
     selected_symbols = [
         "BTC/USDT", "ETH/USDT", "BNB/USDT", "SOL/USDT", "XRP/USDT","APT/USDT","TRX/USDT","TON/USDT"
     ]
 
-    for symbol in selected_symbols:
-        for timeframe in timeframes:  # Loop through each timeframe
-            print(f"Fetching data for {symbol} with timeframe {timeframe}...")
-            data = fetch_historical_data(symbol, timeframe=timeframe, days=180)
-            if data is not None and not data.empty:
-                save_data_to_csv(data, symbol, timeframe)
+    from downloader import DownloadJob, download_many
+    download_many([
+        DownloadJob(symbol, timeframe, days=180)
+        for symbol in selected_symbols
+        for timeframe in timeframes
+    ])
 
     # Step 4: Start live data streams
-    #start_live_data_stream(selected_symbols)
+    #start_live_data_stream(selected_symbols, record=True)
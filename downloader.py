@@ -0,0 +1,133 @@
+# downloader.py
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import data_access
+import data_handler
+import storage
+
+# start/end accept epoch ms, datetimes or date strings. A job without a start
+# is an incremental sync: it resumes after the last stored candle (or 'days'
+# ago when nothing is stored) and checkpoints every page to disk. Sync jobs
+# run to now, so an end without a start is rejected.
+DownloadJob = namedtuple('DownloadJob', ['symbol', 'timeframe', 'start', 'end', 'days'], defaults=[None, None, 180])
+DownloadResult = namedtuple('DownloadResult', ['job', 'candles', 'data', 'error'])
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every download worker, so the combined
+    request rate stays under the exchange limit no matter how many run at once.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        :param rate: Tokens (requests) added per second.
+        :param capacity: Maximum burst size. Defaults to one second worth of tokens.
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        Block until 'tokens' are available, then take them.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def download_many(jobs, max_workers=4, rate=None, burst=None, retries=5, backoff=1.0, save=True):
+    """
+    Run many (symbol, timeframe, range) downloads concurrently on a thread pool.
+    :param jobs: Iterable of DownloadJob or plain tuples in the same field order.
+    :param max_workers: Number of concurrent download threads.
+    :param rate: Combined requests per second across all workers. Defaults to the
+                 exchange rateLimit (one request every rateLimit ms).
+    :param burst: Token bucket capacity; defaults to one second of requests.
+    :param retries: Retries per page for transient ccxt.NetworkErrors.
+    :param backoff: Base delay in seconds for the exponential retry backoff.
+    :param save: Store ranged downloads (merged with existing data). Sync jobs always store.
+    :return: List of DownloadResult in the same order as 'jobs'.
+    """
+    jobs = [job if isinstance(job, DownloadJob) else DownloadJob(*job) for job in jobs]
+    for job in jobs:
+        if job.start is None and job.end is not None:
+            raise ValueError(f"Download job {job.symbol} {job.timeframe} has an end but no start; "
+                             f"sync jobs always run to now, so give a start for a ranged download.")
+    limiter = TokenBucket(rate or 1000 / data_handler.get_exchange().rateLimit, burst)
+    local = threading.local()
+    print_lock = threading.Lock()
+    total = len(jobs)
+
+    def report(index, job, message):
+        with print_lock:
+            print(f"[{index + 1}/{total}] {job.symbol} {job.timeframe}: {message}")
+
+    def run_job(index, job):
+        # ccxt clients are not thread-safe, so each worker gets its own and the
+        # shared bucket replaces ccxt's per-client throttling.
+        if not hasattr(local, 'client'):
+            local.client = data_handler.create_exchange(enable_rate_limit=False)
+        client = local.client
+
+        def progress(count):
+            report(index, job, f"{count} candles")
+
+        if job.start is None:
+            candles = data_handler.sync_historical_data(
+                job.symbol, job.timeframe, days=job.days, client=client, limiter=limiter,
+                progress=progress, retries=retries, backoff=backoff
+            )
+            return DownloadResult(job, candles, None, None)
+
+        rows = []
+        for page in data_handler.fetch_ohlcv_pages(
+            job.symbol, job.timeframe, storage.to_epoch_ms(job.start), until=storage.to_epoch_ms(job.end),
+            client=client, limiter=limiter, retries=retries, backoff=backoff
+        ):
+            rows.extend(page)
+            progress(len(rows))
+
+        df = storage.rows_to_frame(rows)
+        if save and not df.empty:
+            data_access.merge_data(df, job.symbol, job.timeframe)
+        return DownloadResult(job, len(df), df, None)
+
+    results = [None] * total
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_job, i, job): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+                report(index, jobs[index], f"done ({results[index].candles} candles)")
+            except Exception as e:
+                results[index] = DownloadResult(jobs[index], 0, None, e)
+                report(index, jobs[index], f"FAILED: {e}")
+
+    failed = sum(1 for result in results if result.error is not None)
+    print(f"Downloaded {total - failed}/{total} jobs in {time.perf_counter() - started:.1f}s ({failed} failed)")
+    return results
+
+
+if __name__ == "__main__":
+    timeframes = ["15m", "30m", "1h", "4h", "1d"]
+    selected_symbols = [
+        "BTC/USDT", "ETH/USDT", "BNB/USDT", "SOL/USDT", "XRP/USDT", "APT/USDT", "TRX/USDT", "TON/USDT"
+    ]
+
+    download_many([DownloadJob(symbol, timeframe) for symbol in selected_symbols for timeframe in timeframes])
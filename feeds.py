@@ -0,0 +1,190 @@
+# feeds.py
+#
+# backtrader data feeds that read the candle store directly instead of going
+# through a DataFrame. ArrayFeed copies whole NumPy columns (in memory or
+# memory-mapped from the store) into the line buffers when cerebro preloads,
+# instead of loading them bar by bar. StreamingFeed reads a dataset in
+# fixed-size chunks while the backtest runs; with cerebro exactbars=1
+# backtrader then keeps only the bars the strategy looks back at, and
+# HistoryPruner drops the finished orders and trades backtrader would
+# otherwise keep, so memory no longer grows with history.
+
+import array
+import numpy as np
+import backtrader as bt
+import config
+import data_access
+
+EPOCH_ORDINAL = 719163  # date(1970, 1, 1).toordinal()
+
+
+def epoch_ms_to_num(timestamps):
+    """
+    backtrader date numbers of int64 epoch-ms timestamps. Bit-identical to
+    bt.date2num() of the same datetimes (ordinal plus the fraction of the day),
+    so feeds built on it produce exactly the bars PandasData does.
+    """
+    days, ms_of_day = np.divmod(np.asarray(timestamps, dtype=np.int64), 86400000)
+    return (days + EPOCH_ORDINAL).astype(np.float64) + ms_of_day / 86400000.0
+
+
+def line_columns(arrays):
+    """
+    float64 columns of storage.CandleArrays keyed by backtrader line name.
+    """
+    return {
+        'datetime': epoch_ms_to_num(arrays.timestamp),
+        'open': np.asarray(arrays.open, dtype=np.float64),
+        'high': np.asarray(arrays.high, dtype=np.float64),
+        'low': np.asarray(arrays.low, dtype=np.float64),
+        'close': np.asarray(arrays.close, dtype=np.float64),
+        'volume': np.asarray(arrays.volume, dtype=np.float64),
+    }
+
+
+def iter_rows(arrays):
+    """
+    (datetime, open, high, low, close, volume) tuples of plain Python floats,
+    which is what PandasData stores per bar as well.
+    """
+    return zip(*(column.tolist() for column in line_columns(arrays).values()))
+
+
+class ArrayFeed(bt.feed.DataBase):
+    """
+    Feed over storage.CandleArrays, e.g. from data_access.load_arrays(). When
+    cerebro preloads, every column is copied into its line buffer in one step
+    instead of running the per-bar load loop PandasData goes through; without
+    preloading (exactbars, live-style runs) bars are loaded one at a time.
+    The bars are exactly those of PandasData over the same candles.
+    :param dataname: storage.CandleArrays of the dataset.
+    """
+
+    def start(self):
+        super(ArrayFeed, self).start()
+        self._rows = None
+
+    def preload(self):
+        lines = self.lines
+        # Filters, input timezones and bounded buffers need backtrader's own loop
+        if self._filters or self._tzinput or not isinstance(lines.datetime.array, array.array):
+            return super(ArrayFeed, self).preload()
+
+        columns = line_columns(self.p.dataname)
+        if self.p.fromdate is not None or self.p.todate is not None:
+            inside = (columns['datetime'] >= self.fromdate) & (columns['datetime'] <= self.todate)
+            columns = {name: column[inside] for name, column in columns.items()}
+        size = len(columns['datetime'])
+
+        for name, line in zip(lines.getlinealiases(), lines.lines):
+            # Lines without a column (openinterest) stay NaN, as with PandasData
+            column = columns.get(name)
+            if column is None:
+                column = np.full(size, np.nan)
+            line.array.frombytes(np.ascontiguousarray(column).tobytes())
+            line.advance(size)
+
+        self._rows = iter(())  # Every bar is loaded; _load() must not replay them
+        self._last()
+        self.home()
+
+    def _load(self):
+        if self._rows is None:
+            self._rows = iter_rows(self.p.dataname)
+        row = next(self._rows, None)
+        if row is None:
+            return False
+
+        lines = self.lines
+        lines.datetime[0], lines.open[0], lines.high[0], lines.low[0], lines.close[0], lines.volume[0] = row
+        return True
+
+
+class StreamingFeed(bt.feed.DataBase):
+    """
+    Feed for one stored dataset, read chunk by chunk with
+    data_access.iter_chunks(). Only the current chunk is held, so run it with
+    bt.Cerebro(exactbars=1) for memory bounded by the lookback.
+    :param dataname: (symbol, timeframe) of the dataset.
+    :param start: Optional first timestamp (epoch ms, datetime or date string).
+    :param end: Optional last timestamp.
+    :param chunk_rows: Rows read from disk at a time.
+    :param lookback: Bars every line keeps at least, for strategies that index
+                     further back than their indicators' periods.
+    :param data_dir: Store folder (defaults to the configured data_path).
+    """
+
+    params = (
+        ('start', None),
+        ('end', None),
+        ('chunk_rows', config.GENERAL_SETTINGS.get("stream_chunk_rows", 20_000)),
+        ('lookback', config.GENERAL_SETTINGS.get("stream_lookback", 500)),
+        ('data_dir', None),
+    )
+
+    def start(self):
+        super(StreamingFeed, self).start()
+        symbol, timeframe = self.p.dataname
+        self._chunks = data_access.iter_chunks(symbol, timeframe, chunk_rows=self.p.chunk_rows,
+                                               start=self.p.start, end=self.p.end, data_dir=self.p.data_dir)
+        self._rows = iter(())
+
+    def stop(self):
+        self._chunks.close()
+        super(StreamingFeed, self).stop()
+
+    def qbuffer(self, savemem=0, replaying=False):
+        super(StreamingFeed, self).qbuffer(savemem=savemem, replaying=replaying)
+        for line in self.lines:
+            line.minbuffer(self.p.lookback)
+
+    def _next_chunk(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        self._rows = iter_rows(chunk)
+        return True
+
+    def _load(self):
+        row = next(self._rows, None)
+        while row is None:
+            if not self._next_chunk():
+                return False
+            row = next(self._rows, None)
+
+        lines = self.lines
+        lines.datetime[0], lines.open[0], lines.high[0], lines.low[0], lines.close[0], lines.volume[0] = row
+        return True
+
+
+class HistoryPruner(bt.Analyzer):
+    """
+    Drops finished orders and closed trades from the broker's and the
+    strategy's bookkeeping every 'every' bars. backtrader keeps them for the
+    whole run but only reads the live ones (and the last trade per data and
+    tradeid), so results are unchanged; notifications and analyzers have
+    already seen them.
+    """
+
+    params = (
+        ('every', 1000),
+    )
+
+    def start(self):
+        self.bars = 0
+
+    def next(self):
+        self.bars += 1
+        if self.bars % self.p.every:
+            return
+        strategy = self.strategy
+        broker = strategy.broker
+        broker.orders[:] = [order for order in broker.orders if order.alive()]
+        # Single orders leave an empty parent/children queue behind
+        for ref in [ref for ref, children in broker._pchildren.items() if not children]:
+            del broker._pchildren[ref]
+        # Notified order snapshots; backtrader only ever appends to this list
+        del strategy._orders[:]
+        for datatrades in strategy._trades.values():
+            for trades in datatrades.values():
+                del trades[:-1]
@@ -0,0 +1,271 @@
+# indicator_cache.py
+#
+# Cache of computed backtrader indicator lines keyed by (data fingerprint,
+# indicator type, params). The first run of a combination computes the
+# indicator normally and stores its lines; later runs on the same data, in
+# this process or in any optimizer worker, get the stored arrays copied in
+# instead of recomputing them. Entries live in memory (LRU, size-bounded)
+# and as .npy files that every worker memory-maps, so the pages are shared.
+
+import array
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import backtrader as bt
+import config
+
+OHLCV_LINES = ['datetime', 'open', 'high', 'low', 'close', 'volume']
+
+
+class IndicatorCache:
+    """
+    Two-level store for indicator arrays: an in-process LRU bounded by
+    'max_bytes' in front of a directory of .npy files bounded by 'max_disk_bytes'.
+    Each entry is a float64 array of shape (lines, bars + 1); column 0 holds
+    the indicator's minimum period and the rest the line values.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=256 * 1024 ** 2, max_disk_bytes=2 * 1024 ** 3):
+        """
+        :param cache_dir: Folder shared by all processes (None keeps the cache in memory only).
+        :param max_bytes: Memory budget of the in-process LRU.
+        :param max_disk_bytes: Budget of the cache folder; the least recently used files are removed.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = OrderedDict()  # key -> array
+        self.total_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        if self.cache_dir is not None:
+            path = self._path(key)
+            try:
+                entry = np.load(path, mmap_mode='r')
+                os.utime(path)  # Mark as recently used for disk eviction
+            except (FileNotFoundError, ValueError):
+                entry = None
+            if entry is not None:
+                with self.lock:
+                    self.disk_hits += 1
+                self._remember(key, entry)
+                return entry
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, entry):
+        self._remember(key, entry)
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        # Several workers may compute the same entry; each writes a private temp
+        # file and the identical results replace one another atomically
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.save(f, entry)
+        os.replace(tmp, path)
+        self._evict_disk()
+
+    def _remember(self, key, entry):
+        with self.lock:
+            if key in self.entries or entry.nbytes > self.max_bytes:
+                return
+            self.entries[key] = entry
+            self.total_bytes += entry.nbytes
+            while self.total_bytes > self.max_bytes:
+                _, old = self.entries.popitem(last=False)
+                self.total_bytes -= old.nbytes
+
+    def _evict_disk(self):
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.npy'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)  # Processes that mapped it keep their view
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+        if self.cache_dir is not None and os.path.isdir(self.cache_dir):
+            for file in os.listdir(self.cache_dir):
+                if file.endswith('.npy'):
+                    os.remove(os.path.join(self.cache_dir, file))
+
+    def info(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+cache = IndicatorCache(
+    cache_dir=config.GENERAL_SETTINGS.get("indicator_cache_path"),
+    max_bytes=config.GENERAL_SETTINGS.get("indicator_cache_max_bytes", 256 * 1024 ** 2),
+    max_disk_bytes=config.GENERAL_SETTINGS.get("indicator_cache_max_disk_bytes", 2 * 1024 ** 3),
+)
+
+
+def data_fingerprint(data):
+    """
+    Hash of a preloaded data feed's bars, computed once per feed object.
+    Returns None when the feed is not preloaded (live feeds, preload=False or
+    exactbars runs), since the bars are not known up front.
+    """
+    fingerprint = getattr(data, '_indicator_fingerprint', None)
+    if fingerprint is None:
+        # Feeds are preloaded before the strategy is built, so the buffer holds every bar
+        if data.islive() or not data.buflen():
+            return None
+        digest = hashlib.sha1()
+        for name in OHLCV_LINES:
+            digest.update(getattr(data.lines, name).array[:data.buflen()].tobytes())
+        fingerprint = data._indicator_fingerprint = digest.hexdigest()
+    return fingerprint
+
+
+def _source(data):
+    """
+    (feed, line name) for a feed or one of its OHLCV lines; None for anything
+    else (e.g. another indicator), which is not cached.
+    """
+    if isinstance(data, bt.AbstractDataBase):
+        return data, 'data'
+    owner = getattr(data, '_owner', None)
+    if isinstance(owner, bt.AbstractDataBase):
+        for name in OHLCV_LINES:
+            if getattr(owner.lines, name) is data:
+                return owner, name
+    return None
+
+
+def _param_repr(value):
+    return getattr(value, '__name__', None) or repr(value)
+
+
+def cache_key(fingerprint, source_line, indicator_cls, params):
+    resolved = dict(indicator_cls.params._getpairs())
+    resolved.update(params)
+    described = ",".join(f"{name}={_param_repr(value)}" for name, value in sorted(resolved.items()))
+    text = f"{fingerprint}|{source_line}|{indicator_cls.__module__}.{indicator_cls.__name__}|{described}"
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+class CachedIndicator(bt.Indicator):
+    """
+    Base for the per-type cached indicators built by _cached_class(). On a hit
+    the stored lines are copied in; on a miss the real indicator runs as a
+    child and its lines are stored once computed.
+    """
+
+    def __init__(self, indicator_cls=None, indicator_params=None, key=None, store=None):
+        self.key = key
+        self.store = store
+        self.entry = store.get(key)
+        if self.entry is not None:
+            # The indicator starts emitting values exactly when the original would
+            self.addminperiod(int(self.entry[0, 0]))
+        else:
+            self.source = indicator_cls(self.data, **indicator_params)
+            for i in range(self.source.size()):
+                self.lines[i] = self.source.lines[i]
+        self._synced = False
+
+    def preonce(self, start, end):
+        # Called once per run after the child (on a miss) has been computed
+        if self._synced:
+            return
+        self._synced = True
+        bars = self.buflen()
+        if self.entry is not None:
+            for i in range(self.size()):
+                values = array.array('d')
+                values.frombytes(np.ascontiguousarray(self.entry[i, 1:bars + 1]).tobytes())
+                self.lines[i].array[0:bars] = values
+        else:
+            entry = np.empty((self.size(), bars + 1))
+            entry[:, 0] = self.source._minperiod
+            for i in range(self.size()):
+                entry[i, 1:] = np.frombuffer(self.lines[i].array, dtype=np.float64, count=bars)
+            self.store.put(self.key, entry)
+
+    def oncestart(self, start, end):
+        pass
+
+    def once(self, start, end):
+        pass
+
+    def next(self):
+        # Next mode (runonce=False): copy the stored value for the current bar
+        if self.entry is not None:
+            for i in range(self.size()):
+                self.lines[i][0] = self.entry[i, len(self)]
+
+    def prenext(self):
+        self.next()
+
+    def nextstart(self):
+        self.next()
+
+
+_classes = {}
+
+
+def _cached_class(indicator_cls):
+    if indicator_cls not in _classes:
+        lines = indicator_cls.lines.getlinealiases()
+        _classes[indicator_cls] = type(f"Cached{indicator_cls.__name__}", (CachedIndicator,), {
+            'lines': lines,
+            'plotinfo': dict(indicator_cls.plotinfo._getpairs()),
+        })
+    return _classes[indicator_cls]
+
+
+def indicator(indicator_cls, data, enabled=True, store=None, **params):
+    """
+    Drop-in replacement for indicator_cls(data, **params) inside a strategy's
+    __init__. With enabled=False, or when the input is not a preloaded feed
+    or one of its price/volume lines, the plain indicator is returned.
+    :param store: IndicatorCache to use (defaults to the module cache).
+    """
+    source = _source(data) if enabled else None
+    fingerprint = data_fingerprint(source[0]) if source is not None else None
+    if fingerprint is None:
+        return indicator_cls(data, **params)
+
+    key = cache_key(fingerprint, source[1], indicator_cls, params)
+    return _cached_class(indicator_cls)(data, indicator_cls=indicator_cls, indicator_params=params,
+                                        key=key, store=store or cache)
@@ -0,0 +1,148 @@
+# integrity.py
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+import config
+import data_access
+import data_handler
+import storage
+from resampler import timeframe_to_seconds
+
+REPORT_COLUMNS = ['symbol', 'timeframe', 'issue', 'start', 'end', 'count']
+
+
+def _runs(mask):
+    """
+    Start and end (inclusive) positions of every run of True values in 'mask'.
+    """
+    edges = np.diff(np.r_[0, mask.astype(np.int8), 0])
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+
+
+def scan_frame(df, symbol, timeframe, min_zero_run=3):
+    """
+    Check one OHLCV frame for missing candles, duplicate or out-of-order
+    timestamps, timestamps off the timeframe grid, NaN rows and runs of
+    at least 'min_zero_run' zero-volume candles. Everything is computed with
+    whole-array operations on the epoch-ms timestamps.
+    :return: List of issue dicts with REPORT_COLUMNS keys (start/end in epoch ms).
+    """
+    issues = []
+    if df.empty:
+        return issues
+
+    period = timeframe_to_seconds(timeframe) * 1000
+    timestamps = storage.index_to_epoch_ms(df.index)
+    diffs = np.diff(timestamps)
+
+    def add(issue, starts, ends, counts):
+        for start, end, count in zip(starts.tolist(), ends.tolist(), counts.tolist()):
+            issues.append({'symbol': symbol, 'timeframe': timeframe, 'issue': issue,
+                           'start': start, 'end': end, 'count': count})
+
+    gaps = np.flatnonzero(diffs > period)
+    add('gap', timestamps[gaps] + period, timestamps[gaps + 1] - period, diffs[gaps] // period - 1)
+
+    duplicates = np.flatnonzero(diffs == 0)
+    add('duplicate', timestamps[duplicates], timestamps[duplicates], np.ones(len(duplicates), dtype=np.int64))
+
+    unsorted = np.flatnonzero(diffs < 0)
+    add('unsorted', timestamps[unsorted], timestamps[unsorted + 1], np.ones(len(unsorted), dtype=np.int64))
+
+    # Weekly candles are Monday-aligned, so only check the grid for sub-weekly timeframes
+    if not timeframe.endswith('w'):
+        misaligned = np.flatnonzero(timestamps % period != 0)
+        add('misaligned', timestamps[misaligned], timestamps[misaligned], np.ones(len(misaligned), dtype=np.int64))
+
+    values = df[storage.OHLCV_FIELDS].to_numpy()
+    nan_starts, nan_ends = _runs(np.isnan(values).any(axis=1))
+    add('nan', timestamps[nan_starts], timestamps[nan_ends], nan_ends - nan_starts + 1)
+
+    zero_starts, zero_ends = _runs(values[:, -1] == 0)
+    lengths = zero_ends - zero_starts + 1
+    long_runs = lengths >= min_zero_run
+    add('zero_volume', timestamps[zero_starts[long_runs]], timestamps[zero_ends[long_runs]], lengths[long_runs])
+
+    return issues
+
+
+def scan_store(data_dir=None, min_zero_run=3):
+    """
+    Scan every dataset in the data directory. Files are read through the
+    dataset cache, so repeated scans do not parse them again.
+    :param data_dir: Store folder (defaults to the configured data_path).
+    :return: DataFrame with REPORT_COLUMNS, one row per issue.
+    """
+    data_dir = data_dir or data_access.DATA_DIR
+    issues = []
+    for symbol, timeframe in storage.list_datasets(data_dir):
+        try:
+            timeframe_to_seconds(timeframe)
+        except ValueError:
+            print(f"Skipping {symbol} {timeframe}: unsupported timeframe.")
+            continue
+        df = data_access.load_stored(symbol, timeframe, data_dir=data_dir)
+        issues.extend(scan_frame(df, symbol, timeframe, min_zero_run=min_zero_run))
+    return pd.DataFrame(issues, columns=REPORT_COLUMNS)
+
+
+def write_report(report, filename=None):
+    """
+    Write the issue table as CSV with human-readable UTC timestamps.
+    """
+    filename = filename or os.path.join(config.GENERAL_SETTINGS["results_path"], "gap_report.csv")
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    readable = report.copy()
+    for column in ('start', 'end'):
+        readable[column] = pd.to_datetime(readable[column], unit='ms')
+    readable.to_csv(filename, index=False)
+    print(f"Gap report with {len(report)} issues saved to {filename}")
+    return filename
+
+
+def repair(report, client=None, data_dir=None):
+    """
+    Fetch only the missing ranges listed in 'report' and merge them into the
+    store. Duplicate and unsorted rows are cleaned up by the merge itself.
+    Gaps the exchange has no candles for (e.g. maintenance windows) remain.
+    :param data_dir: Store folder the report was scanned from (defaults to the configured data_path).
+    :return: Number of candles added.
+    """
+    added = 0
+    for (symbol, timeframe), issues in report.groupby(['symbol', 'timeframe']):
+        period = timeframe_to_seconds(timeframe) * 1000
+        rows = []
+        for gap in issues[issues['issue'] == 'gap'].itertuples():
+            print(f"Fetching {gap.count} missing {timeframe} candles for {symbol} from "
+                  f"{pd.to_datetime(gap.start, unit='ms')}...")
+            for page in data_handler.fetch_ohlcv_pages(symbol, timeframe, int(gap.start),
+                                                       until=int(gap.end) + period, client=client):
+                rows.extend(page)
+
+        needs_cleanup = issues['issue'].isin(['duplicate', 'unsorted']).any()
+        if rows or needs_cleanup:
+            data_access.merge_data(storage.rows_to_frame(rows), symbol, timeframe, data_dir=data_dir)
+            added += len(rows)
+    print(f"Repair added {added} candles.")
+    return added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan Data_store for gaps, duplicates and zero-volume runs")
+    parser.add_argument("--repair", action="store_true", help="Fetch and merge the missing ranges")
+    parser.add_argument("--min-zero-run", type=int, default=3)
+    parser.add_argument("--report", default=None, help="Report path (default: results/gap_report.csv)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = scan_store(min_zero_run=args.min_zero_run)
+    print(f"Scanned Data_store in {time.perf_counter() - started:.3f}s")
+    if not report.empty:
+        print(report.groupby(['symbol', 'timeframe', 'issue'])['count'].sum().to_string())
+    write_report(report, args.report)
+
+    if args.repair and not report.empty:
+        repair(report)
@@ -0,0 +1,39 @@
+# metrics.py
+
+def analysis_metrics(sharpe, drawdown, trades):
+    """
+    Turn SharpeRatio, DrawDown and TradeAnalyzer analyses into the metric
+    columns written to the results CSV. Any engine that produces analyses of
+    the same shape (see vector_engine.py) gets identical metrics.
+    :param sharpe: SharpeRatio.get_analysis() or an equivalent dict.
+    :param drawdown: DrawDown.get_analysis() or an equivalent dict.
+    :param trades: TradeAnalyzer.get_analysis() or an equivalent dict.
+    """
+    # Safely access the trade data
+    total_trades = trades.get('total', {}).get('total', 0)
+    winning_trades = trades.get('won', {}).get('total', 0)
+    losing_trades = trades.get('lost', {}).get('total', 0)
+    win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
+
+    # Handle profit factor calculation (check if losses exist)
+    profit_factor = None
+    won_pnl = trades.get('won', {}).get('pnl', {}).get('gross', 0)
+    lost_pnl = trades.get('lost', {}).get('pnl', {}).get('gross', 0)
+
+    if lost_pnl != 0:
+        profit_factor = won_pnl / abs(lost_pnl)
+    elif won_pnl > 0:  # If no losses but there are winning trades
+        profit_factor = float('inf')  # Infinite profit factor (perfect scenario)
+
+    return {
+        "sharpe_ratio": sharpe.get('sharperatio', None),
+        "max_drawdown": drawdown.get('max', {}).get('drawdown', None),
+        "drawdown_duration": drawdown.get('max', {}).get('len', 0),
+        "volatility": sharpe.get('stddev', None),
+        "total_trades": total_trades,
+        "winning_trades": winning_trades,
+        "losing_trades": losing_trades,
+        "win_rate": win_rate,
+        "avg_trade_duration": trades.get('len', {}).get('average', None),
+        "profit_factor": profit_factor,
+    }
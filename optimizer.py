@@ -1,15 +1,17 @@
 import itertools
 import numpy as np
 import os
-import pandas as pd
 import importlib.util
 import sys
-from datetime import datetime
 import backtrader as bt
-from data_handler import load_data
+from data_access import load_arrays
+import catalog
+import feeds
+import profiler
+from results_db import ResultsDB
 
 class Optimizer:
-    def __init__(self, strategy_name, symbols, timeframes, param_ranges, cash=1000, commission=0.001):
+    def __init__(self, strategy_name, symbols, timeframes, param_ranges, cash=1000, commission=0.001, start=None, end=None, profile=False):
         """
         Initializes the optimizer with a strategy, parameters, and symbols.
         :param strategy_name: The name of the strategy class to optimize.
@@ -18,6 +20,9 @@ class Optimizer:
         :param param_ranges: Dictionary of parameters and their ranges to optimize.
         :param cash: Starting cash for the backtest.
         :param commission: Commission for trades.
+        :param start: Optional first timestamp of the backtest window.
+        :param end: Optional last timestamp of the backtest window.
+        :param profile: Profile every combination's run and append the reports to results/profiles.jsonl.
         """
         self.strategy_name = strategy_name
         self.symbols = symbols
@@ -25,7 +30,11 @@ class Optimizer:
         self.param_ranges = param_ranges
         self.cash = cash
         self.commission = commission
+        self.start = start
+        self.end = end
+        self.profile = profile
         self.results = []
+        self.profiles = []
 
     def load_strategy(self):
         """
@@ -73,6 +82,9 @@ class Optimizer:
         """
         Runs optimization by iterating over the parameter ranges and running backtests.
         """
+        # Fail before the sweep starts rather than halfway through it
+        catalog.validate_request(self.symbols, self.timeframes, start=self.start, end=self.end)
+
         for params in self._generate_param_combinations():
             print(f"Running backtest with parameters: {params}")
             
@@ -80,7 +92,7 @@ class Optimizer:
             strategy = self.load_strategy()
 
             # Initialize Backtrader engine
-            cerebro = bt.Cerebro()
+            cerebro = bt.Cerebro(stdstats=False)  # Headless: no plotting observers
             cerebro.broker.setcash(self.cash)
             cerebro.broker.setcommission(commission=self.commission)
 
@@ -88,13 +100,17 @@ class Optimizer:
             for symbol in self.symbols:
                 for timeframe in self.timeframes:
                     print(f"Loading data for {symbol} on {timeframe} timeframe...")
-                    data = load_data(symbol, timeframe)
-                    if data is not None:
-                        data_feed = bt.feeds.PandasData(dataname=data)
+                    arrays = load_arrays(symbol, timeframe, start=self.start, end=self.end)
+                    if arrays is not None:
+                        data_feed = feeds.ArrayFeed(dataname=arrays)
                         cerebro.adddata(data_feed, name=f"{symbol}_{timeframe}")
 
-            # Add strategy with current params
-            cerebro.addstrategy(strategy, **params)
+            # Add strategy with current params. Combinations share most indicator settings,
+            # so strategies that support it reuse indicator lines across runs
+            strategy_params = dict(params)
+            if 'use_indicator_cache' in strategy.params._getkeys():
+                strategy_params.setdefault('use_indicator_cache', True)
+            cerebro.addstrategy(strategy, **strategy_params)
 
             # Add analyzers
             cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
@@ -103,7 +119,13 @@ class Optimizer:
 
             # Run backtest
             print(f"Running backtest for {params}")
-            result = cerebro.run()
+            if self.profile:
+                run_profile = profiler.attach(cerebro)
+                result = profiler.run(cerebro, run_profile)
+                self.profiles.append(run_profile.report(symbol=",".join(self.symbols),
+                                                        timeframe=",".join(self.timeframes), params=params))
+            else:
+                result = cerebro.run()
 
             # Store results for analysis
             self.results.append({
@@ -116,24 +138,23 @@ class Optimizer:
                 "losing_trades": result[0].analyzers.tradeanalyzer.get_analysis().get('lost', {}).get('total', 0),
             })
 
-        # Save all optimization results to CSV
+        # Save all optimization results to the results database
         self.save_optimization_results()
 
     def save_optimization_results(self):
         """
-        Save all optimization results to a CSV file.
+        Append all optimization results to the results database as one run,
+        with every swept parameter in its own typed column.
         """
-        results_dir = "results"
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir)
-
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"{results_dir}/optimization_results_{timestamp}.csv"
-
-        # Convert results to DataFrame and save to CSV
-        df = pd.DataFrame(self.results)
-        df.to_csv(filename, index=False)
-        print(f"Optimization results saved to {filename}")
+        rows = [{"strategy": self.strategy_name, "symbol": ",".join(self.symbols),
+                 "timeframe": ",".join(self.timeframes), **result} for result in self.results]
+        with ResultsDB() as db:
+            run_id = db.start_run("optimization", strategy=self.strategy_name, cash=self.cash,
+                                  commission=self.commission, start=self.start, end=self.end)
+            db.add_results(run_id, rows)
+        print(f"Optimization results saved to {db.path} as run {run_id}")
+        if self.profiles:
+            print(f"Profiles of {len(self.profiles)} runs saved to {profiler.save_profiles(self.profiles)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,229 @@
+# profiler.py
+#
+# Opt-in profiling of Cerebro runs. attach() wraps the methods backtrader
+# calls on the feeds, indicators, strategy, broker, analyzers and observers
+# so every second of the run is charged to exactly one of them (time spent
+# in a nested call, e.g. a broker order placed from next(), goes to the inner
+# category). One JSON line per run is appended to results/profiles.jsonl.
+#
+#   python profiler.py [--path results/profiles.jsonl] [--by strategy|timeframe|symbol]
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+import pandas as pd
+import backtrader as bt
+import config
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CATEGORIES = ('feeds', 'indicators', 'strategy', 'logging', 'broker', 'analyzers', 'observers', 'other')
+
+# Methods wrapped per object; backtrader calls each of them through the instance
+FEED_METHODS = ('preload', 'next')
+INDICATOR_METHODS = ('_once', '_next')
+STRATEGY_METHODS = ('prenext', 'nextstart', 'next', 'notify_order', 'notify_trade')
+BROKER_METHODS = ('next', 'submit', 'buy', 'sell', 'cancel')
+ANALYZER_METHODS = ('_prenext', '_nextstart', '_next', '_notify_order', '_notify_trade', '_notify_cashvalue',
+                    '_notify_fund')
+OBSERVER_METHODS = ('_next', 'prenext', 'nextstart', 'next')  # runonce calls next() etc. directly
+
+
+def profile_path():
+    return config.GENERAL_SETTINGS.get("profile_path",
+                                       os.path.join(config.GENERAL_SETTINGS["results_path"], "profiles.jsonl"))
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MiB (None where unavailable).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+class RunProfile:
+    """
+    Exclusive wall time and call counts per category of one Cerebro run.
+    The time between wrapped calls (cerebro's own loop) is charged to 'other'.
+    """
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(CATEGORIES, 0.0)
+        self.calls = dict.fromkeys(CATEGORIES, 0)
+        self.stack = ['other']
+        self.mark = [0.0]  # perf_counter of the last switch between categories
+        self.wall = 0.0
+        self.bars = 0
+        self.runonce = None
+        self.strategy = None
+
+    def wrap(self, category, func):
+        seconds, calls, stack, mark = self.seconds, self.calls, self.stack, self.mark
+        clock = time.perf_counter
+
+        def profiled(*args, **kwargs):
+            now = clock()
+            seconds[stack[-1]] += now - mark[0]
+            mark[0] = now
+            stack.append(category)
+            calls[category] += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                now = clock()
+                seconds[category] += now - mark[0]
+                mark[0] = now
+                stack.pop()
+
+        profiled.__wrapped__ = func
+        return profiled
+
+    def wrap_methods(self, obj, category, names):
+        for name in names:
+            method = getattr(obj, name, None)
+            if method is not None and not hasattr(method, '__wrapped__'):
+                setattr(obj, name, self.wrap(category, method))
+
+    def start(self):
+        self.mark[0] = time.perf_counter()
+        self.started = self.mark[0]
+
+    def stop(self):
+        now = time.perf_counter()
+        self.seconds[self.stack[-1]] += now - self.mark[0]
+        self.mark[0] = now
+        self.wall = now - self.started
+
+    def report(self, **labels):
+        """
+        The run's profile as a flat JSON-serializable dict; 'labels' (strategy,
+        symbol, timeframe, params, ...) are included as given.
+        """
+        total = sum(self.seconds.values()) or 1.0
+        report = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "strategy": self.strategy,
+            **labels,
+            "mode": "runonce" if self.runonce else "next",
+            "bars": self.bars,
+            "wall_seconds": self.wall,
+            "bars_per_second": self.bars / self.wall if self.wall else None,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        for category in CATEGORIES:
+            report[f"{category}_seconds"] = self.seconds[category]
+        for category in CATEGORIES:
+            report[f"{category}_pct"] = self.seconds[category] / total * 100
+        for category in CATEGORIES[:-1]:
+            report[f"{category}_calls"] = self.calls[category]
+        return report
+
+
+class ProfileHook(bt.Analyzer):
+    """
+    Wraps the strategy, its indicators, analyzers and observers when the
+    strategy starts, which is the first point at which all of them exist.
+    """
+
+    params = (('profile', None),)
+
+    def start(self):
+        profile = self.p.profile
+        strategy = self.strategy
+        profile.strategy = type(strategy).__name__
+        profile.wrap_methods(strategy, 'strategy', STRATEGY_METHODS)
+        if callable(getattr(strategy, 'log', None)):
+            profile.wrap_methods(strategy, 'logging', ('log',))
+        # Sub-indicators run inside their parent's calls and are charged with it
+        for indicator in strategy.getindicators():
+            profile.wrap_methods(indicator, 'indicators', INDICATOR_METHODS)
+        for analyzer in strategy.analyzers:
+            if analyzer is not self:
+                profile.wrap_methods(analyzer, 'analyzers', ANALYZER_METHODS)
+        for observer in strategy.getobservers():
+            profile.wrap_methods(observer, 'observers', OBSERVER_METHODS)
+
+    def stop(self):
+        self.p.profile.bars = len(self.strategy)
+
+
+def attach(cerebro):
+    """
+    Instrument a configured Cerebro (data, strategy and broker already set)
+    for its next run. Returns the RunProfile that run() fills in; call it as
+    profiler.run(cerebro, profile) to time the whole run.
+    """
+    profile = RunProfile()
+    for data in cerebro.datas:
+        profile.wrap_methods(data, 'feeds', FEED_METHODS)
+    profile.wrap_methods(cerebro.broker, 'broker', BROKER_METHODS)
+    cerebro.addanalyzer(ProfileHook, profile=profile, _name='profiler')
+    profile.runonce = cerebro.p.runonce and cerebro.p.preload and not cerebro.p.exactbars
+    return profile
+
+
+def run(cerebro, profile):
+    profile.start()
+    try:
+        return cerebro.run()
+    finally:
+        profile.stop()
+
+
+def save_profiles(reports, path=None):
+    """
+    Append reports to the JSON lines file (results/profiles.jsonl by default).
+    """
+    path = path or profile_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        for report in reports:
+            f.write(json.dumps(report, default=str) + "\n")
+    return path
+
+
+def load_profiles(path=None):
+    path = path or profile_path()
+    with open(path) as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def summarize(profiles, by="strategy"):
+    """
+    Per-group totals over saved profiles: runs, bars, bars/sec over all runs,
+    the share of time in each category and the highest peak RSS, slowest first.
+    """
+    seconds = [f"{category}_seconds" for category in CATEGORIES]
+    grouped = profiles.groupby(by)
+    summary = grouped[['bars', 'wall_seconds', *seconds]].sum()
+    summary.insert(0, 'runs', grouped.size())
+    summary['bars_per_second'] = summary['bars'] / summary['wall_seconds']
+    for category, column in zip(CATEGORIES, seconds):
+        summary[f"{category}_pct"] = summary[column] / summary[seconds].sum(axis=1) * 100
+    summary['peak_rss_mb'] = grouped['peak_rss_mb'].max()
+    return summary.drop(columns=seconds).sort_values('bars_per_second')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize saved backtest profiles")
+    parser.add_argument("--path", default=None, help="Profiles file (default results/profiles.jsonl)")
+    parser.add_argument("--by", default="strategy", choices=["strategy", "symbol", "timeframe", "mode"])
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON records")
+    args = parser.parse_args()
+
+    summary = summarize(load_profiles(args.path), by=args.by)
+    if args.json:
+        print(summary.reset_index().to_json(orient="records"))
+    else:
+        with pd.option_context("display.width", 200, "display.max_columns", None, "display.float_format", "{:.1f}".format):
+            print(summary)
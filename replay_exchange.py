@@ -0,0 +1,273 @@
+# replay_exchange.py
+#
+# Offline stand-in for the MEXC client. ReplayExchange answers the ccxt calls
+# the project uses (fetch_ohlcv, load_markets, fetch_tickers, fetch_status)
+# from the files in Data_store, and replay_price_source() feeds stored closes
+# into the ws_standin WebSocket server. Latency, rate-limit errors and
+# disconnects can be injected to exercise the retry and reconnect paths.
+#
+# Point the real code at it with EXCHANGE["mode"] = "replay" in config.py.
+
+import argparse
+import asyncio
+import collections
+import random
+import threading
+import time
+import numpy as np
+import ccxt
+import config
+import storage
+import resampler
+from ws_standin import StandInServer
+
+# Requests from every ReplayExchange in the process count towards one limit,
+# like requests from one IP do on the real exchange
+_request_times = collections.deque()
+_request_lock = threading.Lock()
+
+# (data_dir, symbol, timeframe) -> (timestamps, ohlcv rows), shared by all clients
+_datasets = {}
+_datasets_lock = threading.Lock()
+
+
+def _symbol_from_channel(channel):
+    market = channel.rsplit("@", 1)[-1]
+    return f"{market[:-4]}/USDT" if market.endswith("USDT") else market
+
+
+def _finest_timeframes(data_dir):
+    """
+    Finest stored timeframe per symbol.
+    """
+    finest = {}
+    for symbol, timeframe in storage.list_datasets(data_dir):
+        try:
+            seconds = resampler.timeframe_to_seconds(timeframe)
+        except ValueError:
+            continue
+        if symbol not in finest or seconds < finest[symbol][0]:
+            finest[symbol] = (seconds, timeframe)
+    return {symbol: timeframe for symbol, (_, timeframe) in finest.items()}
+
+
+class ReplayExchange:
+    """
+    ccxt-compatible client serving candles and markets from Data_store.
+    """
+    id = "replay"
+
+    def __init__(self, data_dir=None, latency=0.0, max_requests_per_second=None, error_rate=0.0,
+                 disconnect_rate=0.0, now=None, rate_limit=50, seed=None):
+        """
+        :param data_dir: Store to serve (defaults to the configured data_path).
+        :param latency: Seconds added to every request.
+        :param max_requests_per_second: Raise ccxt.RateLimitExceeded once the process
+                                        exceeds this many requests in a second.
+        :param error_rate: Probability of a random ccxt.RateLimitExceeded per request.
+        :param disconnect_rate: Probability of a ccxt.RequestTimeout per request.
+        :param now: Replay clock in epoch ms. Defaults to one day after the newest
+                    stored candle, so every stored candle counts as closed.
+        :param rate_limit: Milliseconds between requests advertised to callers, like ccxt's rateLimit.
+        :param seed: Seed for the error injection, for reproducible runs.
+        """
+        self.data_dir = data_dir or config.GENERAL_SETTINGS["data_path"]
+        self.latency = latency
+        self.max_requests_per_second = max_requests_per_second
+        self.error_rate = error_rate
+        self.disconnect_rate = disconnect_rate
+        self.rateLimit = rate_limit
+        self.random = random.Random(seed)
+        self.stats = collections.Counter()
+        self.markets = None
+        if now is None:
+            manifest = storage.read_manifest(self.data_dir)
+            last = max((entry['last'] for entry in manifest.values()), default=None)
+            now = last + 86400 * 1000 if last is not None else int(time.time() * 1000)
+        self.now = now
+
+    # --- ccxt helpers used by data_handler ---
+
+    def milliseconds(self):
+        return self.now
+
+    @staticmethod
+    def parse_timeframe(timeframe):
+        return resampler.timeframe_to_seconds(timeframe)
+
+    @staticmethod
+    def parse8601(timestamp):
+        return ccxt.Exchange.parse8601(timestamp)
+
+    # --- fault injection ---
+
+    def _request(self, name):
+        """
+        Account for one API call: apply latency, then raise whatever error the
+        configuration asks for.
+        """
+        self.stats['requests'] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.max_requests_per_second is not None:
+            now = time.monotonic()
+            with _request_lock:
+                while _request_times and _request_times[0] <= now - 1:
+                    _request_times.popleft()
+                limited = len(_request_times) >= self.max_requests_per_second
+                _request_times.append(now)
+            if limited:
+                self.stats['rate_limited'] += 1
+                raise ccxt.RateLimitExceeded(f"replay {name}: more than {self.max_requests_per_second} requests/s")
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.stats['rate_limited'] += 1
+            raise ccxt.RateLimitExceeded(f"replay {name}: injected rate-limit error")
+        if self.disconnect_rate and self.random.random() < self.disconnect_rate:
+            self.stats['disconnects'] += 1
+            raise ccxt.RequestTimeout(f"replay {name}: injected disconnect")
+
+    # --- data ---
+
+    def _dataset(self, symbol, timeframe):
+        """
+        Stored (or resampled) candles as (timestamps, rows), loaded once per process.
+        """
+        key = (self.data_dir, symbol, timeframe)
+        with _datasets_lock:
+            if key not in _datasets:
+                store = storage.find_store(symbol, timeframe, data_dir=self.data_dir)
+                if store is not None:
+                    df = store.load(symbol, timeframe)
+                else:
+                    base = resampler.find_base_timeframe(symbol, timeframe, data_dir=self.data_dir)
+                    if base is None:
+                        _datasets[key] = None
+                        return None
+                    base_store = storage.find_store(symbol, base, data_dir=self.data_dir)
+                    df = resampler.resample_ohlcv(base_store.load(symbol, base), timeframe)
+                timestamps = storage.index_to_epoch_ms(df.index)
+                rows = np.column_stack([timestamps, df[storage.OHLCV_FIELDS].to_numpy()]).tolist()
+                for row in rows:
+                    row[0] = int(row[0])
+                _datasets[key] = (timestamps, rows)
+            return _datasets[key]
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self._request('fetch_ohlcv')
+        if symbol not in self.load_markets():
+            raise ccxt.BadSymbol(f"replay does not have market symbol {symbol}")
+        dataset = self._dataset(symbol, timeframe)
+        if dataset is None:
+            return []
+        timestamps, rows = dataset
+        start = int(np.searchsorted(timestamps, since, side='left')) if since is not None else 0
+        # Like MEXC, never return candles that have not opened yet on the replay clock
+        stop = int(np.searchsorted(timestamps, self.now, side='right'))
+        if limit is not None:
+            stop = min(stop, start + limit)
+        self.stats['candles'] += max(stop - start, 0)
+        return [list(row) for row in rows[start:stop]]
+
+    def load_markets(self, reload=False, params=None):
+        if self.markets is None or reload:
+            self._request('load_markets')
+            self.markets = {}
+            for symbol, _ in storage.list_datasets(self.data_dir):
+                if '/' not in symbol or symbol in self.markets:
+                    continue
+                base, quote = symbol.split('/')
+                self.markets[symbol] = {
+                    'id': symbol.replace('/', ''), 'symbol': symbol, 'base': base, 'quote': quote,
+                    'active': True, 'spot': True, 'type': 'spot',
+                    'limits': {'amount': {'min': None}, 'cost': {'min': 1.0}},
+                }
+        return self.markets
+
+    def fetch_tickers(self, symbols=None, params=None):
+        """
+        24h tickers computed from the finest stored timeframe of every market.
+        """
+        self._request('fetch_tickers')
+        tickers = {}
+        finest = _finest_timeframes(self.data_dir)
+        for symbol in symbols or self.load_markets():
+            dataset = self._dataset(symbol, finest[symbol]) if symbol in finest else None
+            if not dataset or not dataset[1]:
+                continue
+            timestamps, rows = dataset
+            recent = np.asarray(rows[int(np.searchsorted(timestamps, timestamps[-1] - 86400 * 1000, side='right')):])
+            last, first = recent[-1, 4], recent[0, 1]
+            base_volume = float(recent[:, 5].sum())
+            tickers[symbol] = {
+                'symbol': symbol, 'timestamp': int(timestamps[-1]), 'last': last, 'bid': None, 'ask': None,
+                'open': first, 'high': float(recent[:, 2].max()), 'low': float(recent[:, 3].min()),
+                'baseVolume': base_volume, 'quoteVolume': base_volume * last,
+                'percentage': (last / first - 1) * 100 if first else None,
+            }
+        return tickers
+
+    def fetch_status(self, params=None):
+        self._request('fetch_status')
+        return {'status': 'ok', 'updated': self.now, 'info': 'replay'}
+
+
+def replay_price_source(data_dir=None, timeframe=None):
+    """
+    price_source for ws_standin.StandInServer that replays stored closes per
+    channel, looping at the end of the data.
+    :param timeframe: Timeframe to replay (defaults to the finest stored one per symbol).
+    """
+    data_dir = data_dir or config.GENERAL_SETTINGS["data_path"]
+    finest = _finest_timeframes(data_dir)
+    positions = {}
+    series = {}
+
+    def next_trade(channel):
+        if channel not in series:
+            symbol = _symbol_from_channel(channel)
+            tf = timeframe or finest.get(symbol)
+            store = storage.find_store(symbol, tf, data_dir=data_dir) if tf else None
+            if store is None:
+                series[channel] = None
+            else:
+                df = store.load(symbol, tf)
+                series[channel] = (df['close'].to_numpy(), df['volume'].to_numpy())
+            positions[channel] = 0
+        if series[channel] is None:
+            return 100.0, 1.0
+        closes, volumes = series[channel]
+        position = positions[channel] % len(closes)
+        positions[channel] = position + 1
+        return float(closes[position]), float(volumes[position])
+
+    return next_trade
+
+
+def create_stream_server(host="127.0.0.1", port=0, data_dir=None, messages_per_second=10, latency=0.0,
+                         disconnect_interval=None):
+    """
+    A ws_standin server publishing stored closes in the MEXC deals format.
+    :param disconnect_interval: Drop every client this often (seconds) to test reconnects.
+    """
+    return StandInServer(host=host, port=port, messages_per_second=messages_per_second,
+                         price_source=replay_price_source(data_dir), latency=latency,
+                         disconnect_interval=disconnect_interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Data_store as a local MEXC WebSocket feed")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=10, help="Messages per channel per second")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every reply")
+    parser.add_argument("--disconnect-interval", type=float, default=None, help="Drop all clients every N seconds")
+    args = parser.parse_args()
+
+    async def main():
+        server = await create_stream_server(port=args.port, messages_per_second=args.rate, latency=args.latency,
+                                            disconnect_interval=args.disconnect_interval).start()
+        print(f"Replay WebSocket feed listening on {server.url}; set EXCHANGE['ws_url'] to use it")
+        await asyncio.Future()
+
+    asyncio.run(main())
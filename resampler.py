@@ -0,0 +1,100 @@
+# resampler.py
+
+import argparse
+import numpy as np
+import pandas as pd
+import storage
+
+TIMEFRAME_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+# Weekly candles start on Monday; the epoch (1970-01-01) was a Thursday
+WEEK_OFFSET_MS = 4 * 86400 * 1000
+
+
+def timeframe_to_seconds(timeframe):
+    """
+    Convert a timeframe string such as '15m', '2h', '1d' or '1w' into seconds.
+    """
+    amount, unit = timeframe[:-1], timeframe[-1]
+    if unit not in TIMEFRAME_UNITS or not amount.isdigit() or int(amount) <= 0:
+        raise ValueError(f"Unsupported timeframe '{timeframe}'. Use <n>m, <n>h, <n>d or <n>w.")
+    return int(amount) * TIMEFRAME_UNITS[unit]
+
+
+def resample_ohlcv(df, timeframe):
+    """
+    Aggregate a finer OHLCV frame into 'timeframe' candles (first/max/min/last/sum).
+    Buckets are aligned to the epoch like exchange candles (weeks start on Monday).
+    Partial buckets at the start and end of the data are dropped, so every
+    returned candle covers its full period.
+    """
+    if df.empty:
+        return df.copy()
+
+    timestamps = storage.index_to_epoch_ms(df.index)
+    target_ms = timeframe_to_seconds(timeframe) * 1000
+    offset = WEEK_OFFSET_MS if timeframe.endswith('w') else 0
+    buckets = (timestamps - offset) // target_ms * target_ms + offset
+
+    # Data is sorted, so each bucket is a contiguous run starting where the id changes
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+
+    high = df['high'].to_numpy()
+    low = df['low'].to_numpy()
+    volume = df['volume'].to_numpy()
+    result = pd.DataFrame({
+        'open': df['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(high, starts),
+        'low': np.minimum.reduceat(low, starts),
+        'close': df['close'].to_numpy()[ends],
+        'volume': np.add.reduceat(volume, starts),
+    }, index=pd.DatetimeIndex(pd.to_datetime(buckets[starts], unit='ms'), name='timestamp'))
+
+    # Infer the source bar size from the smallest step between rows
+    source_ms = int(np.diff(timestamps).min()) if len(timestamps) > 1 else target_ms
+    keep = np.ones(len(starts), dtype=bool)
+    if timestamps[0] != buckets[0]:
+        keep[0] = False
+    if timestamps[-1] + source_ms < buckets[-1] + target_ms:
+        keep[-1] = False
+    return result[keep]
+
+
+def find_base_timeframe(symbol, timeframe, data_dir=None):
+    """
+    Return the finest stored timeframe for 'symbol' that evenly divides
+    'timeframe', or None if there is nothing to build it from.
+    """
+    target = timeframe_to_seconds(timeframe)
+    candidates = []
+    for stored_symbol, stored_timeframe in storage.list_datasets(data_dir):
+        if stored_symbol != symbol:
+            continue
+        try:
+            seconds = timeframe_to_seconds(stored_timeframe)
+        except ValueError:
+            continue
+        if seconds < target and target % seconds == 0:
+            candidates.append((seconds, stored_timeframe))
+    return min(candidates)[1] if candidates else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a coarser timeframe from the finest stored data")
+    parser.add_argument("symbol")
+    parser.add_argument("timeframe")
+    parser.add_argument("--save", action="store_true", help="Write the result to Data_store")
+    args = parser.parse_args()
+
+    base = find_base_timeframe(args.symbol, args.timeframe)
+    if base is None:
+        raise SystemExit(f"No stored timeframe for {args.symbol} divides {args.timeframe}.")
+
+    source = storage.find_store(args.symbol, base)
+    data = resample_ohlcv(source.load(args.symbol, base), args.timeframe)
+    print(f"Built {len(data)} {args.timeframe} candles for {args.symbol} from {base} data")
+    if args.save:
+        store = storage.get_store()
+        store.save(data, args.symbol, args.timeframe)
+        print(f"Saved to {store.path(args.symbol, args.timeframe)}")
@@ -0,0 +1,348 @@
+# results_db.py
+#
+# Append-only SQLite store for backtest, batch and optimization results.
+# Every run gets a row in 'runs'; its metric rows go to 'results' with one
+# typed column per strategy parameter (param_<name>, added on first use), so
+# sweeps can be filtered and ranked in SQL instead of parsing CSV files.
+# Writers from several processes are serialized by SQLite (WAL journal).
+
+import argparse
+import ast
+import glob
+import os
+import sqlite3
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import config
+
+PARAM_PREFIX = "param_"
+
+# Metric columns shared by every kind of run; missing values are stored as NULL
+METRIC_COLUMNS = {
+    "strategy": "TEXT",
+    "symbol": "TEXT",
+    "timeframe": "TEXT",
+    "bars": "INTEGER",
+    "final_portfolio_value": "REAL",
+    "return_pct": "REAL",
+    "sharpe_ratio": "REAL",
+    "max_drawdown": "REAL",
+    "drawdown_duration": "INTEGER",
+    "volatility": "REAL",
+    "total_trades": "INTEGER",
+    "winning_trades": "INTEGER",
+    "losing_trades": "INTEGER",
+    "win_rate": "REAL",
+    "avg_trade_duration": "REAL",
+    "profit_factor": "REAL",
+    "elapsed": "REAL",
+    "error": "TEXT",
+    "recording": "TEXT",  # Equity curve and trade ledger file, see run_recorder.py
+}
+
+# Leaderboards filter on strategy (and usually symbol/timeframe) and sort by a metric
+INDEXES = {
+    "idx_results_run": "run_id",
+    "idx_results_sharpe": "strategy, sharpe_ratio",
+    "idx_results_value": "strategy, final_portfolio_value",
+    "idx_results_dataset_sharpe": "strategy, symbol, timeframe, sharpe_ratio",
+    "idx_results_dataset_value": "strategy, symbol, timeframe, final_portfolio_value",
+}
+
+
+def sql_type(value):
+    if isinstance(value, (bool, np.bool_, int, np.integer)):
+        return "INTEGER"
+    if isinstance(value, (float, np.floating)):
+        return "REAL"
+    return "TEXT"
+
+
+def sql_value(value):
+    """
+    Plain Python value for sqlite3: numpy scalars unwrapped, classes and other
+    objects stored by name or repr.
+    """
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return getattr(value, '__name__', None) or repr(value)
+
+
+class ResultsDB:
+    """
+    Connection to the results database. Cheap to create; every process (and
+    every optimizer worker) opens its own.
+    """
+
+    def __init__(self, path=None, timeout=60.0):
+        """
+        :param path: SQLite file (defaults to GENERAL_SETTINGS['results_db']).
+        :param timeout: Seconds a writer waits for another process's transaction.
+        """
+        self.path = path or config.GENERAL_SETTINGS.get("results_db", "./results/results.db")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=timeout, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        # Index pages of a large table stay cached between write transactions
+        self.connection.execute("PRAGMA cache_size=-65536")
+        self._create_schema()
+        self._columns = None
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _create_schema(self):
+        metric_columns = ",\n".join(f"    {name} {kind}" for name, kind in METRIC_COLUMNS.items())
+        self.connection.executescript(f"""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                strategy TEXT,
+                created TEXT NOT NULL,
+                cash REAL,
+                commission REAL,
+                engine TEXT,
+                "start" TEXT,
+                "end" TEXT,
+                note TEXT
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id INTEGER NOT NULL REFERENCES runs(run_id),
+            {metric_columns}
+            );
+        """)
+        for name, columns in INDEXES.items():
+            self.connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON results ({columns})")
+
+    def columns(self, refresh=False):
+        if self._columns is None or refresh:
+            self._columns = {row[1] for row in self.connection.execute("PRAGMA table_info(results)")}
+        return self._columns
+
+    def start_run(self, kind, strategy=None, cash=None, commission=None, engine=None, start=None, end=None,
+                  note=None, created=None):
+        """
+        Register a run and return its run_id.
+        :param kind: "backtest", "batch" or "optimization".
+        """
+        cursor = self.connection.execute(
+            'INSERT INTO runs (kind, strategy, created, cash, commission, engine, "start", "end", note) '
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, strategy, created or datetime.now().isoformat(timespec='seconds'), cash, commission, engine,
+             sql_value(start), sql_value(end), note))
+        return cursor.lastrowid
+
+    def add_results(self, run_id, rows):
+        """
+        Append metric rows to a run in one transaction.
+        :param rows: Dicts with any of METRIC_COLUMNS plus an optional 'params'
+                     dict; each parameter becomes a typed param_<name> column.
+        :return: Number of rows written.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        records = []
+        for row in rows:
+            record = {name: row[name] for name in METRIC_COLUMNS if name in row}
+            for name, value in (row.get("params") or {}).items():
+                record[PARAM_PREFIX + name] = value
+            records.append(record)
+
+        # BEGIN IMMEDIATE takes the write lock up front, so a schema change and
+        # the inserts that need it cannot interleave with another process
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            existing = self.columns(refresh=True)
+            for record in records:
+                for name, value in record.items():
+                    if name not in existing and value is not None:
+                        self.connection.execute(f'ALTER TABLE results ADD COLUMN "{name}" {sql_type(value)}')
+                        existing.add(name)
+
+            # Parameters that were None everywhere have no column yet and stay NULL
+            names = sorted({name for record in records for name in record if name in existing})
+            quoted = ", ".join(f'"{name}"' for name in names)
+            statement = f"INSERT INTO results (run_id, {quoted}) VALUES (?{', ?' * len(names)})"
+            self.connection.executemany(
+                statement, [(run_id, *(sql_value(record.get(name)) for name in names)) for record in records])
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return len(records)
+
+    def param_columns(self):
+        return sorted(name for name in self.columns(refresh=True) if name.startswith(PARAM_PREFIX))
+
+    def query(self, strategy=None, symbol=None, timeframe=None, run_id=None, params=None, where=None,
+              order_by=None, descending=True, limit=None, columns=None):
+        """
+        Result rows as a DataFrame, parameter columns named after the parameter.
+        :param params: {name: value} equality filters on parameters.
+        :param where: Extra SQL condition, e.g. "total_trades >= 20".
+        :param order_by: Column to sort by (a metric or a parameter name).
+        :param columns: Columns to return (default: all, without empty parameter columns).
+        """
+        conditions, values = [], []
+        for name, value in (("strategy", strategy), ("symbol", symbol), ("timeframe", timeframe),
+                            ("run_id", run_id)):
+            if value is not None:
+                conditions.append(f"{name} = ?")
+                values.append(value)
+        for name, value in (params or {}).items():
+            conditions.append(f'"{PARAM_PREFIX}{name}" = ?')
+            values.append(sql_value(value))
+        if where:
+            conditions.append(f"({where})")
+
+        available = self.columns(refresh=True)
+        if columns is None:
+            selected = "*"
+        else:
+            selected = ", ".join(f'"{PARAM_PREFIX + c}"' if PARAM_PREFIX + c in available else f'"{c}"'
+                                 for c in columns)
+        sql = f"SELECT {selected} FROM results"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if order_by:
+            column = PARAM_PREFIX + order_by if PARAM_PREFIX + order_by in available else order_by
+            sql += f' ORDER BY "{column}" {"DESC" if descending else "ASC"}'
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        df = pd.read_sql_query(sql, self.connection, params=values)
+        if columns is None:
+            empty = [c for c in df.columns if c.startswith(PARAM_PREFIX) and df[c].isna().all()]
+            df = df.drop(columns=empty)
+        return df.rename(columns=lambda c: c[len(PARAM_PREFIX):] if c.startswith(PARAM_PREFIX) else c)
+
+    def leaderboard(self, metric="sharpe_ratio", strategy=None, symbol=None, timeframe=None, run_id=None,
+                    min_trades=None, limit=20, ascending=False):
+        """
+        Top 'limit' rows by 'metric', skipping rows where it is NULL. Served by the
+        (strategy[, symbol, timeframe], metric) indexes for sharpe_ratio and
+        final_portfolio_value.
+        """
+        column = PARAM_PREFIX + metric if PARAM_PREFIX + metric in self.columns(refresh=True) else metric
+        where = f'"{column}" IS NOT NULL'
+        if min_trades:
+            where += f" AND total_trades >= {int(min_trades)}"
+        return self.query(strategy=strategy, symbol=symbol, timeframe=timeframe, run_id=run_id, where=where,
+                          order_by=metric, descending=not ascending, limit=limit)
+
+    def runs(self, kind=None, strategy=None):
+        conditions, values = [], []
+        if kind is not None:
+            conditions.append("kind = ?")
+            values.append(kind)
+        if strategy is not None:
+            conditions.append("strategy = ?")
+            values.append(strategy)
+        sql = ("SELECT runs.*, (SELECT COUNT(*) FROM results WHERE results.run_id = runs.run_id) AS rows "
+               "FROM runs")
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return pd.read_sql_query(sql + " ORDER BY run_id", self.connection, params=values)
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def _literal(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def _list_cell(value):
+    # Old backtest CSVs store the symbol/timeframe lists as "['XRP/USDT']"
+    if isinstance(value, str) and value.startswith("["):
+        value = _literal(value)
+    if isinstance(value, (list, tuple)):
+        return ",".join(str(v) for v in value)
+    return value
+
+
+def import_csv(paths, db=None):
+    """
+    Load existing results/backtest_results_*.csv and optimization_results_*.csv
+    files, one run per file. Stringified 'params' dicts become typed columns.
+    :return: Number of rows imported.
+    """
+    db = db or ResultsDB()
+    total = 0
+    for path in paths:
+        name = os.path.basename(path)
+        try:
+            df = pd.read_csv(path)
+        except pd.errors.EmptyDataError:
+            print(f"Skipped {path}: empty file")
+            continue
+        kind = "optimization" if name.startswith("optimization") else "backtest"
+        created = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='seconds')
+        rows = []
+        for row in df.to_dict("records"):
+            row = {key: (None if isinstance(value, float) and np.isnan(value) else value)
+                   for key, value in row.items()}
+            for key in ("symbol", "timeframe"):
+                if key in row:
+                    row[key] = _list_cell(row[key])
+            if isinstance(row.get("params"), str):
+                params = _literal(row["params"])
+                row["params"] = params if isinstance(params, dict) else {"params": row["params"]}
+            rows.append(row)
+        strategy = rows[0].get("strategy") if rows else None
+        run_id = db.start_run(kind, strategy=strategy, created=created, note=f"imported from {name}")
+        total += db.add_results(run_id, rows)
+        print(f"Imported {len(rows)} rows from {path} as run {run_id}")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the backtest results database")
+    parser.add_argument("--db", default=None, help="Database file (default: GENERAL_SETTINGS['results_db'])")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Import result CSV files")
+    import_parser.add_argument("paths", nargs="*", help="CSV files (default: results/*.csv)")
+    runs_parser = subparsers.add_parser("runs", help="List runs")
+    runs_parser.add_argument("--kind", default=None)
+    runs_parser.add_argument("--strategy", default=None)
+    board_parser = subparsers.add_parser("leaderboard", help="Best results by a metric")
+    board_parser.add_argument("--metric", default="sharpe_ratio")
+    board_parser.add_argument("--strategy", default=None)
+    board_parser.add_argument("--symbol", default=None)
+    board_parser.add_argument("--timeframe", default=None)
+    board_parser.add_argument("--run-id", type=int, default=None)
+    board_parser.add_argument("--min-trades", type=int, default=None)
+    board_parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with ResultsDB(args.db) as db:
+        if args.command == "import":
+            paths = args.paths or sorted(glob.glob(os.path.join(config.GENERAL_SETTINGS["results_path"], "*.csv")))
+            print(f"Imported {import_csv(paths, db)} rows into {db.path}")
+        elif args.command == "runs":
+            print(db.runs(kind=args.kind, strategy=args.strategy).to_string(index=False))
+        else:
+            started = time.perf_counter()
+            board = db.leaderboard(args.metric, strategy=args.strategy, symbol=args.symbol,
+                                   timeframe=args.timeframe, run_id=args.run_id, min_trades=args.min_trades,
+                                   limit=args.limit)
+            print(board.to_string(index=False))
+            print(f"{len(board)} rows in {(time.perf_counter() - started) * 1000:.1f} ms")
@@ -0,0 +1,209 @@
+# run_recorder.py
+#
+# Per-bar equity curve and trade ledger of a backtest, kept in preallocated
+# NumPy arrays while the run is in progress and saved as one compressed .npz
+# file per run under results/runs/<run_id>/, next to the run's rows in the
+# results database.
+#
+#   python run_recorder.py results/runs/12/XRPUSDT_1h.npz
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+import backtrader as bt
+import charts
+import config
+
+EPOCH_ORDINAL = 719163.0  # date(1970, 1, 1).toordinal(), see charts.num_to_datetime64
+
+EQUITY_DTYPE = np.dtype([
+    ('datetime', 'i8'),  # epoch ms
+    ('value', 'f8'),
+    ('cash', 'f8'),
+    ('position', 'f8'),  # Size held in the first data feed
+    ('exposure', 'f8'),  # Net position value over portfolio value (negative when short)
+])
+
+TRADE_DTYPE = np.dtype([
+    ('entry_time', 'i8'),  # epoch ms
+    ('exit_time', 'i8'),  # epoch ms, -1 while the trade is open
+    ('direction', 'i1'),  # 1 long, -1 short
+    ('size', 'f8'),  # Absolute size
+    ('entry_price', 'f8'),
+    ('exit_price', 'f8'),  # NaN while the trade is open
+    ('fees', 'f8'),
+    ('pnl', 'f8'),  # Gross
+    ('pnl_net', 'f8'),  # After fees
+    ('bars_held', 'i4'),
+])
+
+
+def num_to_ms(num):
+    return int(round((num - EPOCH_ORDINAL) * 86400000.0))
+
+
+class EquityRecorder(bt.Analyzer):
+    """
+    Fills preallocated arrays on every bar and a trade ledger on every closed
+    trade. next() only stores raw floats; timestamps and exposure are derived
+    once in get_analysis(). With preloaded data the arrays are sized once from
+    the feed length; other feeds grow them by doubling.
+    """
+
+    FIELDS = ('datetime', 'close', 'value', 'cash', 'position')
+
+    def start(self):
+        self.capacity = max(self.data.buflen(), 1024)
+        self.arrays = {field: np.empty(self.capacity) for field in self.FIELDS}
+        self.count = 0
+        self.trades = []
+        self.fills = []  # (bar, size, price) of completed orders, for chart_series()
+        self.open_trades = {}  # trade ref -> trade
+        self.size_before = {}  # data -> position size before its last executed order
+        # Attribute lookups hoisted out of next(); the broker updates the Position in place
+        self._broker = self.strategy.broker
+        self._position_obj = self._broker.getposition(self.data)
+        self._bind()
+
+    def _bind(self):
+        self._datetime, self._close, self._value, self._cash, self._position = (
+            self.arrays[field] for field in self.FIELDS)
+
+    def _grow(self):
+        self.capacity *= 2
+        for field, array in self.arrays.items():
+            grown = np.empty(self.capacity)
+            grown[:self.count] = array[:self.count]
+            self.arrays[field] = grown
+        self._bind()
+
+    def next(self):
+        i = self.count
+        if i == self.capacity:
+            self._grow()
+        self._datetime[i] = self.data.datetime[0]
+        self._close[i] = self.data.close[0]
+        self._value[i] = self._broker.getvalue()
+        self._cash[i] = self._broker.getcash()
+        self._position[i] = self._position_obj.size
+        self.count = i + 1
+
+    def notify_order(self, order):
+        # Trades are only notified when opened and closed, so the size a trade
+        # reached before its closing order is taken from the order flow
+        if order.status == order.Completed:
+            self.size_before[order.data] = self.strategy.getposition(order.data).size - order.executed.size
+            # Orders are notified before next() of the bar they executed on
+            self.fills.append((self.count, order.executed.size, order.executed.price))
+
+    def notify_trade(self, trade):
+        if not trade.isclosed:
+            self.open_trades[trade.ref] = trade
+            return
+        self.open_trades.pop(trade.ref, None)
+        size = self.size_before.get(trade.data, 0.0)
+        self.trades.append((
+            num_to_ms(trade.dtopen), num_to_ms(trade.dtclose), 1 if size > 0 else -1, abs(size), trade.price,
+            trade.price + trade.pnl / size if size else np.nan, trade.commission, trade.pnl, trade.pnlcomm,
+            trade.barlen,
+        ))
+
+    def chart_series(self):
+        """
+        Close, portfolio value and fills in the charts.make_series() layout, so
+        headless charts come from the same arrays as the saved recording.
+        """
+        n = self.count
+        return charts.make_series(charts.num_to_datetime64(self._datetime[:n]), self._close[:n],
+                                  self._value[:n], self.fills)
+
+    def get_analysis(self):
+        """
+        (equity, trades) structured arrays. Trades still open at the end are
+        listed with exit_time -1 and NaN exit price, fees and PnL.
+        """
+        trades = list(self.trades)
+        for trade in self.open_trades.values():
+            # Notified trades are copies, so size and average price come from the current position
+            held = self.strategy.getposition(trade.data)
+            trades.append((num_to_ms(trade.dtopen), -1, 1 if held.size > 0 else -1, abs(held.size), held.price,
+                           np.nan, np.nan, np.nan, np.nan, len(self.data) - trade.baropen))
+        n = self.count
+        value, position = self._value[:n], self._position[:n]
+        equity = np.zeros(n, dtype=EQUITY_DTYPE)
+        equity['datetime'] = np.round((self._datetime[:n] - EPOCH_ORDINAL) * 86400000.0)
+        equity['value'] = value
+        equity['cash'] = self._cash[:n]
+        equity['position'] = position
+        with np.errstate(divide='ignore', invalid='ignore'):
+            equity['exposure'] = np.where(value != 0, position * self._close[:n] / value, 0.0)
+        return equity, np.array(trades, dtype=TRADE_DTYPE)
+
+
+def from_vector(result, data):
+    """
+    (equity, trades) of a vector_engine.VectorResult run on 'data', in the same
+    layout as EquityRecorder.
+    """
+    close = data['close'].to_numpy()
+    times = data.index.values.astype('datetime64[ms]').astype(np.int64)
+    equity = np.zeros(len(close), dtype=EQUITY_DTYPE)
+    equity['datetime'] = times
+    equity['value'] = result.value
+    equity['position'] = result.position
+    equity['cash'] = result.value - result.position * close
+    with np.errstate(divide='ignore', invalid='ignore'):
+        equity['exposure'] = np.where(result.value != 0, result.position * close / result.value, 0.0)
+
+    trades = []
+    for trade in result.trades:
+        closed = trade.close_bar is not None
+        trades.append((
+            times[trade.open_bar], times[trade.close_bar] if closed else -1, 1 if trade.size > 0 else -1,
+            abs(trade.size), trade.price, trade.price + trade.pnl / trade.size if closed else np.nan,
+            trade.pnl - trade.pnlcomm if closed else np.nan, trade.pnl if closed else np.nan,
+            trade.pnlcomm if closed else np.nan, (trade.close_bar if closed else len(close) - 1) - trade.open_bar,
+        ))
+    return equity, np.array(trades, dtype=TRADE_DTYPE)
+
+
+def recording_path(run_id, name):
+    """
+    results/runs/<run_id>/<name>.npz, with '/' removed from symbol names.
+    """
+    return os.path.join(config.GENERAL_SETTINGS["results_path"], "runs", str(run_id),
+                        f"{name.replace('/', '')}.npz")
+
+
+def save_recording(path, equity, trades):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, equity=equity, trades=trades)
+    return path
+
+
+def load_recording(path):
+    """
+    The saved (equity, trades) as DataFrames with datetime columns.
+    """
+    with np.load(path) as recording:
+        equity = pd.DataFrame(recording['equity'])
+        trades = pd.DataFrame(recording['trades'])
+    equity['datetime'] = pd.to_datetime(equity['datetime'], unit='ms')
+    for column in ('entry_time', 'exit_time'):
+        trades[column] = pd.to_datetime(trades[column].where(trades[column] >= 0), unit='ms')
+    return equity.set_index('datetime'), trades
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show a saved equity curve and trade ledger")
+    parser.add_argument("path", help="results/runs/<run_id>/<name>.npz")
+    args = parser.parse_args()
+
+    equity, trades = load_recording(args.path)
+    print(f"{len(equity)} bars from {equity.index[0]} to {equity.index[-1]}, "
+          f"value {equity['value'].iloc[0]:.2f} -> {equity['value'].iloc[-1]:.2f}, "
+          f"max exposure {equity['exposure'].abs().max():.2f}")
+    print(f"{len(trades)} trades")
+    if len(trades):
+        print(trades.to_string(index=False))
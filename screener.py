@@ -0,0 +1,146 @@
+# screener.py
+
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+import data_access
+import data_handler
+
+MARKETS_CACHE_FILE = 'markets_cache.json'
+UNIVERSE_FILE = 'universe.csv'
+
+_markets_memory = {}  # data_dir -> (fetched_at, DataFrame)
+
+
+def load_market_metadata(ttl=24 * 3600, client=None, refresh=False):
+    """
+    Spot market metadata (symbol, base, quote, active, min order size/cost) as
+    a DataFrame. The result is cached in memory and in Data_store for 'ttl'
+    seconds, so repeated screens do not call load_markets() again.
+    """
+    path = os.path.join(data_access.DATA_DIR, MARKETS_CACHE_FILE)
+    now = time.time()
+
+    cached = _markets_memory.get(path)
+    if cached is None and os.path.exists(path):
+        with open(path) as f:
+            payload = json.load(f)
+        cached = (payload['fetched_at'], pd.DataFrame(payload['markets']))
+        _markets_memory[path] = cached
+    if cached is not None and not refresh and now - cached[0] < ttl:
+        return cached[1]
+
+    client = client or data_handler.get_exchange()
+    print("Fetching market metadata from the exchange...")
+    markets = client.load_markets(reload=True)
+    metadata = pd.DataFrame([{
+        'symbol': symbol,
+        'base': market.get('base'),
+        'quote': market.get('quote'),
+        'active': market.get('active') is not False,  # Missing means active
+        'spot': market.get('spot', True),
+        'min_amount': (market.get('limits') or {}).get('amount', {}).get('min'),
+        'min_cost': (market.get('limits') or {}).get('cost', {}).get('min'),
+    } for symbol, market in markets.items() if '/' in symbol])
+
+    os.makedirs(data_access.DATA_DIR, exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'fetched_at': now, 'markets': metadata.to_dict(orient='records')}, f)
+    os.replace(tmp, path)
+    _markets_memory[path] = (now, metadata)
+    return metadata
+
+
+def fetch_ticker_frame(client=None):
+    """
+    Every ticker from a single bulk fetch_tickers() call as a DataFrame.
+    """
+    client = client or data_handler.get_exchange()
+    tickers = client.fetch_tickers()
+    frame = pd.DataFrame([{
+        'symbol': symbol,
+        'last': ticker.get('last'),
+        'bid': ticker.get('bid'),
+        'ask': ticker.get('ask'),
+        'base_volume': ticker.get('baseVolume'),
+        'quote_volume': ticker.get('quoteVolume'),
+        'change_pct': ticker.get('percentage'),
+    } for symbol, ticker in tickers.items()])
+    numeric = frame.columns.drop('symbol')
+    frame[numeric] = frame[numeric].apply(pd.to_numeric, errors='coerce')
+    # Some tickers only report base volume
+    frame['quote_volume'] = frame['quote_volume'].fillna(frame['base_volume'] * frame['last'])
+    return frame
+
+
+def screen(quote="USDT", min_quote_volume=100000, min_price=0.1, max_price=1000000, max_spread_pct=None,
+           active_only=True, top_n=None, sort_by='quote_volume', ttl=24 * 3600, client=None):
+    """
+    Rank the tradable universe with one bulk ticker call and vectorized filters.
+    :param quote: Quote currency to keep (e.g. 'USDT').
+    :param min_quote_volume: Minimum 24h volume in quote currency.
+    :param min_price: Minimum last price.
+    :param max_price: Maximum last price.
+    :param max_spread_pct: Optional maximum bid/ask spread in percent.
+    :param active_only: Drop markets the exchange flags as inactive.
+    :param top_n: Keep only the best 'top_n' symbols after ranking.
+    :param sort_by: Column to rank by, descending.
+    :param ttl: Lifetime of the cached market metadata in seconds.
+    :return: Ranked DataFrame with a 1-based 'rank' column.
+    """
+    metadata = load_market_metadata(ttl=ttl, client=client)
+    universe = fetch_ticker_frame(client=client).merge(metadata, on='symbol', how='inner')
+
+    mask = (
+        (universe['quote'] == quote)
+        & universe['spot']
+        & (universe['quote_volume'] >= min_quote_volume)
+        & universe['last'].between(min_price, max_price)
+    )
+    if active_only:
+        mask &= universe['active']
+    if max_spread_pct is not None:
+        spread = (universe['ask'] - universe['bid']) / universe['last'] * 100
+        mask &= spread.le(max_spread_pct) | spread.isna()
+
+    universe = universe[mask].sort_values(sort_by, ascending=False, na_position='last')
+    if top_n is not None:
+        universe = universe.head(top_n)
+    universe = universe.reset_index(drop=True)
+    universe.insert(0, 'rank', np.arange(1, len(universe) + 1))
+    return universe
+
+
+def save_universe(universe, filename=None):
+    """
+    Save the ranked universe to Data_store/universe.csv.
+    """
+    filename = filename or os.path.join(data_access.DATA_DIR, UNIVERSE_FILE)
+    universe.to_csv(filename, index=False)
+    print(f"Universe of {len(universe)} symbols saved to {filename}")
+    return filename
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Screen the exchange for a ranked trading universe")
+    parser.add_argument("--quote", default="USDT")
+    parser.add_argument("--min-quote-volume", type=float, default=100000)
+    parser.add_argument("--min-price", type=float, default=0.1)
+    parser.add_argument("--max-price", type=float, default=1000000)
+    parser.add_argument("--max-spread-pct", type=float, default=None)
+    parser.add_argument("--top", type=int, default=50)
+    parser.add_argument("--refresh-markets", action="store_true", help="Ignore the cached market metadata")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.refresh_markets:
+        load_market_metadata(refresh=True)
+    ranked = screen(quote=args.quote, min_quote_volume=args.min_quote_volume, min_price=args.min_price,
+                    max_price=args.max_price, max_spread_pct=args.max_spread_pct, top_n=args.top)
+    print(ranked[['rank', 'symbol', 'last', 'quote_volume', 'change_pct']].to_string(index=False))
+    save_universe(ranked)
+    print(f"Screened in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,801 @@
+# storage.py
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+import numpy as np
+import pandas as pd
+import config
+
+OHLCV_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+MANIFEST_FILE = 'manifest.json'
+
+# Plain column arrays (epoch-ms int64 timestamps plus OHLCV), usually memory-mapped
+CandleArrays = namedtuple('CandleArrays', ['timestamp'] + OHLCV_FIELDS)
+
+
+def dataset_name(symbol, timeframe):
+    """
+    Base file name used for a symbol/timeframe pair, e.g. 'BTC_USDT_15m'.
+    """
+    return f"{symbol.replace('/', '_')}_{timeframe}"
+
+
+def rows_to_frame(ohlcv):
+    """
+    Convert raw [timestamp_ms, open, high, low, close, volume] rows into the
+    DataFrame layout returned by load_data.
+    """
+    df = pd.DataFrame(ohlcv, columns=['timestamp'] + OHLCV_FIELDS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+    return df
+
+
+def index_to_epoch_ms(index):
+    """
+    Convert a DatetimeIndex into an int64 array of epoch milliseconds.
+    """
+    return np.asarray(index.values.astype('datetime64[ms]').astype(np.int64))
+
+
+def to_epoch_ms(value):
+    """
+    Convert epoch ms, a datetime or a date string into epoch ms (None passes through).
+    """
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    if isinstance(value, (float, np.floating)):
+        return int(value)  # pd.Timestamp would read a bare number as nanoseconds
+    return int(pd.Timestamp(value).value // 10**6)
+
+
+def _bounds(timestamps, start=None, end=None):
+    """
+    Positions [lo, hi) of the rows with start <= timestamp <= end in a sorted array.
+    """
+    lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+    hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side='right'))
+    return lo, max(lo, hi)
+
+
+def read_rows(path, lo, hi):
+    """
+    Rows [lo, hi) of a 1-D .npy file, read from disk without mapping the file.
+    """
+    with open(path, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            _, _, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            _, _, dtype = np.lib.format.read_array_header_2_0(f)
+        f.seek(lo * dtype.itemsize, os.SEEK_CUR)
+        return np.fromfile(f, dtype=dtype, count=hi - lo)
+
+
+def append_rows(path, values, rows):
+    """
+    Write 'values' into a 1-D .npy file as rows [rows, rows + len(values)) and
+    patch the shape in its header, without rewriting the existing rows. Bytes
+    past 'rows' (left by an interrupted append) are overwritten. Returns False
+    when the new shape no longer fits the header, which is then left untouched.
+    """
+    with open(path, 'r+b') as f:
+        version = np.lib.format.read_magic(f)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        _, _, dtype = read_header(f)
+        data_offset = f.tell()
+
+        header = io.BytesIO()
+        write_header = np.lib.format.write_array_header_1_0 if version == (1, 0) else np.lib.format.write_array_header_2_0
+        write_header(header, {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False,
+                              'shape': (rows + len(values),)})
+        if len(header.getvalue()) != data_offset:
+            return False
+
+        # Data first, header second: until the header is patched, readers see the old length
+        f.seek(data_offset + rows * dtype.itemsize)
+        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(0)
+        f.write(header.getvalue())
+        f.flush()
+        os.fsync(f.fileno())
+    return True
+
+
+def slice_frame(df, start=None, end=None):
+    """
+    Rows of a time-sorted frame with start <= timestamp <= end (epoch ms bounds, inclusive).
+    """
+    lo, hi = _bounds(index_to_epoch_ms(df.index), start, end)
+    return df.iloc[lo:hi]
+
+
+class CsvStore:
+    """
+    Text storage: one '<SYMBOL>_<tf>.csv' file per dataset.
+    """
+    name = 'csv'
+    extension = '.csv'
+    supports_range_reads = False
+
+    def __init__(self, data_dir=None):
+        """
+        :param data_dir: Directory holding the files (defaults to config data_path).
+        """
+        self.data_dir = data_dir or config.GENERAL_SETTINGS["data_path"]
+
+    def path(self, symbol, timeframe):
+        return os.path.join(self.data_dir, dataset_name(symbol, timeframe) + self.extension)
+
+    def exists(self, symbol, timeframe):
+        return os.path.exists(self.path(symbol, timeframe))
+
+    def load(self, symbol, timeframe):
+        return pd.read_csv(self.path(symbol, timeframe), index_col='timestamp', parse_dates=True)
+
+    def load_range(self, symbol, timeframe, start=None, end=None):
+        """
+        Text files have no index to seek with, so the whole file is parsed and then sliced.
+        """
+        return slice_frame(self.load(symbol, timeframe), start, end)
+
+    def iter_chunks(self, symbol, timeframe, chunk_rows=20_000, start=None, end=None):
+        """
+        Yield CandleArrays of at most chunk_rows rows with start <= timestamp <= end,
+        parsing the file incrementally so only one chunk is in memory at a time.
+        """
+        reader = pd.read_csv(self.path(symbol, timeframe), index_col='timestamp', parse_dates=True,
+                             chunksize=chunk_rows)
+        with reader:
+            for df in reader:
+                timestamps = index_to_epoch_ms(df.index)
+                lo, hi = _bounds(timestamps, start, end)
+                if hi > lo:
+                    yield CandleArrays(timestamp=timestamps[lo:hi],
+                                       **{field: df[field].to_numpy()[lo:hi] for field in OHLCV_FIELDS})
+                if end is not None and len(timestamps) and timestamps[-1] > end:
+                    break
+
+    def save(self, df, symbol, timeframe):
+        os.makedirs(self.data_dir, exist_ok=True)
+        df.to_csv(self.path(symbol, timeframe))
+        update_manifest(self, symbol, timeframe)
+
+    def append(self, ohlcv, symbol, timeframe):
+        """
+        Append raw OHLCV rows and flush them to disk.
+        """
+        os.makedirs(self.data_dir, exist_ok=True)
+        filename = self.path(symbol, timeframe)
+        write_header = not os.path.exists(filename) or os.path.getsize(filename) == 0
+
+        with open(filename, 'a', newline='') as f:
+            rows_to_frame(ohlcv).to_csv(f, header=write_header)
+            f.flush()
+            os.fsync(f.fileno())
+        update_manifest(self, symbol, timeframe, appended=[row[0] for row in ohlcv])
+
+    def last_timestamp(self, symbol, timeframe):
+        """
+        Last stored timestamp in epoch ms, reading only the tail of the file.
+        """
+        filename = self.path(symbol, timeframe)
+        if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+            return None
+
+        with open(filename, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 4096))
+            tail = f.read().decode('utf-8', errors='ignore')
+
+        lines = [line for line in tail.splitlines() if line.strip()]
+        if not lines or lines[-1].startswith('timestamp'):
+            return None
+        return int(pd.Timestamp(lines[-1].split(',')[0]).value // 10**6)
+
+    def size_on_disk(self, symbol, timeframe):
+        return os.path.getsize(self.path(symbol, timeframe))
+
+    def fingerprint(self, symbol, timeframe):
+        """
+        (path, mtime_ns, size) of the stored file; changes whenever the file does.
+        """
+        path = self.path(symbol, timeframe)
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def describe(self, symbol, timeframe):
+        """
+        Manifest entry for the dataset: first/last timestamp and row count.
+        """
+        with open(self.path(symbol, timeframe), 'rb') as f:
+            content = f.read()
+        lines = content.rstrip(b'\r\n').split(b'\n', 1)
+        if len(lines) < 2:
+            return {'first': None, 'last': None, 'rows': 0}
+
+        first_line = lines[1].split(b'\n', 1)[0]
+        last_line = content.rstrip(b'\r\n').rsplit(b'\n', 1)[-1]
+        to_ms = lambda line: int(pd.Timestamp(line.split(b',', 1)[0].decode()).value // 10**6)
+        return {
+            'first': to_ms(first_line),
+            'last': to_ms(last_line),
+            'rows': content.rstrip(b'\r\n').count(b'\n'),
+        }
+
+    def checksum(self, symbol, timeframe):
+        digest = hashlib.sha1()
+        with open(self.path(symbol, timeframe), 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+
+class NpyStore:
+    """
+    Columnar binary storage: one '<SYMBOL>_<tf>.cols' directory per dataset
+    holding 'timestamp.npy' (int64 epoch ms) and one .npy file per OHLCV column.
+    """
+    name = 'npy'
+    extension = '.cols'
+    supports_range_reads = True
+
+    def __init__(self, data_dir=None, dtype='float64'):
+        """
+        :param data_dir: Directory holding the datasets (defaults to config data_path).
+        :param dtype: Float dtype used for OHLCV columns when saving ('float64' or 'float32').
+        """
+        self.data_dir = data_dir or config.GENERAL_SETTINGS["data_path"]
+        self.dtype = np.dtype(dtype)
+
+    def path(self, symbol, timeframe):
+        return os.path.join(self.data_dir, dataset_name(symbol, timeframe) + self.extension)
+
+    def exists(self, symbol, timeframe):
+        return os.path.exists(os.path.join(self.path(symbol, timeframe), 'timestamp.npy'))
+
+    def load_columns(self, symbol, timeframe, mmap_mode=None):
+        """
+        Load the raw column arrays as a dict keyed by column name.
+        """
+        folder = self.path(symbol, timeframe)
+        columns = {
+            column: np.load(os.path.join(folder, f"{column}.npy"), mmap_mode=mmap_mode)
+            for column in ['timestamp'] + OHLCV_FIELDS
+        }
+        # An append interrupted before timestamp.npy was swapped in leaves
+        # longer OHLCV columns behind; the extra rows are not part of the dataset
+        rows = len(columns['timestamp'])
+        return {column: values[:rows] for column, values in columns.items()}
+
+    def load(self, symbol, timeframe):
+        columns = self.load_columns(symbol, timeframe)
+        index = pd.DatetimeIndex(pd.to_datetime(columns.pop('timestamp'), unit='ms'), name='timestamp')
+        return pd.DataFrame(columns, index=index)
+
+    def load_arrays(self, symbol, timeframe, start=None, end=None, mmap=True):
+        """
+        Column arrays for rows with start <= timestamp <= end (epoch ms), without
+        building a DataFrame. With mmap=True the arrays are read-only views of
+        the files, so every process mapping the same dataset shares its pages.
+        """
+        columns = self.load_columns(symbol, timeframe, mmap_mode='r' if mmap else None)
+        lo, hi = _bounds(columns['timestamp'], start, end)
+        return CandleArrays(**{column: values[lo:hi] for column, values in columns.items()})
+
+    def load_range(self, symbol, timeframe, start=None, end=None):
+        """
+        Rows with start <= timestamp <= end (epoch ms). The columns are memory-mapped
+        and the window is found by binary search on the timestamp column, so only
+        the pages holding the window are read.
+        """
+        columns = self.load_columns(symbol, timeframe, mmap_mode='r')
+        timestamps = columns.pop('timestamp')
+        lo, hi = _bounds(timestamps, start, end)
+        index = pd.DatetimeIndex(pd.to_datetime(np.array(timestamps[lo:hi]), unit='ms'), name='timestamp')
+        return pd.DataFrame({column: np.array(values[lo:hi]) for column, values in columns.items()}, index=index)
+
+    def iter_chunks(self, symbol, timeframe, chunk_rows=20_000, start=None, end=None):
+        """
+        Yield CandleArrays of at most chunk_rows rows with start <= timestamp <= end.
+        The rows are read with plain file reads instead of memory maps, whose
+        pages would stay resident for the whole run, so only one chunk is in
+        memory at a time.
+        """
+        folder = self.path(symbol, timeframe)
+        timestamps = np.load(os.path.join(folder, 'timestamp.npy'), mmap_mode='r')
+        lo, hi = _bounds(timestamps, start, end)
+        del timestamps
+        paths = {column: os.path.join(folder, f"{column}.npy") for column in ['timestamp'] + OHLCV_FIELDS}
+        for first in range(lo, hi, chunk_rows):
+            last = min(first + chunk_rows, hi)
+            yield CandleArrays(**{column: read_rows(path, first, last) for column, path in paths.items()})
+
+    def save(self, df, symbol, timeframe):
+        columns = {'timestamp': index_to_epoch_ms(df.index)}
+        for field in OHLCV_FIELDS:
+            columns[field] = df[field].to_numpy(dtype=self.dtype)
+        self._write_columns(columns, symbol, timeframe)
+        update_manifest(self, symbol, timeframe)
+
+    def append(self, ohlcv, symbol, timeframe):
+        """
+        Append raw OHLCV rows in place: each column file gets the new rows at
+        its end and a patched header, so a page costs its own size, not the
+        dataset's. As in _write_columns, timestamp.npy is extended last.
+        """
+        rows = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 1 + len(OHLCV_FIELDS))
+        new_columns = {'timestamp': rows[:, 0].astype(np.int64)}
+        for i, field in enumerate(OHLCV_FIELDS, start=1):
+            new_columns[field] = rows[:, i]
+
+        if not self.exists(symbol, timeframe):
+            for field in OHLCV_FIELDS:
+                new_columns[field] = new_columns[field].astype(self.dtype)
+            self._write_columns(new_columns, symbol, timeframe)
+        else:
+            folder = self.path(symbol, timeframe)
+            length = len(np.load(os.path.join(folder, 'timestamp.npy'), mmap_mode='r'))
+            for column in OHLCV_FIELDS + ['timestamp']:
+                if not append_rows(os.path.join(folder, f"{column}.npy"), new_columns[column], length):
+                    # Header too small for the new shape (not the case for files
+                    # written by numpy's np.save): fall back to a full rewrite
+                    old_columns = self.load_columns(symbol, timeframe)
+                    self._write_columns({
+                        name: np.concatenate([old_columns[name], new_columns[name].astype(old_columns[name].dtype)])
+                        for name in new_columns
+                    }, symbol, timeframe)
+                    break
+        update_manifest(self, symbol, timeframe, appended=rows[:, 0].astype(np.int64))
+
+    def last_timestamp(self, symbol, timeframe):
+        if not self.exists(symbol, timeframe):
+            return None
+        timestamps = np.load(os.path.join(self.path(symbol, timeframe), 'timestamp.npy'), mmap_mode='r')
+        return int(timestamps[-1]) if len(timestamps) else None
+
+    def size_on_disk(self, symbol, timeframe):
+        folder = self.path(symbol, timeframe)
+        return sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder))
+
+    def fingerprint(self, symbol, timeframe):
+        """
+        (path, newest column mtime_ns, total size) of the dataset folder.
+        """
+        folder = self.path(symbol, timeframe)
+        stats = [os.stat(os.path.join(folder, f"{column}.npy")) for column in ['timestamp'] + OHLCV_FIELDS]
+        return folder, max(stat.st_mtime_ns for stat in stats), sum(stat.st_size for stat in stats)
+
+    def describe(self, symbol, timeframe):
+        """
+        Manifest entry for the dataset: first/last timestamp and row count.
+        """
+        timestamps = np.load(os.path.join(self.path(symbol, timeframe), 'timestamp.npy'), mmap_mode='r')
+        return {
+            'first': int(timestamps[0]) if len(timestamps) else None,
+            'last': int(timestamps[-1]) if len(timestamps) else None,
+            'rows': int(len(timestamps)),
+        }
+
+    def checksum(self, symbol, timeframe):
+        folder = self.path(symbol, timeframe)
+        digest = hashlib.sha1()
+        for column in ['timestamp'] + OHLCV_FIELDS:
+            with open(os.path.join(folder, f"{column}.npy"), 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    def _write_columns(self, columns, symbol, timeframe):
+        # Every column is written to a temp file first; only then are they
+        # swapped in, timestamp.npy last. The timestamp column defines the
+        # dataset's length (load_columns truncates the others to it), so a
+        # crash mid-way leaves the previous rows readable and last_timestamp
+        # never reports candles whose OHLCV columns were not written.
+        folder = self.path(symbol, timeframe)
+        os.makedirs(folder, exist_ok=True)
+        written = []
+        for column in OHLCV_FIELDS + ['timestamp']:
+            target = os.path.join(folder, f"{column}.npy")
+            tmp = target + '.tmp'
+            with open(tmp, 'wb') as f:
+                np.save(f, np.ascontiguousarray(columns[column]))
+                f.flush()
+                os.fsync(f.fileno())
+            written.append((tmp, target))
+        for tmp, target in written:
+            os.replace(tmp, target)
+
+
+class CompactStore(NpyStore):
+    """
+    Opt-in float32 variant of the columnar store ('<SYMBOL>_<tf>.c32' folders).
+    It halves memory and disk use for large multi-symbol universes; check
+    precision_report() before relying on it for a symbol's price scale.
+    """
+    name = 'npy32'
+    extension = '.c32'
+
+    def __init__(self, data_dir=None):
+        super().__init__(data_dir=data_dir, dtype='float32')
+
+
+class DatasetCache:
+    """
+    Thread-safe, size-bounded LRU cache of loaded DataFrames keyed on the dataset
+    fingerprint, so a file is only read and parsed again after it changes.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        :param max_bytes: Total memory budget for cached frames; least recently
+                          used entries are evicted once it is exceeded.
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # fingerprint -> (DataFrame, nbytes)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, df):
+        nbytes = int(df.memory_usage(index=True, deep=False).sum())
+        with self.lock:
+            # A new fingerprint for the same path replaces the stale version
+            for old_key in [k for k in self.entries if k[0] == key[0]]:
+                self._remove(old_key)
+            if nbytes > self.max_bytes:
+                return
+            self.entries[key] = (df, nbytes)
+            self.total_bytes += nbytes
+            while self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+
+    def invalidate(self, path=None):
+        """
+        Drop the entries for 'path' (including frames derived from it, keyed
+        as '<path>@<suffix>'), or everything when no path is given.
+        """
+        with self.lock:
+            for key in [k for k in self.entries if path is None or k[0] == path or k[0].startswith(path + '@')]:
+                self._remove(key)
+
+    def invalidate_matching(self, predicate):
+        """
+        Drop the entries whose path (without any '@<suffix>') satisfies predicate(path).
+        """
+        with self.lock:
+            for key in [k for k in self.entries if predicate(k[0].split('@', 1)[0])]:
+                self._remove(key)
+
+    def info(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _remove(self, key):
+        _, nbytes = self.entries.pop(key)
+        self.total_bytes -= nbytes
+
+
+_manifest_lock = threading.Lock()
+
+
+def manifest_path(data_dir=None):
+    return os.path.join(data_dir or config.GENERAL_SETTINGS["data_path"], MANIFEST_FILE)
+
+
+def read_manifest(data_dir=None):
+    """
+    Manifest entries keyed by '<SYMBOL>_<tf>.<format>'; empty if there is no manifest yet.
+    """
+    path = manifest_path(data_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(manifest, data_dir):
+    path = manifest_path(data_dir)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def update_manifest(store, symbol, timeframe, appended=None):
+    """
+    Record the current state of a dataset in the manifest. Stores call this
+    after every save and append, so the manifest never lags the files.
+    :param appended: Epoch-ms timestamps of rows just appended. The existing
+                     entry is then advanced from them instead of re-reading
+                     the dataset, and its checksum is cleared until
+                     fill_checksums() recomputes it, so a long sync does not
+                     hash the whole file on every page.
+    """
+    key = f"{dataset_name(symbol, timeframe)}.{store.name}"
+    if appended is None:
+        entry = {'symbol': symbol, 'timeframe': timeframe, 'format': store.name,
+                 **store.describe(symbol, timeframe), 'checksum': store.checksum(symbol, timeframe)}
+    with _manifest_lock:
+        manifest = read_manifest(store.data_dir)
+        if appended is not None:
+            entry = manifest.get(key)
+            if entry is None:
+                entry = {'symbol': symbol, 'timeframe': timeframe, 'format': store.name,
+                         **store.describe(symbol, timeframe)}
+            elif len(appended):
+                entry.update(first=entry['first'] if entry['first'] is not None else int(appended[0]),
+                             last=int(appended[-1]), rows=entry['rows'] + len(appended))
+            entry['checksum'] = None
+        manifest[key] = entry
+        _write_manifest(manifest, store.data_dir)
+
+
+def fill_checksums(data_dir=None):
+    """
+    Compute the checksums appends left empty and store them in the manifest.
+    """
+    missing = {key: entry for key, entry in read_manifest(data_dir).items() if entry.get('checksum') is None}
+    for key, entry in missing.items():
+        store = get_store(entry['format'], data_dir=data_dir)
+        if not store.exists(entry['symbol'], entry['timeframe']):
+            continue
+        checksum = store.checksum(entry['symbol'], entry['timeframe'])
+        with _manifest_lock:
+            manifest = read_manifest(data_dir)
+            # Skip entries that changed while hashing; the next call picks them up
+            if key in manifest and manifest[key].get('rows') == entry['rows']:
+                manifest[key]['checksum'] = checksum
+                _write_manifest(manifest, data_dir)
+
+
+def remove_from_manifest(store, symbol, timeframe):
+    with _manifest_lock:
+        manifest = read_manifest(store.data_dir)
+        if manifest.pop(f"{dataset_name(symbol, timeframe)}.{store.name}", None) is not None:
+            _write_manifest(manifest, store.data_dir)
+
+
+STORES = {
+    CsvStore.name: CsvStore,
+    NpyStore.name: NpyStore,
+    CompactStore.name: CompactStore,
+}
+# Formats load_data and friends may serve. The float32 copies are only read
+# through load_compact_arrays, never as a silent fallback.
+FULL_PRECISION_FORMATS = [NpyStore.name, CsvStore.name]
+
+
+def get_store(fmt=None, data_dir=None):
+    """
+    Return the storage backend for 'fmt' (defaults to config data_format).
+    """
+    fmt = fmt or config.GENERAL_SETTINGS.get("data_format", "csv")
+    if fmt not in STORES:
+        raise ValueError(f"Unknown storage format '{fmt}'. Options: {', '.join(STORES)}")
+    return STORES[fmt](data_dir=data_dir)
+
+
+def find_store(symbol, timeframe, data_dir=None):
+    """
+    Return the first full-precision backend holding the dataset, trying the
+    configured format first.
+    """
+    preferred = config.GENERAL_SETTINGS.get("data_format", "csv")
+    for fmt in sorted(FULL_PRECISION_FORMATS, key=lambda name: name != preferred):
+        store = get_store(fmt, data_dir=data_dir)
+        if store.exists(symbol, timeframe):
+            return store
+    return None
+
+
+def list_datasets(data_dir=None, formats=None):
+    """
+    List the distinct (symbol, timeframe) pairs stored in the data directory.
+    :param formats: Storage formats to look at (defaults to the full-precision ones).
+    """
+    data_dir = data_dir or config.GENERAL_SETTINGS["data_path"]
+    extensions = tuple(STORES[fmt].extension for fmt in (formats or FULL_PRECISION_FORMATS))
+    if not os.path.isdir(data_dir):
+        return []
+
+    datasets = set()
+    for file in os.listdir(data_dir):
+        if not file.endswith(extensions) or file.count('_') < 2:
+            continue
+        base, quote, timeframe = os.path.splitext(file)[0].rsplit('_', 2)
+        datasets.add((f"{base}/{quote}", timeframe))
+    return sorted(datasets)
+
+
+def import_csv(csv_path, symbol, timeframe, fmt='npy', data_dir=None):
+    """
+    Import an OHLCV CSV file into the given full-precision storage backend.
+    """
+    if fmt not in FULL_PRECISION_FORMATS:
+        raise ValueError(f"Cannot import into '{fmt}'. Options: {', '.join(FULL_PRECISION_FORMATS)}")
+    df = pd.read_csv(csv_path, index_col='timestamp', parse_dates=True)
+    get_store(fmt, data_dir=data_dir).save(df, symbol, timeframe)
+    return df
+
+
+def export_csv(symbol, timeframe, csv_path=None, fmt='npy', data_dir=None):
+    """
+    Export a dataset from the given storage backend to CSV.
+    """
+    store = get_store(fmt, data_dir=data_dir)
+    csv_path = csv_path or CsvStore(data_dir=store.data_dir).path(symbol, timeframe)
+    store.load(symbol, timeframe).to_csv(csv_path)
+    return csv_path
+
+
+def migrate(fmt='npy', data_dir=None, remove_csv=False):
+    """
+    One-shot conversion of every candle CSV in the data directory to 'fmt'.
+    """
+    if fmt not in FULL_PRECISION_FORMATS:
+        raise ValueError(f"Cannot migrate to '{fmt}'; the float32 copies are built with compact(). "
+                         f"Options: {', '.join(FULL_PRECISION_FORMATS)}")
+    store = get_store(fmt, data_dir=data_dir)
+    csv_store = CsvStore(data_dir=store.data_dir)
+    migrated = []
+    for symbol, timeframe in list_datasets(store.data_dir, formats=['csv']):
+        df = csv_store.load(symbol, timeframe)
+        store.save(df, symbol, timeframe)
+        if remove_csv:
+            os.remove(csv_store.path(symbol, timeframe))
+            remove_from_manifest(csv_store, symbol, timeframe)
+        migrated.append((symbol, timeframe))
+        print(f"Migrated {symbol} {timeframe} ({len(df)} rows) to {store.path(symbol, timeframe)}")
+    print(f"Migrated {len(migrated)} datasets to '{fmt}'.")
+    return migrated
+
+
+def find_full_precision_store(symbol, timeframe, data_dir=None):
+    """
+    First float64 (or text) backend holding the dataset, skipping the compact store.
+    """
+    for fmt in FULL_PRECISION_FORMATS:
+        store = get_store(fmt, data_dir=data_dir)
+        if store.exists(symbol, timeframe):
+            return store
+    return None
+
+
+def compact(symbol, timeframe, data_dir=None):
+    """
+    Write the float32 copy of a dataset from its full-precision source.
+    """
+    source = find_full_precision_store(symbol, timeframe, data_dir=data_dir)
+    if source is None:
+        raise ValueError(f"No full-precision data for {symbol} {timeframe}.")
+    target = CompactStore(data_dir=source.data_dir)
+    target.save(source.load(symbol, timeframe), symbol, timeframe)
+    return target
+
+
+def load_compact_arrays(symbol, timeframe, start=None, end=None, data_dir=None):
+    """
+    Memory-mapped float32 CandleArrays for a dataset, creating the compact copy
+    on first use or when the full-precision source has changed since.
+    """
+    store = CompactStore(data_dir=data_dir)
+    source = find_full_precision_store(symbol, timeframe, data_dir=data_dir)
+    if not store.exists(symbol, timeframe) or (
+        source is not None and source.fingerprint(symbol, timeframe)[1] > store.fingerprint(symbol, timeframe)[1]
+    ):
+        compact(symbol, timeframe, data_dir=data_dir)
+    return store.load_arrays(symbol, timeframe, start=start, end=end, mmap=True)
+
+
+def precision_report(data_dir=None):
+    """
+    Per-dataset error introduced by storing OHLCV as float32. 'tick' is the
+    smallest price step seen in the data; a dataset is safe when no price
+    moves to a different tick after the float32 round trip.
+    """
+    rows = []
+    for symbol, timeframe in list_datasets(data_dir):
+        df = find_full_precision_store(symbol, timeframe, data_dir=data_dir).load(symbol, timeframe)
+        prices = df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        prices32 = prices.astype(np.float32).astype(np.float64)
+        volume32 = volume.astype(np.float32).astype(np.float64)
+
+        steps = np.diff(np.unique(prices))
+        steps = steps[steps > 1e-12]
+        tick = float(steps.min()) if len(steps) else float('nan')
+        ticks_changed = int(np.count_nonzero(np.round(prices / tick) != np.round(prices32 / tick))) if len(steps) else 0
+
+        nonzero_volume = volume != 0
+        rows.append({
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'max_price': float(prices.max()),
+            'tick': tick,
+            'float32_spacing': float(np.spacing(np.float32(prices.max()))),
+            'max_abs_price_error': float(np.abs(prices32 - prices).max()),
+            'max_rel_price_error': float((np.abs(prices32 - prices) / np.abs(prices)).max()),
+            'max_rel_volume_error': float((np.abs(volume32 - volume)[nonzero_volume] / volume[nonzero_volume]).max())
+                                    if nonzero_volume.any() else 0.0,
+            'ticks_changed': ticks_changed,
+            'safe': ticks_changed == 0,
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Candle storage utilities")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Convert every CSV in Data_store to a binary format")
+    migrate_parser.add_argument("--format", default="npy", choices=FULL_PRECISION_FORMATS)
+    migrate_parser.add_argument("--data-dir", default=None)
+    migrate_parser.add_argument("--remove-csv", action="store_true")
+
+    export_parser = subparsers.add_parser("export", help="Export a stored dataset to CSV")
+    export_parser.add_argument("symbol")
+    export_parser.add_argument("timeframe")
+    export_parser.add_argument("--output", default=None)
+    export_parser.add_argument("--format", default="npy", choices=list(STORES))
+
+    import_parser = subparsers.add_parser("import", help="Import a CSV file into a binary format")
+    import_parser.add_argument("csv_path")
+    import_parser.add_argument("symbol")
+    import_parser.add_argument("timeframe")
+    import_parser.add_argument("--format", default="npy", choices=FULL_PRECISION_FORMATS)
+
+    compact_parser = subparsers.add_parser("compact", help="Write float32 copies of every dataset")
+    compact_parser.add_argument("--data-dir", default=None)
+
+    precision_parser = subparsers.add_parser("precision", help="Report float32 precision loss per dataset")
+    precision_parser.add_argument("--data-dir", default=None)
+    precision_parser.add_argument("--output", default=None, help="Optional CSV path for the report")
+
+    args = parser.parse_args()
+    if args.command == "compact":
+        for symbol, timeframe in list_datasets(args.data_dir):
+            print(f"Compacted {symbol} {timeframe} to {compact(symbol, timeframe, args.data_dir).path(symbol, timeframe)}")
+    elif args.command == "precision":
+        report = precision_report(args.data_dir)
+        pd.set_option("display.width", 200)
+        print(report.to_string(index=False))
+        if args.output:
+            report.to_csv(args.output, index=False)
+    elif args.command == "migrate":
+        migrate(fmt=args.format, data_dir=args.data_dir, remove_csv=args.remove_csv)
+    elif args.command == "export":
+        print(f"Exported to {export_csv(args.symbol, args.timeframe, args.output, fmt=args.format)}")
+    elif args.command == "import":
+        import_csv(args.csv_path, args.symbol, args.timeframe, fmt=args.format)
+        print(f"Imported {args.csv_path} as {args.symbol} {args.timeframe}")
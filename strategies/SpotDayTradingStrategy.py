@@ -1,5 +1,6 @@
 # strategies/
 import backtrader as bt
+from indicator_cache import indicator
 class SpotDayTradingStrategy(bt.Strategy):
     params = (
         ('ema_short_period', 30),
@@ -19,21 +20,26 @@ class SpotDayTradingStrategy(bt.Strategy):
         ('volume_filter_period', 20),  # Period for volume moving average filter
         ('volatility_filter', True),  # Enable/disable volatility filter
         ('max_atr_threshold', 2.0),  # Max ATR threshold for volatility filter
+        ('use_indicator_cache', False),  # Reuse indicator lines computed by earlier runs on the same data
     )
 
     def __init__(self):
         # Indicators
-        self.ema_short = bt.indicators.EMA(self.data.close, period=self.params.ema_short_period)
-        self.ema_long = bt.indicators.EMA(self.data.close, period=self.params.ema_long_period)
-        self.rsi = bt.indicators.RSI(self.data.close, period=self.params.rsi_period)
-        self.macd = bt.indicators.MACD(
+        cached = self.params.use_indicator_cache
+        self.ema_short = indicator(bt.indicators.EMA, self.data.close, enabled=cached, period=self.params.ema_short_period)
+        self.ema_long = indicator(bt.indicators.EMA, self.data.close, enabled=cached, period=self.params.ema_long_period)
+        self.rsi = indicator(bt.indicators.RSI, self.data.close, enabled=cached, period=self.params.rsi_period)
+        self.macd = indicator(
+            bt.indicators.MACD,
             self.data.close,
+            enabled=cached,
             period_me1=self.params.macd_fast,
             period_me2=self.params.macd_slow,
             period_signal=self.params.macd_signal
         )
-        self.atr = bt.indicators.ATR(self.data, period=14)  # ATR for dynamic risk management
-        self.volume_sma = bt.indicators.SimpleMovingAverage(self.data.volume, period=self.params.volume_filter_period)
+        self.atr = indicator(bt.indicators.ATR, self.data, enabled=cached, period=14)  # ATR for dynamic risk management
+        self.volume_sma = indicator(bt.indicators.SimpleMovingAverage, self.data.volume, enabled=cached,
+                                    period=self.params.volume_filter_period)
 
         # Track the last trade bar index and trade entry time
         self.last_trade_bar = -self.params.cooldown_period
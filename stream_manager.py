@@ -0,0 +1,226 @@
+# stream_manager.py
+
+import asyncio
+import inspect
+import json
+import websockets
+
+MEXC_WS_URL = "wss://wbs.mexc.com/ws"
+
+# MEXC accepts at most 30 subscriptions per connection
+MAX_SUBSCRIPTIONS_PER_CONNECTION = 30
+
+
+def deals_channel(symbol):
+    """
+    Public trades channel for a symbol such as 'BTC/USDT'.
+    """
+    return f"spot@public.deals.v3.api@{symbol.replace('/', '')}"
+
+
+def book_ticker_channel(symbol):
+    """
+    Best bid/ask channel for a symbol such as 'BTC/USDT'.
+    """
+    return f"spot@public.bookTicker.v3.api@{symbol.replace('/', '')}"
+
+
+class _Connection:
+    """
+    One WebSocket connection and the channels it is subscribed to. The
+    connection reconnects and resubscribes on its own until stopped.
+    """
+
+    def __init__(self, manager, index):
+        self.manager = manager
+        self.index = index
+        self.channels = []
+        self.websocket = None
+        self.connected = asyncio.Event()
+        self.reconnects = 0
+
+    async def run(self):
+        delay = self.manager.reconnect_delay
+        while not self.manager.stopping:
+            try:
+                async with websockets.connect(self.manager.url, ping_interval=None, max_queue=None) as websocket:
+                    self.websocket = websocket
+                    await self._subscribe(self.channels)
+                    self.connected.set()
+                    delay = self.manager.reconnect_delay
+                    await self._receive_with_keepalive(websocket)
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncio.TimeoutError, websockets.ConnectionClosed, websockets.InvalidHandshake) as e:
+                if self.manager.stopping:
+                    break
+                print(f"Stream connection {self.index} lost ({e!r}), reconnecting in {delay:.1f}s...")
+            except Exception as e:
+                # Anything else (e.g. a malformed frame) must not end the connection for good
+                if self.manager.stopping:
+                    break
+                print(f"Stream connection {self.index} failed ({e!r}), reconnecting in {delay:.1f}s...")
+            finally:
+                self.websocket = None
+                self.connected.clear()
+
+            if self.manager.stopping:
+                break
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.manager.max_reconnect_delay)
+
+    async def _subscribe(self, channels, method="SUBSCRIPTION"):
+        if channels and self.websocket is not None:
+            await self.websocket.send(json.dumps({"method": method, "params": list(channels)}))
+
+    async def _receive_with_keepalive(self, websocket):
+        pinger = asyncio.create_task(self._keepalive(websocket))
+        try:
+            while True:
+                # Silence for two ping intervals means the connection is dead
+                message = await asyncio.wait_for(websocket.recv(), timeout=self.manager.ping_interval * 2)
+                await self.manager._dispatch(message)
+        finally:
+            pinger.cancel()
+            # Collect the pinger's outcome so its failures are reported, not lost with the task
+            error = (await asyncio.gather(pinger, return_exceptions=True))[0]
+            if isinstance(error, Exception) and not isinstance(error, websockets.ConnectionClosed):
+                print(f"Stream connection {self.index} keepalive failed ({error!r})")
+
+    async def _keepalive(self, websocket):
+        try:
+            while True:
+                await asyncio.sleep(self.manager.ping_interval)
+                await websocket.send(json.dumps({"method": "PING"}))
+        except websockets.ConnectionClosed:
+            raise  # recv() sees the closed connection as well
+        except Exception:
+            # Without pings the server drops us anyway; close now so run() reconnects
+            await websocket.close()
+            raise
+
+
+class StreamManager:
+    """
+    Multiplexes many symbol/channel subscriptions over a small pool of
+    asyncio WebSocket connections. Each channel is delivered to its
+    callbacks (sync or async) and/or asyncio queues.
+    """
+
+    def __init__(self, url=MEXC_WS_URL, max_subscriptions=MAX_SUBSCRIPTIONS_PER_CONNECTION,
+                 ping_interval=20, reconnect_delay=1.0, max_reconnect_delay=30.0):
+        """
+        :param url: WebSocket endpoint.
+        :param max_subscriptions: Channels per connection before a new connection is opened.
+        :param ping_interval: Seconds between application-level PING messages.
+        :param reconnect_delay: Initial delay before reconnecting; doubles up to max_reconnect_delay.
+        """
+        self.url = url
+        self.max_subscriptions = max_subscriptions
+        self.ping_interval = ping_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connections = []
+        self.handlers = {}  # channel -> list of callbacks / queues
+        self.tasks = []
+        self.stopping = False
+        self.messages = 0
+        self.callback_errors = 0
+
+    def subscribe(self, channel, callback=None, queue_size=10000):
+        """
+        Subscribe to a channel. With a callback, every message for the channel is
+        passed to it; without one, an asyncio.Queue is returned instead. When a
+        queue is full its oldest message is dropped so the receive loop never blocks.
+        """
+        target = callback if callback is not None else asyncio.Queue(maxsize=queue_size)
+        if channel not in self.handlers:
+            self.handlers[channel] = []
+            connection = self._connection_with_room()
+            connection.channels.append(channel)
+            if connection.websocket is not None:
+                asyncio.ensure_future(connection._subscribe([channel]))
+        self.handlers[channel].append(target)
+        return target
+
+    def unsubscribe(self, channel):
+        self.handlers.pop(channel, None)
+        for connection in self.connections:
+            if channel in connection.channels:
+                connection.channels.remove(channel)
+                if connection.websocket is not None:
+                    asyncio.ensure_future(connection._subscribe([channel], method="UNSUBSCRIPTION"))
+
+    def _connection_with_room(self):
+        for connection in self.connections:
+            if len(connection.channels) < self.max_subscriptions:
+                return connection
+        connection = _Connection(self, len(self.connections))
+        self.connections.append(connection)
+        if self.tasks:
+            self.tasks.append(asyncio.ensure_future(connection.run()))
+        return connection
+
+    async def _dispatch(self, raw):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        channel = message.get("c")
+        if channel is None:
+            return  # Subscription acks and PONG replies
+        self.messages += 1
+        for target in self.handlers.get(channel, []):
+            if isinstance(target, asyncio.Queue):
+                if target.full():
+                    target.get_nowait()
+                target.put_nowait(message)
+            else:
+                # One failing callback must not take the connection and its other channels down
+                try:
+                    result = target(message)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    self.callback_errors += 1
+                    print(f"Stream callback for {channel} failed ({e!r})")
+
+    async def start(self):
+        """
+        Open every connection in the background.
+        """
+        self.stopping = False
+        self.tasks = [asyncio.ensure_future(connection.run()) for connection in self.connections]
+
+    async def wait_connected(self, timeout=10):
+        await asyncio.wait_for(
+            asyncio.gather(*(connection.connected.wait() for connection in self.connections)), timeout
+        )
+
+    async def stop(self):
+        self.stopping = True
+        for connection in self.connections:
+            if connection.websocket is not None:
+                await connection.websocket.close()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def run_forever(self):
+        await self.start()
+        try:
+            await asyncio.gather(*self.tasks)
+        finally:
+            await self.stop()
+
+
+if __name__ == "__main__":
+    async def main():
+        manager = StreamManager()
+        for symbol in ["BTC/USDT", "ETH/USDT"]:
+            manager.subscribe(deals_channel(symbol), callback=lambda message: print(message))
+        await manager.run_forever()
+
+    asyncio.run(main())
@@ -0,0 +1,373 @@
+# tick_store.py
+
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import config
+import storage
+from resampler import WEEK_OFFSET_MS, timeframe_to_seconds
+
+TICK_FIELDS = ['timestamp', 'price', 'quantity', 'side']
+TICK_DTYPES = {'timestamp': np.int64, 'price': np.float64, 'quantity': np.float64, 'side': np.int8}
+CHUNK_EXTENSION = '.npz'
+
+# One chunk file: '<first ms>_<last ms>_<sequence>.npz'
+Chunk = namedtuple('Chunk', ['path', 'first', 'last'])
+
+
+def default_tick_dir():
+    return config.GENERAL_SETTINGS.get("tick_path") or os.path.join(config.GENERAL_SETTINGS["data_path"], "ticks")
+
+
+class TickStore:
+    """
+    Append-only trade storage: one folder per symbol holding immutable,
+    compressed chunk files. The time span of each chunk is encoded in its
+    file name, so range reads only open the chunks that overlap the window.
+    """
+
+    def __init__(self, tick_dir=None):
+        """
+        :param tick_dir: Root folder (defaults to config tick_path, or Data_store/ticks).
+        """
+        self.tick_dir = tick_dir or default_tick_dir()
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def path(self, symbol):
+        return os.path.join(self.tick_dir, symbol.replace('/', '_'))
+
+    def symbols(self):
+        if not os.path.isdir(self.tick_dir):
+            return []
+        return sorted(name.replace('_', '/', 1) for name in os.listdir(self.tick_dir)
+                      if os.path.isdir(os.path.join(self.tick_dir, name)))
+
+    def chunks(self, symbol, start=None, end=None):
+        """
+        Chunks of 'symbol' overlapping [start, end] (epoch ms), oldest first.
+        """
+        folder = self.path(symbol)
+        if not os.path.isdir(folder):
+            return []
+        found = []
+        for file in os.listdir(folder):
+            if not file.endswith(CHUNK_EXTENSION):
+                continue
+            first, last, _ = file[:-len(CHUNK_EXTENSION)].split('_')
+            first, last = int(first), int(last)
+            if (start is None or last >= start) and (end is None or first <= end):
+                found.append(Chunk(os.path.join(folder, file), first, last))
+        return sorted(found, key=lambda chunk: (chunk.first, chunk.path))
+
+    def append(self, symbol, timestamp, price, quantity, side=None):
+        """
+        Write one batch of trades as a new compressed chunk. Existing chunks are
+        never modified, so readers and the writer never need to coordinate.
+        :return: Path of the new chunk.
+        """
+        columns = {
+            'timestamp': np.asarray(timestamp, dtype=np.int64),
+            'price': np.asarray(price, dtype=np.float64),
+            'quantity': np.asarray(quantity, dtype=np.float64),
+            'side': np.zeros(len(timestamp), dtype=np.int8) if side is None else np.asarray(side, dtype=np.int8),
+        }
+        if not len(columns['timestamp']):
+            return None
+        order = np.argsort(columns['timestamp'], kind='stable')
+        columns = {field: values[order] for field, values in columns.items()}
+        return self._write_chunk(symbol, columns)
+
+    def _write_chunk(self, symbol, columns):
+        folder = self.path(symbol)
+        os.makedirs(folder, exist_ok=True)
+        with self._lock:
+            self._sequence += 1
+            sequence = f"{time.time_ns()}{self._sequence:06d}"
+        first, last = int(columns['timestamp'][0]), int(columns['timestamp'][-1])
+        target = os.path.join(folder, f"{first}_{last}_{sequence}{CHUNK_EXTENSION}")
+        # Written under a temp name and swapped in, so readers never see a partial chunk
+        tmp = target + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, **columns)
+        os.replace(tmp, target)
+        return target
+
+    def read_arrays(self, symbol, start=None, end=None):
+        """
+        Trades with start <= timestamp <= end (epoch ms) as a dict of column
+        arrays, sorted by time.
+        """
+        start, end = storage.to_epoch_ms(start), storage.to_epoch_ms(end)
+        parts = {field: [] for field in TICK_FIELDS}
+        for chunk in self.chunks(symbol, start, end):
+            with np.load(chunk.path) as data:
+                timestamps = data['timestamp']
+                lo, hi = storage._bounds(timestamps, start, end)
+                for field in TICK_FIELDS:
+                    parts[field].append(data[field][lo:hi])
+
+        if not parts['timestamp']:
+            return {field: np.empty(0, dtype=dtype) for field, dtype in TICK_DTYPES.items()}
+        columns = {field: np.concatenate(values) for field, values in parts.items()}
+        # Chunks can overlap when trades arrive late, so restore global time order
+        if len(columns['timestamp']) > 1 and (np.diff(columns['timestamp']) < 0).any():
+            order = np.argsort(columns['timestamp'], kind='stable')
+            columns = {field: values[order] for field, values in columns.items()}
+        return columns
+
+    def read(self, symbol, start=None, end=None):
+        """
+        Trades between start and end as a DataFrame indexed by timestamp.
+        """
+        columns = self.read_arrays(symbol, start, end)
+        index = pd.DatetimeIndex(pd.to_datetime(columns.pop('timestamp'), unit='ms'), name='timestamp')
+        return pd.DataFrame(columns, index=index)
+
+    def consolidate(self, symbol, max_rows=1000000):
+        """
+        Merge runs of small chunks into chunks of up to 'max_rows' trades. The
+        writer flushes often, so a day of capture leaves many small files.
+        :return: Number of chunks removed.
+        """
+        chunks = self.chunks(symbol)
+        groups, group, rows = [], [], 0
+        for chunk in chunks:
+            with np.load(chunk.path) as data:
+                count = len(data['timestamp'])
+            if group and rows + count > max_rows:
+                groups.append(group)
+                group, rows = [], 0
+            group.append(chunk)
+            rows += count
+        if group:
+            groups.append(group)
+
+        removed = 0
+        for group in groups:
+            if len(group) < 2:
+                continue
+            # Read the grouped files directly; a range read could pull in trades
+            # from overlapping chunks outside the group
+            parts = {field: [] for field in TICK_FIELDS}
+            for chunk in group:
+                with np.load(chunk.path) as data:
+                    for field in TICK_FIELDS:
+                        parts[field].append(data[field])
+            columns = {field: np.concatenate(values) for field, values in parts.items()}
+            order = np.argsort(columns['timestamp'], kind='stable')
+            self._write_chunk(symbol, {field: values[order] for field, values in columns.items()})
+            for chunk in group:
+                os.remove(chunk.path)
+            removed += len(group) - 1
+        return removed
+
+    def size_on_disk(self, symbol):
+        return sum(os.path.getsize(chunk.path) for chunk in self.chunks(symbol))
+
+
+class TickWriter:
+    """
+    Background writer for a TickStore. put() and on_message() only enqueue,
+    so a WebSocket receive loop never waits on disk; a worker thread batches
+    trades per symbol and writes a chunk once 'batch_size' trades are buffered
+    or 'flush_interval' seconds have passed. A failed write is retried on the
+    next flush interval; after 'max_retries' failures in a row the symbol's
+    buffered trades are dropped and counted in 'dropped'.
+    """
+
+    def __init__(self, store=None, batch_size=5000, flush_interval=1.0, max_queue=1_000_000, max_retries=3):
+        """
+        :param store: TickStore to write to (defaults to the configured tick folder).
+        :param batch_size: Trades per symbol that trigger a chunk write.
+        :param flush_interval: Maximum seconds a trade waits in memory before it is written.
+        :param max_queue: Trades the queue holds before new ones are dropped, so a
+                          stalled writer cannot grow memory without bound.
+        :param max_retries: Consecutive failed writes before a symbol's buffer is dropped.
+        """
+        self.store = store or TickStore()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.buffers = {}  # symbol -> list of (timestamp, price, quantity, side)
+        self.written = 0
+        self.chunks = 0
+        self.dropped = 0
+        self.errors = []
+        self.failures = {}  # symbol -> consecutive failed writes
+        self.thread = None
+        self._stopping = threading.Event()
+
+    def put(self, symbol, timestamp, price, quantity, side=0):
+        self._enqueue((symbol, timestamp, price, quantity, side))
+
+    def on_message(self, message):
+        """
+        Enqueue the trades of a MEXC 'spot@public.deals.v3.api' message as
+        delivered by StreamManager.
+        """
+        symbol = message.get('s', '')
+        if symbol.endswith('USDT') and '/' not in symbol:
+            symbol = f"{symbol[:-4]}/USDT"
+        for deal in message.get('d', {}).get('deals', []):
+            self._enqueue((symbol, int(deal['t']), float(deal['p']), float(deal['v']), int(deal.get('S', 0))))
+
+    def _enqueue(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100_000 == 0:
+                print(f"Tick queue full ({self.queue.maxsize} trades): {self.dropped} trades dropped so far")
+
+    def start(self):
+        self._stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="tick-writer", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Write everything still queued or buffered, then stop the worker.
+        """
+        self._stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _flush(self, symbol):
+        rows = self.buffers.pop(symbol, None)
+        if not rows:
+            return
+        timestamp, price, quantity, side = zip(*rows)
+        try:
+            self.store.append(symbol, timestamp, price, quantity, side)
+        except Exception as e:
+            self.errors.append((symbol, e))
+            self.failures[symbol] = self.failures.get(symbol, 0) + 1
+            if self.failures[symbol] >= self.max_retries:
+                self.dropped += len(rows)
+                del self.failures[symbol]
+                print(f"Tick write for {symbol} failed {self.max_retries} times, dropped {len(rows)} trades: {e}")
+            else:
+                # Keep the trades, ahead of any that arrived meanwhile, for the next flush
+                self.buffers[symbol] = rows + self.buffers.get(symbol, [])
+                print(f"Tick write for {symbol} failed, retrying {len(rows)} trades: {e}")
+            return
+        self.failures.pop(symbol, None)
+        self.written += len(rows)
+        self.chunks += 1
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=min(self.flush_interval, 0.1))
+            except queue.Empty:
+                item = None
+
+            # Drain whatever else is queued without waiting
+            while item is not None:
+                symbol = item[0]
+                buffer = self.buffers.setdefault(symbol, [])
+                buffer.append(item[1:])
+                # Symbols whose last write failed are only retried on the flush interval
+                if len(buffer) >= self.batch_size and symbol not in self.failures:
+                    self._flush(symbol)
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            stopping = self._stopping.is_set()
+            if stopping or time.monotonic() - last_flush >= self.flush_interval:
+                for symbol in list(self.buffers):
+                    self._flush(symbol)
+                last_flush = time.monotonic()
+            if stopping and self.queue.empty():
+                break
+
+        unwritten = sum(len(rows) for rows in self.buffers.values())
+        if unwritten:
+            self.dropped += unwritten
+            self.buffers.clear()
+            print(f"Tick writer stopped with {unwritten} unwritten trades")
+
+
+def ticks_to_ohlcv(timestamps, prices, quantities, timeframe):
+    """
+    Aggregate sorted trades into OHLCV candles in the load_data layout. Only
+    buckets that contain trades produce a candle.
+    """
+    period = timeframe_to_seconds(timeframe) * 1000
+    offset = WEEK_OFFSET_MS if timeframe.endswith('w') else 0
+    if not len(timestamps):
+        return storage.rows_to_frame([])
+    buckets = (timestamps - offset) // period * period + offset
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+    return pd.DataFrame({
+        'open': prices[starts],
+        'high': np.maximum.reduceat(prices, starts),
+        'low': np.minimum.reduceat(prices, starts),
+        'close': prices[ends],
+        'volume': np.add.reduceat(quantities, starts),
+    }, index=pd.DatetimeIndex(pd.to_datetime(buckets[starts], unit='ms'), name='timestamp'))
+
+
+def compact(symbol, timeframes=('1m',), tick_store=None, data_dir=None, until=None):
+    """
+    Roll captured trades up into the OHLCV datasets load_data serves. Only
+    buckets that have fully closed before 'until' (epoch ms, default now) and
+    start after the last stored candle are written, so the job can run
+    repeatedly and never rewrites existing candles.
+    :return: Dict of timeframe -> number of candles appended.
+    """
+    tick_store = tick_store or TickStore()
+    data_dir = data_dir or config.GENERAL_SETTINGS["data_path"]
+    until = storage.to_epoch_ms(until) if until is not None else int(time.time() * 1000)
+    added = {}
+    for timeframe in timeframes:
+        period = timeframe_to_seconds(timeframe) * 1000
+        store = storage.find_store(symbol, timeframe, data_dir=data_dir) or storage.get_store(data_dir=data_dir)
+        last = store.last_timestamp(symbol, timeframe)
+        start = last + period if last is not None else None
+
+        ticks = tick_store.read_arrays(symbol, start=start, end=until - 1)
+        candles = ticks_to_ohlcv(ticks['timestamp'], ticks['price'], ticks['quantity'], timeframe)
+        closed = storage.index_to_epoch_ms(candles.index) + period <= until
+        candles = candles[closed]
+        if not candles.empty:
+            rows = np.column_stack([storage.index_to_epoch_ms(candles.index), candles.to_numpy()]).tolist()
+            store.append(rows, symbol, timeframe)
+        added[timeframe] = len(candles)
+        print(f"Compacted {len(ticks['timestamp'])} trades into {len(candles)} {timeframe} candles for {symbol}")
+    return added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Captured trade storage")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compact_parser = subparsers.add_parser("compact", help="Roll trades up into OHLCV files and merge small chunks")
+    compact_parser.add_argument("--symbols", nargs="+", default=None, help="Default: every captured symbol")
+    compact_parser.add_argument("--timeframes", nargs="+", default=["1m"])
+    list_parser = subparsers.add_parser("list", help="Show captured symbols, chunk counts and sizes")
+    args = parser.parse_args()
+
+    tick_store = TickStore()
+    if args.command == "compact":
+        for symbol in args.symbols or tick_store.symbols():
+            compact(symbol, args.timeframes, tick_store=tick_store)
+            removed = tick_store.consolidate(symbol)
+            print(f"Merged {removed} small chunks for {symbol}")
+    else:
+        for symbol in tick_store.symbols():
+            chunks = tick_store.chunks(symbol)
+            print(f"{symbol}: {len(chunks)} chunks, {tick_store.size_on_disk(symbol) / 1024:.0f} KB, "
+                  f"{pd.to_datetime(chunks[0].first, unit='ms')} to {pd.to_datetime(chunks[-1].last, unit='ms')}")
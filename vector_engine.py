@@ -0,0 +1,389 @@
+# vector_engine.py
+#
+# Array-based backtest engine for strategies whose decisions are pure
+# functions of rolling indicators. Signals are computed for every bar at
+# once; fills are simulated only at the bars where an order is requested,
+# following backtrader's broker rules (market orders fill at the next open,
+# percentage commission, cash checks at submission and execution), so the
+# results match a Cerebro run with Backtester.configure's analyzers.
+
+import argparse
+import math
+import time
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from metrics import analysis_metrics
+
+Fill = namedtuple('Fill', ['bar', 'size', 'price', 'commission'])
+Trade = namedtuple('Trade', ['open_bar', 'close_bar', 'size', 'price', 'pnl', 'pnlcomm'])
+VectorResult = namedtuple('VectorResult', ['value', 'position', 'fills', 'trades', 'analyses', 'final_value'])
+
+
+def _rolling(values, period, reducer):
+    result = np.full(len(values), np.nan)
+    if len(values) >= period:
+        result[period - 1:] = reducer(sliding_window_view(values, period), axis=1)
+    return result
+
+
+def rolling_mean(values, period):
+    """
+    Simple moving average, NaN until 'period' values are available.
+    """
+    return _rolling(values, period, np.sum) / period
+
+
+def rolling_max(values, period):
+    return _rolling(values, period, np.max)
+
+
+def rolling_min(values, period):
+    return _rolling(values, period, np.min)
+
+
+# Each signal function returns the signed number of unit orders the strategy
+# would place on every bar while flat (+n buys, -n sells), plus the bars where
+# it would close an open position (None when it never exits).
+
+def sideways_signals(df, ma_period=50, range_buffer=0.01):
+    close = df['close'].to_numpy()
+    ma = rolling_mean(close, ma_period)
+    orders = np.zeros(len(close), dtype=np.int64)
+    long_entry = close < ma * (1 - range_buffer)
+    orders[long_entry] = 1
+    orders[~long_entry & (close > ma * (1 + range_buffer))] = -1
+    return orders, None
+
+
+def liquidity_hunting_signals(df, liquidity_period=10, buffer=0.05):
+    high, low = df['high'].to_numpy(), df['low'].to_numpy()
+    upper_zone = rolling_max(high, liquidity_period) * (1 + buffer)
+    lower_zone = rolling_min(low, liquidity_period) * (1 - buffer)
+    orders = np.zeros(len(high), dtype=np.int64)
+    long_entry = low < lower_zone
+    orders[long_entry] = 1
+    orders[~long_entry & (high > upper_zone)] = -1
+    return orders, None
+
+
+def fibonacci_signals(df, short_ma_period=21, long_ma_period=50, fib_levels=(0.236, 0.382, 0.5, 0.618)):
+    close = df['close'].to_numpy()
+    short_ma, long_ma = rolling_mean(close, short_ma_period), rolling_mean(close, long_ma_period)
+    high, low = rolling_max(df['high'].to_numpy(), 20), rolling_min(df['low'].to_numpy(), 20)
+    diff = high - low
+
+    # backtrader's next() calls buy()/sell() once per matching level, all before
+    # the position updates, so several levels on one bar mean several orders
+    near_levels = np.zeros(len(close), dtype=np.int64)
+    for level in fib_levels:
+        fib = high - diff * level
+        near_levels += np.abs(close - fib) <= 0.01 * fib
+    orders = np.where(short_ma > long_ma, near_levels, 0) - np.where(short_ma < long_ma, near_levels, 0)
+    # No next() runs before the longest indicator is ready
+    orders[:max(short_ma_period, long_ma_period, 20) - 1] = 0
+    return orders, None
+
+
+SIGNALS = {
+    'SidewaysPriceActionStrategy': sideways_signals,
+    'LiquidityHuntingStrategy': liquidity_hunting_signals,
+    'FibonacciRetracementStrategy': fibonacci_signals,
+}
+
+
+def simulate(open_, close, orders, exits=None, cash=1000, commission=0.001, stake=1):
+    """
+    Simulate fills for an order-request array. The loop only visits bars
+    where an order is requested, so its cost does not depend on the number of bars.
+    :param orders: Signed unit orders requested per bar while flat.
+    :param exits: Optional boolean array, or a (long_exits, short_exits) pair; a
+                  true bar closes an open position at the next open.
+    :return: (cash, position) per bar, list of Fill and list of Trade (open trades have close_bar None).
+    """
+    n = len(close)
+    start_cash = cash
+    request_bars = np.flatnonzero(orders)
+    if exits is None:
+        exits = np.zeros(n, dtype=bool)
+    long_exits, short_exits = exits if isinstance(exits, tuple) else (exits, exits)
+    exit_bars = {1: np.flatnonzero(long_exits), -1: np.flatnonzero(short_exits)}
+    fills, trades = [], []
+    position, entry_price, entry_bar, entry_comm = 0, 0.0, None, 0.0
+    bar = 0
+
+    while True:
+        if position == 0:
+            i = int(np.searchsorted(request_bars, bar))
+            if i == len(request_bars) or request_bars[i] + 1 >= n:
+                break
+            t = int(request_bars[i])
+            side = 1 if orders[t] > 0 else -1
+
+            # Submission check: each order is pseudo-executed at the signal close
+            # and the remaining cash carries over to the next order of the bar
+            pseudo_cash, accepted = cash, 0
+            for _ in range(abs(int(orders[t]))):
+                pseudo_cash -= side * stake * close[t] + stake * close[t] * commission
+                if pseudo_cash < 0:
+                    break
+                accepted += 1
+
+            # Execution at the next open; an order the cash cannot cover is rejected
+            price = open_[t + 1]
+            for _ in range(accepted):
+                comm = stake * price * commission
+                remaining = cash - side * stake * price - comm
+                if remaining < 0:
+                    continue
+                cash = remaining
+                position += side * stake
+                entry_comm += comm
+                fills.append(Fill(t + 1, side * stake, price, comm))
+            if position:
+                entry_price, entry_bar = price, t + 1
+            bar = t + 1
+        else:
+            bars = exit_bars[1 if position > 0 else -1]
+            j = int(np.searchsorted(bars, bar))
+            if j == len(bars) or bars[j] + 1 >= n:
+                break
+            t = int(bars[j])
+            if cash + position * close[t] - abs(position) * close[t] * commission < 0:
+                bar = t + 1  # Closing a short the cash cannot cover is rejected at submission
+                continue
+            price = open_[t + 1]
+            comm = abs(position) * price * commission
+            cash += position * price - comm
+            fills.append(Fill(t + 1, -position, price, comm))
+            pnl = (price - entry_price) * position
+            trades.append(Trade(entry_bar, t + 1, position, entry_price, pnl, pnl - entry_comm - comm))
+            position, entry_comm = 0, 0.0
+            bar = t + 1
+
+    if position:
+        trades.append(Trade(entry_bar, None, position, entry_price, None, None))
+
+    # Cash and position are step functions that only change on fill bars
+    cash_delta, position_delta = np.zeros(n), np.zeros(n)
+    for fill in fills:
+        cash_delta[fill.bar] -= fill.size * fill.price + fill.commission
+        position_delta[fill.bar] += fill.size
+    return start_cash + np.cumsum(cash_delta), np.cumsum(position_delta), fills, trades
+
+
+def drawdown_analysis(value):
+    """
+    Same fields as backtrader's DrawDown analyzer, from the per-bar portfolio value.
+    """
+    peak = np.maximum.accumulate(value)
+    moneydown = peak - value
+    drawdown = 100.0 * moneydown / peak
+
+    # Length of the current run of bars below the peak, like DrawDown.next()
+    underwater = drawdown != 0
+    positions = np.arange(len(value))
+    last_peak = np.maximum.accumulate(np.where(underwater, -1, positions))
+    lengths = np.where(underwater, positions - last_peak, 0)
+    return {
+        'len': int(lengths[-1]) if len(lengths) else 0,
+        'drawdown': float(drawdown[-1]) if len(value) else 0.0,
+        'moneydown': float(moneydown[-1]) if len(value) else 0.0,
+        'max': {
+            'len': int(lengths.max()) if underwater.any() else 0.0,
+            'drawdown': float(drawdown.max()) if len(value) else 0.0,
+            'moneydown': float(moneydown.max()) if len(value) else 0.0,
+        },
+    }
+
+
+def sharpe_analysis(value, timestamps, start_value, riskfreerate=0.01):
+    """
+    backtrader's default SharpeRatio: yearly returns against a 1% risk-free
+    rate, population standard deviation, not annualized.
+    """
+    years = pd.DatetimeIndex(timestamps).year.to_numpy()
+    last_of_year = np.flatnonzero(np.r_[years[1:] != years[:-1], True])
+    year_end_values = value[last_of_year]
+    starts = np.r_[start_value, year_end_values[:-1]]
+    returns = (year_end_values / starts - 1.0).tolist()
+
+    rate = pow(1.0 + riskfreerate, 1.0) - 1.0
+    ret_free = [r - rate for r in returns]
+    average = math.fsum(ret_free) / len(ret_free)
+    deviation = math.sqrt(math.fsum(pow(r - average, 2.0) for r in ret_free) / len(ret_free))
+    try:
+        ratio = average / deviation
+    except ZeroDivisionError:
+        ratio = None
+    return {'sharperatio': ratio}
+
+
+def trade_analysis(trades):
+    """
+    The TradeAnalyzer fields metrics.analysis_metrics reads.
+    """
+    closed = [trade for trade in trades if trade.close_bar is not None]
+    analysis = {'total': {'total': len(trades), 'open': len(trades) - len(closed)}}
+    if closed:
+        won = [trade for trade in closed if trade.pnlcomm >= 0.0]
+        lost = [trade for trade in closed if trade.pnlcomm < 0.0]
+        analysis['total']['closed'] = len(closed)
+        analysis['won'] = {'total': len(won), 'pnl': {'total': sum(trade.pnlcomm for trade in won)}}
+        analysis['lost'] = {'total': len(lost), 'pnl': {'total': sum(trade.pnlcomm for trade in lost)}}
+        analysis['len'] = {'average': sum(trade.close_bar - trade.open_bar for trade in closed) / len(closed)}
+    return analysis
+
+
+def strategy_params(strategy, overrides=None):
+    """
+    Default parameters of a backtrader strategy class, updated with 'overrides'.
+    """
+    params = dict(strategy.params._getpairs())
+    params.update(overrides or {})
+    return params
+
+
+def run(strategy, df, cash=1000, commission=0.001, stake=1, **params):
+    """
+    Backtest one strategy on one OHLCV frame (the load_data layout).
+    :param strategy: Strategy class or name; must be one of SIGNALS.
+    :param params: Strategy parameter overrides, as passed to cerebro.addstrategy.
+    :return: VectorResult with per-bar value/position, fills, trades and analyses
+             shaped like the sharpe/drawdown/tradeanalyzer analyzers.
+    """
+    name = strategy if isinstance(strategy, str) else strategy.__name__
+    if name not in SIGNALS:
+        raise ValueError(f"No vectorized signals for '{name}'. Supported: {', '.join(SIGNALS)}")
+    if not isinstance(strategy, str):
+        params = strategy_params(strategy, params)
+
+    orders, exits = SIGNALS[name](df, **params)
+    close = df['close'].to_numpy()
+    cash_curve, position, fills, trades = simulate(df['open'].to_numpy(), close, orders, exits,
+                                                   cash=cash, commission=commission, stake=stake)
+    value = cash_curve + position * close
+    analyses = {
+        'sharpe': sharpe_analysis(value, df.index, cash),
+        'drawdown': drawdown_analysis(value),
+        'tradeanalyzer': trade_analysis(trades),
+    }
+    return VectorResult(value, position, fills, trades, analyses, float(value[-1]))
+
+
+def result_metrics(result):
+    """
+    The metric columns Backtester.save_results writes, for a VectorResult.
+    """
+    metrics = {"final_portfolio_value": result.final_value}
+    analyses = result.analyses
+    metrics.update(analysis_metrics(analyses['sharpe'], analyses['drawdown'], analyses['tradeanalyzer']))
+    return metrics
+
+
+def _run_backtrader(strategy, df, cash, commission):
+    """
+    Reference run through Cerebro with the analyzers Backtester.configure adds.
+    :return: (metrics, list of Fill)
+    """
+    import backtrader as bt
+
+    class FillRecorder(bt.Analyzer):
+        def create_analysis(self):
+            self.rets = []
+
+        def notify_order(self, order):
+            if order.status == order.Completed:
+                self.rets.append(Fill(len(self.data) - 1, order.executed.size, order.executed.price,
+                                      order.executed.comm))
+
+    cerebro = bt.Cerebro()
+    cerebro.adddata(bt.feeds.PandasData(dataname=df))
+    cerebro.broker.setcash(cash)
+    cerebro.broker.setcommission(commission=commission)
+    cerebro.addstrategy(strategy)
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='tradeanalyzer')
+    cerebro.addanalyzer(FillRecorder, _name='fills')
+    strat = cerebro.run()[0]
+
+    metrics = {"final_portfolio_value": cerebro.broker.getvalue()}
+    metrics.update(analysis_metrics(strat.analyzers.sharpe.get_analysis(), strat.analyzers.drawdown.get_analysis(),
+                                    strat.analyzers.tradeanalyzer.get_analysis()))
+    return metrics, strat.analyzers.fills.get_analysis()
+
+
+def _close(a, b, tolerance):
+    if a is None or b is None:
+        return a is None and b is None
+    if isinstance(a, float) and math.isinf(a) or isinstance(b, float) and math.isinf(b):
+        return a == b
+    return abs(a - b) <= tolerance * max(1.0, abs(a), abs(b))
+
+
+def compare(strategies=None, datasets=None, cash=1000, commission=0.001, tolerance=1e-6):
+    """
+    Run every strategy through both engines on every stored dataset and check
+    that fills and metrics agree within 'tolerance' (relative).
+    :param datasets: List of (symbol, timeframe); defaults to everything in Data_store.
+    :return: DataFrame with one row per run, including timings and a 'match' column.
+    """
+    import data_access
+    import storage
+    from backtester import Backtester
+
+    rows = []
+    for symbol, timeframe in datasets or storage.list_datasets(data_access.DATA_DIR):
+        df = data_access.load_data(symbol, timeframe)
+        for name in strategies or SIGNALS:
+            strategy = Backtester.load_strategy(name)
+
+            started = time.perf_counter()
+            reference, reference_fills = _run_backtrader(strategy, df, cash, commission)
+            backtrader_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            result = run(strategy, df, cash=cash, commission=commission)
+            vector_seconds = time.perf_counter() - started
+            vector = result_metrics(result)
+
+            fills_match = len(reference_fills) == len(result.fills) and all(
+                a.bar == b.bar and a.size == b.size and _close(a.price, b.price, tolerance)
+                and _close(a.commission, b.commission, tolerance)
+                for a, b in zip(reference_fills, result.fills)
+            )
+            mismatched = [key for key in reference if not _close(reference[key], vector[key], tolerance)]
+            rows.append({
+                "symbol": symbol, "timeframe": timeframe, "strategy": name, "bars": len(df),
+                "fills": len(result.fills), "final_value": vector["final_portfolio_value"],
+                "backtrader_ms": backtrader_seconds * 1000, "vector_ms": vector_seconds * 1000,
+                "speedup": backtrader_seconds / vector_seconds,
+                "match": fills_match and not mismatched,
+                "mismatched": ",".join(mismatched) + ("" if fills_match else " fills"),
+            })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the vectorized engine against backtrader on Data_store")
+    parser.add_argument("--strategies", nargs="+", default=None)
+    parser.add_argument("--symbols", nargs="+", default=None)
+    parser.add_argument("--timeframes", nargs="+", default=None)
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    import data_access
+    import storage
+    datasets = [(symbol, timeframe) for symbol, timeframe in storage.list_datasets(data_access.DATA_DIR)
+                if (args.symbols is None or symbol in args.symbols)
+                and (args.timeframes is None or timeframe in args.timeframes)]
+    report = compare(strategies=args.strategies, datasets=datasets, tolerance=args.tolerance)
+    pd.set_option("display.width", 200)
+    print(report.round(3).to_string(index=False))
+    print()
+    print(f"{int(report['match'].sum())}/{len(report)} runs match; backtrader {report['backtrader_ms'].sum():.0f} ms, "
+          f"vectorized {report['vector_ms'].sum():.0f} ms ({report['backtrader_ms'].sum() / report['vector_ms'].sum():.0f}x)")
+    if not report['match'].all():
+        raise SystemExit(1)
@@ -0,0 +1,130 @@
+# ws_standin.py
+
+import asyncio
+import json
+import random
+import time
+import websockets
+
+
+class StandInServer:
+    """
+    Local stand-in for the MEXC spot WebSocket. It speaks the same JSON
+    protocol (SUBSCRIPTION / UNSUBSCRIPTION / PING) and publishes synthetic
+    trade messages on every subscribed channel, so stream code can be run and
+    tested offline.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, messages_per_second=10, price_source=None, latency=0.0,
+                 disconnect_interval=None):
+        """
+        :param host: Interface to bind.
+        :param port: Port to bind (0 picks a free one; see self.url after start()).
+        :param messages_per_second: Messages pushed per channel per second.
+        :param price_source: Optional callable(channel) -> (price, quantity) used
+                             instead of the random walk.
+        :param latency: Seconds to wait before answering each request.
+        :param disconnect_interval: Drop every client this often (seconds) to
+                                    exercise reconnect handling.
+        """
+        self.host = host
+        self.port = port
+        self.messages_per_second = messages_per_second
+        self.price_source = price_source
+        self.latency = latency
+        self.disconnect_interval = disconnect_interval
+        self.disconnects = 0
+        self.server = None
+        self.dropper = None
+        self.clients = set()
+        self.subscriptions = 0
+        self.pings = 0
+        self.prices = {}
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self.server = await websockets.serve(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        if self.disconnect_interval:
+            self.dropper = asyncio.create_task(self._drop_periodically())
+        return self
+
+    async def stop(self):
+        if self.dropper is not None:
+            self.dropper.cancel()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def drop_all(self):
+        """
+        Close every client connection to exercise reconnect handling.
+        """
+        for websocket in list(self.clients):
+            self.disconnects += 1
+            await websocket.close(code=1011, reason="stand-in disconnect")
+
+    async def _drop_periodically(self):
+        while True:
+            await asyncio.sleep(self.disconnect_interval)
+            await self.drop_all()
+
+    def _next_trade(self, channel):
+        if self.price_source is not None:
+            return self.price_source(channel)
+        price = self.prices.get(channel, 100.0) * (1 + random.gauss(0, 0.0005))
+        self.prices[channel] = price
+        return price, random.uniform(0.01, 1.0)
+
+    async def _publish(self, websocket, channels):
+        interval = 1 / self.messages_per_second
+        while True:
+            for channel in list(channels):
+                price, quantity = self._next_trade(channel)
+                now = int(time.time() * 1000)
+                await websocket.send(json.dumps({
+                    "c": channel,
+                    "d": {"deals": [{"p": str(price), "v": str(quantity), "S": random.choice([1, 2]), "t": now}],
+                          "e": "spot@public.deals.v3.api"},
+                    "s": channel.rsplit("@", 1)[-1],
+                    "t": now,
+                }))
+            await asyncio.sleep(interval)
+
+    async def _handle(self, websocket):
+        self.clients.add(websocket)
+        channels = set()
+        publisher = asyncio.create_task(self._publish(websocket, channels))
+        try:
+            async for raw in websocket:
+                request = json.loads(raw)
+                method = request.get("method")
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if method == "PING":
+                    self.pings += 1
+                    await websocket.send(json.dumps({"id": 0, "code": 0, "msg": "PONG"}))
+                elif method in ("SUBSCRIPTION", "UNSUBSCRIPTION"):
+                    params = request.get("params", [])
+                    if method == "SUBSCRIPTION":
+                        channels.update(params)
+                        self.subscriptions += len(params)
+                    else:
+                        channels.difference_update(params)
+                    await websocket.send(json.dumps({"id": 0, "code": 0, "msg": ",".join(params)}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            publisher.cancel()
+            self.clients.discard(websocket)
+
+
+if __name__ == "__main__":
+    async def main():
+        server = await StandInServer(port=8765).start()
+        print(f"Stand-in WebSocket server listening on {server.url}")
+        await asyncio.Future()
+
+    asyncio.run(main())